@@ -0,0 +1,233 @@
+# coding=utf-8
+#
+# NAME:         generators.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Synthetic 'ip route' output for the benchmarks.  Every variant is generated from a fixed seed, so the same size
+# and variant always produce the same text on a given Python version.
+#
+#   Variants:
+#       ipv4        prefixes spread over a handful of next hops ('ip route')
+#       ipv6        the same for IPv6, as 'ip -6 route' prints it
+#       options     routes carrying protocol, scope, source, metric and route metrics ('mtu', 'initcwnd', ...)
+#       multipath   a quarter of the routes with two to four 'nexthop' lines each
+#       multitable  'ip route show table all': several tables, local and broadcast routes
+#
+#   generate_json() gives the same routes as 'ip -json route' prints them.
+#
+#   Usage: python benchmarks/generators.py [--json] variant lines > routes.txt
+#
+
+from __future__ import print_function
+
+import json
+import random
+import socket
+import struct
+import sys
+
+SIZES = {'1k': 1000, '100k': 100000, '1m': 1000000}
+VARIANTS = ('ipv4', 'ipv6', 'options', 'multipath', 'multitable')
+SEED = 20140101
+
+PROTOCOLS = ('kernel', 'boot', 'static', 'bgp', 'ospf', 'zebra')
+TABLES = ('main', '100', '200', 'mgmt')
+
+# 'ip route' keyword -> 'ip -json route' key
+JSON_KEYS = {'via': 'gateway', 'dev': 'dev', 'proto': 'protocol', 'scope': 'scope', 'src': 'prefsrc',
+             'metric': 'metric', 'table': 'table', 'pref': 'pref', 'expires': 'expires'}
+JSON_METRICS = frozenset(('mtu', 'advmss', 'initcwnd', 'initrwnd', 'rtt', 'rttvar'))
+JSON_TYPES = frozenset(('local', 'broadcast', 'unreachable'))
+
+
+def _ipv4(value):
+    return socket.inet_ntoa(struct.pack('!I', value))
+#---
+
+
+def _ipv6(value):
+    return socket.inet_ntop(socket.AF_INET6, struct.pack('!QQ', value >> 64, value & 0xffffffffffffffff))
+#---
+
+
+def _ipv4_prefix(rng):
+    length = rng.randint(8, 30)
+    network = rng.getrandbits(32) & (0xffffffff ^ ((1 << (32 - length)) - 1))
+    return network, length, '{}/{}'.format(_ipv4(network), length)
+#---
+
+
+def _ipv6_prefix(rng):
+    length = rng.choice((32, 40, 48, 48, 56, 64, 64, 64))
+    network = ((0x2001 << 112) | rng.getrandbits(112)) & (((1 << length) - 1) << (128 - length))
+    return network, length, '{}/{}'.format(_ipv6(network), length)
+#---
+
+
+def ipv4(rng, count):
+    yield 'default via 10.0.0.1 dev eth0 proto static metric 100'
+    for _ in range(count - 1):
+        _, _, route_prefix = _ipv4_prefix(rng)
+        pick = rng.getrandbits(16)
+        yield '{} via 10.0.{}.1 dev eth{}'.format(route_prefix, pick % 8, pick % 4)
+#---
+
+
+def ipv6(rng, count):
+    yield 'default via fe80::1 dev eth0 proto ra metric 1024 expires 1799sec pref medium'
+    for _ in range(count - 1):
+        _, _, route_prefix = _ipv6_prefix(rng)
+        pick = rng.getrandbits(16)
+        yield '{} via fe80::{:x} dev eth{} proto {} metric 1024 pref medium'.format(
+            route_prefix, pick % 8 + 1, pick % 4, PROTOCOLS[pick % len(PROTOCOLS)])
+#---
+
+
+def options(rng, count):
+    yield 'default via 10.0.0.1 dev eth0 proto dhcp src 10.0.0.5 metric 100'
+    for _ in range(count - 1):
+        _, _, route_prefix = _ipv4_prefix(rng)
+        pick = rng.getrandbits(16)
+        words = [route_prefix, 'via', '10.0.{}.1'.format(pick % 8), 'dev', 'eth{}'.format(pick % 4),
+                 'proto', PROTOCOLS[pick % len(PROTOCOLS)], 'scope', 'global',
+                 'src', '10.0.{}.5'.format(pick % 8), 'metric', str(pick % 500)]
+        if pick & 1:
+            words.extend(('mtu', str(1280 + pick % 8 * 32), 'advmss', str(1240 + pick % 8 * 32)))
+        if pick & 2:
+            words.extend(('initcwnd', str(pick % 40 + 10), 'initrwnd', str(pick % 40 + 10)))
+        if pick & 4:
+            words.extend(('rtt', '{}ms'.format(pick % 200 + 1), 'rttvar', '{}ms'.format(pick % 50 + 1)))
+        yield ' '.join(words)
+#---
+
+
+def multipath(rng, count):
+    """
+    Multipath routes take one line for the route and one per next hop, all of which count towards count.
+
+    """
+    yield 'default via 10.0.0.1 dev eth0 proto static metric 100'
+    produced = 1
+    while produced < count:
+        _, _, route_prefix = _ipv4_prefix(rng)
+        pick = rng.getrandbits(16)
+        hops = 2 + pick % 3 if pick & 0x300 == 0 else 0
+        if not hops or produced + hops + 1 > count:
+            yield '{} via 10.0.{}.1 dev eth{}'.format(route_prefix, pick % 8, pick % 4)
+            produced += 1
+            continue
+
+        yield '{} proto bgp metric 20 '.format(route_prefix)
+        for hop in range(hops):
+            yield '\tnexthop via 10.{}.{}.1 dev eth{} weight {} '.format(hop, pick % 8, hop, hop + 1)
+        produced += hops + 1
+#---
+
+
+def multitable(rng, count):
+    yield 'default via 10.0.0.1 dev eth0 proto static metric 100'
+    yield 'default via 192.168.0.1 dev mgmt0 table mgmt'
+    for position in range(count - 2):
+        network, length, route_prefix = _ipv4_prefix(rng)
+        pick = rng.getrandbits(16)
+        kind = position % 10
+        if kind == 0:
+            yield 'local {} dev eth{} table local proto kernel scope host src {}'.format(
+                _ipv4(network | 1), pick % 4, _ipv4(network | 1))
+        elif kind == 1:
+            yield 'broadcast {} dev eth{} table local proto kernel scope link src {}'.format(
+                _ipv4(network | ((1 << (32 - length)) - 1)), pick % 4, _ipv4(network | 1))
+        elif kind == 2:
+            yield 'unreachable {} table 200 metric 10'.format(route_prefix)
+        else:
+            table = TABLES[pick % len(TABLES)]
+            yield '{} via 10.0.{}.1 dev eth{}{}'.format(route_prefix, pick % 8, pick % 4,
+                                                      '' if table == 'main' else ' table ' + table)
+#---
+
+
+GENERATORS = {'ipv4': ipv4, 'ipv6': ipv6, 'options': options, 'multipath': multipath, 'multitable': multitable}
+
+
+def generate(variant='ipv4', count=1000, seed=SEED):
+    """
+    Generates 'ip route' output.
+
+    :param variant: One of VARIANTS
+    :param count: Number of lines (a key of SIZES works too)
+    :param seed: Random seed; the default gives the suite's standard tables
+    :returns: str
+    """
+    count = SIZES.get(count, count)
+    rng = random.Random(seed + VARIANTS.index(variant))
+    return '\n'.join(GENERATORS[variant](rng, int(count)))
+#---
+
+
+def _json_value(value):
+    # 'ip -json route' prints numbers as numbers, without the units 'ip route' adds
+    number = value[:-2] if value.endswith('ms') else value[:-3] if value.endswith('sec') else value
+    return int(number) if number.isdigit() else value
+#---
+
+
+def _json_route(line):
+    tokens = line.split()
+    route = {}
+    if tokens[0] in JSON_TYPES:
+        route['type'] = tokens.pop(0)
+    route['dst'] = tokens[0]
+
+    target = route
+    position = 1
+    while position < len(tokens):
+        keyword = tokens[position]
+        if keyword == 'nexthop':
+            target = {}
+            route.setdefault('nexthops', []).append(target)
+            position += 1
+            continue
+        value = _json_value(tokens[position + 1])
+        if keyword == 'weight':
+            target['weight'] = value
+        elif keyword in JSON_METRICS:
+            route.setdefault('metrics', [{}])[0][keyword] = value
+        else:
+            target[JSON_KEYS[keyword]] = value
+        position += 2
+
+    route['flags'] = []
+    return route
+#---
+
+
+def generate_json(variant='ipv4', count=1000, seed=SEED):
+    """
+    Generates the 'ip -json route' output of the same routes as func:generate.
+
+    :returns: str - a JSON array of routes
+    """
+    lines = generate(variant, count, seed).replace('\n\tnexthop', ' nexthop').splitlines()
+    return json.dumps([_json_route(line) for line in lines])
+#---
+
+
+if __name__ == '__main__':
+    arguments = [argument for argument in sys.argv[1:] if argument != '--json']
+    output = generate_json if '--json' in sys.argv else generate
+    print(output(arguments[0] if arguments else 'ipv4', arguments[1] if len(arguments) > 1 else 1000))
@@ -0,0 +1,468 @@
+# coding=utf-8
+#
+# NAME:         suite.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   The benchmark suite: tokenizing, parsing, loading JSON, attribute reads, dictionary access, prefix validation,
+# string round trips, lookups, aggregation, coverage analysis, table diffs and memory footprint, over the synthetic
+# tables of generators.py.
+#
+#   Benchmarks are written the way asv (airspeed velocity) expects them - classes with 'params', a setup() method,
+# and time_* / track_* methods - so asv can run them directly.  Running this file uses a small runner of its own
+# instead: each time_* method is run 'repeat' times after setup and the fastest run kept; track_* methods report
+# the value they return.  Results can be saved and compared with an earlier run to spot regressions.
+#
+#   Usage: python benchmarks/suite.py [--sizes 1k,100k] [--variants ipv4,ipv6] [--bench pattern] [--repeat 3]
+#                                     [--save results.json] [--compare baseline.json]
+#
+
+from __future__ import print_function
+
+import argparse
+import gc
+import io
+import json
+import re
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:       # Python < 3.4: memory benchmarks are skipped
+    tracemalloc = None
+
+from iproute2 import routingtable
+from iproute2.route import routediff
+from iproute2.route import routegrammar
+from iproute2.route import routerecord
+from iproute2.route import routewriter
+from iproute2.utils import cmd
+
+import generators
+
+SIZES = ('1k', '100k', '1m')
+PARSERS = ('grammar', 'record')
+PARSER_FUNCTIONS = {'grammar': None, 'record': routerecord.parse_route}
+
+_texts = {}       # (variant, size, json) -> generated text, shared by every benchmark of a run
+
+
+# Exceptions
+class SkipBenchmark(Exception):
+    """Raised by setup() when a benchmark doesn't apply to its parameters (asv's NotImplementedError)."""
+    pass
+
+
+def table_text(variant, size, json_output=False):
+    key = (variant, size, json_output)
+    if key not in _texts:
+        _texts[key] = (generators.generate_json if json_output else generators.generate)(variant, size)
+    return _texts[key]
+#---
+
+
+def load_table(variant, size, parser):
+    table = routingtable.RoutingTable(parser=PARSER_FUNCTIONS[parser])
+    table.load(table_text(variant, size))
+    return table
+#---
+
+
+class TokenizeTable(object):
+    params = (SIZES, generators.VARIANTS)
+    param_names = ('size', 'variant')
+
+    def setup(self, size, variant):
+        self.text = table_text(variant, size)
+    #---
+
+
+    def time_tokenize_table(self, size, variant):
+        routingtable.RoutingTable.tokenize_table(self.text)
+    #---
+#---
+
+
+class Parse(object):
+    params = (SIZES, generators.VARIANTS, PARSERS)
+    param_names = ('size', 'variant', 'parser')
+
+    def setup(self, size, variant, parser):
+        self.table = routingtable.RoutingTable(parser=PARSER_FUNCTIONS[parser])
+        self.table.tokenized_table = routingtable.RoutingTable.tokenize_table(table_text(variant, size))
+    #---
+
+
+    def time_parse(self, size, variant, parser):
+        self.table.parse()
+    #---
+#---
+
+
+class LoadJson(object):
+    params = (SIZES, ('ipv4', 'ipv6', 'options', 'multipath'), ('json', 'fast'))
+    param_names = ('size', 'variant', 'decoder')
+
+    def setup(self, size, variant, decoder):
+        if decoder == 'fast' and cmd.json_loads is json.loads:
+            raise SkipBenchmark('no faster JSON decoder is installed')
+        self.text = table_text(variant, size, json_output=True)
+        self.loads = json.loads if decoder == 'json' else cmd.json_loads
+    #---
+
+
+    def time_load_json(self, size, variant, decoder):
+        routingtable.RoutingTable(parser=routerecord.parse_route).load_json(self.loads(self.text))
+    #---
+#---
+
+
+class Attributes(object):
+    params = (SIZES, ('ipv4', 'options'), PARSERS)
+    param_names = ('size', 'variant', 'parser')
+
+    def setup(self, size, variant, parser):
+        self.routes = list(load_table(variant, size, parser).table.values())
+        self.time_read_fields(size, variant, parser)    # A grammar route's first read goes through its children
+    #---
+
+
+    def time_read_fields(self, size, variant, parser):
+        for route in self.routes:
+            route.via
+            route.dev
+            route.metric
+            route.mtu
+    #---
+#---
+
+
+class GetItem(object):
+    params = (SIZES, ('ipv4', 'ipv6', 'multitable'))
+    param_names = ('size', 'variant')
+
+    def setup(self, size, variant):
+        self.table = load_table(variant, size, 'record')
+        self.keys = list(self.table.table)
+        self.short_keys = list(self.table.table_no_cidr)
+    #---
+
+
+    def time_getitem_prefix(self, size, variant):
+        table = self.table
+        for key in self.keys:
+            table[key]
+    #---
+
+
+    def time_getitem_address(self, size, variant):
+        table = self.table
+        for key in self.short_keys:
+            table[key]
+    #---
+#---
+
+
+class ValidatePrefix(object):
+    params = (SIZES, ('ipv4', 'ipv6'))
+    param_names = ('size', 'variant')
+
+    def setup(self, size, variant):
+        self.prefixes = [line.split()[0] for line in table_text(variant, size).splitlines()
+                         if not line.startswith('default')]
+        self.node = routegrammar.NODE_SPEC.__new__(routegrammar.NODE_SPEC)
+    #---
+
+
+    def time_validate_prefix(self, size, variant):
+        validate = self.node.validatePrefix
+        for route_prefix in self.prefixes:
+            validate(route_prefix)
+    #---
+#---
+
+
+class RoundTrip(object):
+    params = (SIZES, generators.VARIANTS, PARSERS)
+    param_names = ('size', 'variant', 'parser')
+
+    def setup(self, size, variant, parser):
+        self.table = load_table(variant, size, parser)
+        self.routes = list(self.table.table.values())
+    #---
+
+
+    def time_str_table(self, size, variant, parser):
+        str(self.table)
+    #---
+
+
+    def time_str_routes(self, size, variant, parser):
+        for route in self.routes:
+            str(route)
+    #---
+
+
+    def time_write_routes(self, size, variant, parser):
+        routewriter.RouteWriter(io.StringIO()).write_routes(self.routes)
+    #---
+#---
+
+
+class Lookup(object):
+    params = (SIZES, ('ipv4', 'ipv6'))
+    param_names = ('size', 'variant')
+
+    def setup(self, size, variant):
+        self.table = load_table(variant, size, 'record')
+        # Addresses inside the table's own prefixes, so every lookup walks a populated part of the tree
+        self.addresses = [key.split('/')[0] for key in self.table.table_no_cidr]
+        self.table.lookup_many(self.addresses[:1])      # Build the interval tables outside the timing
+        self.cached = routingtable.RoutingTable(parser=routerecord.parse_route, cache_size=len(self.addresses))
+        self.cached.build(self.table.routes())
+        for address in self.addresses:
+            self.cached.lookup(address)
+    #---
+
+
+    def time_lookup(self, size, variant):
+        lookup = self.table.lookup
+        for address in self.addresses:
+            lookup(address)
+    #---
+
+
+    def time_lookup_many(self, size, variant):
+        self.table.lookup_many(self.addresses)
+    #---
+
+
+    def time_lookup_cached(self, size, variant):
+        lookup = self.cached.lookup
+        for address in self.addresses:
+            lookup(address)
+    #---
+#---
+
+
+class Aggregate(object):
+    params = (SIZES, ('ipv4', 'options', 'multitable'))
+    param_names = ('size', 'variant')
+
+    def setup(self, size, variant):
+        self.table = load_table(variant, size, 'record')
+    #---
+
+
+    def time_aggregate(self, size, variant):
+        self.table.aggregate()
+    #---
+#---
+
+
+class Analyze(object):
+    params = (SIZES, ('ipv4', 'multitable'))
+    param_names = ('size', 'variant')
+
+    def setup(self, size, variant):
+        self.table = load_table(variant, size, 'record')
+    #---
+
+
+    def time_analyze(self, size, variant):
+        self.table.analyze()
+    #---
+#---
+
+
+class Diff(object):
+    params = (SIZES, ('ipv4', 'multipath', 'multitable'))
+    param_names = ('size', 'variant')
+
+    def setup(self, size, variant):
+        self.old = load_table(variant, size, 'record')
+        # The same table with every hundredth route dropped and every hundredth (offset by 50) moved to eth9
+        lines = table_text(variant, size).splitlines()
+        changed = [line.replace(' dev eth', ' dev eth9') if position % 100 == 50 else line
+                   for position, line in enumerate(lines) if position % 100 or line.startswith('default')]
+        self.new = routingtable.RoutingTable(parser=PARSER_FUNCTIONS['record'])
+        self.new.load('\n'.join(changed))
+        self.old_routes = list(self.old.routes())
+        self.new_routes = list(self.new.routes())
+    #---
+
+
+    def time_diff(self, size, variant):
+        self.old.diff(self.new)
+    #---
+
+
+    def time_diff_keyed(self, size, variant):
+        # The RouteDiff constructor, which matches routes by key alone rather than walking both radix trees
+        routediff.RouteDiff(self.old_routes, self.new_routes, self.old.route_key)
+    #---
+#---
+
+
+class Memory(object):
+    params = (SIZES, generators.VARIANTS, PARSERS)
+    param_names = ('size', 'variant', 'parser')
+    unit = 'bytes/route'
+
+    def setup(self, size, variant, parser):
+        if tracemalloc is None:
+            raise SkipBenchmark('tracemalloc is not available')
+        table_text(variant, size)
+    #---
+
+
+    def track_table_bytes_per_route(self, size, variant, parser):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            table = load_table(variant, size, parser)
+            table.tokenized_table = None       # Only count what the parsed table holds
+            gc.collect()
+            allocated = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        return float(allocated) / len(table.table)
+    #---
+#---
+
+
+BENCHMARKS = (TokenizeTable, Parse, LoadJson, Attributes, GetItem, ValidatePrefix, RoundTrip, Lookup, Aggregate, Analyze, Diff, Memory)
+
+
+def _combinations(params):
+    combinations = [()]
+    for values in params:
+        combinations = [combination + (value,) for combination in combinations for value in values]
+    return combinations
+#---
+
+
+def run(sizes=('1k', '100k'), variants=generators.VARIANTS, pattern=None, repeat=3, report=print):
+    """
+    Runs the selected benchmarks.
+
+    :param sizes: Table sizes to run (keys of generators.SIZES)
+    :param variants: Table variants to run
+    :param pattern: Regular expression benchmark names ('Parse.time_parse[100k-ipv4-record]') must contain
+    :param repeat: Runs of each time_* benchmark; the fastest is kept
+    :param report: Called with each line of output
+    :returns: dict of benchmark name -> seconds (time_*) or tracked value (track_*), None where the benchmark failed
+    """
+    results = {}
+    for benchmark_class in BENCHMARKS:
+        methods = sorted(name for name in dir(benchmark_class) if name.startswith(('time_', 'track_')))
+        names = benchmark_class.param_names
+        for combination in _combinations(benchmark_class.params):
+            arguments = dict(zip(names, combination))
+            if arguments['size'] not in sizes or arguments.get('variant', variants[0]) not in variants:
+                continue
+            for method in methods:
+                name = '{}.{}[{}]'.format(benchmark_class.__name__, method, '-'.join(combination))
+                if pattern and not re.search(pattern, name):
+                    continue
+                results[name] = _runOne(benchmark_class, method, combination, repeat, name, report)
+    return results
+#---
+
+
+def _runOne(benchmark_class, method, combination, repeat, name, report):
+    benchmark = benchmark_class()
+    try:
+        benchmark.setup(*combination)
+    except SkipBenchmark as err:
+        report('{:<64} skipped: {}'.format(name, err))
+        return None
+    except Exception as err:
+        report('{:<64} setup failed: {}: {}'.format(name, type(err).__name__, err))
+        return None
+
+    try:
+        if method.startswith('track_'):
+            value = getattr(benchmark, method)(*combination)
+            report('{:<64} {:>12.1f} {}'.format(name, value, getattr(benchmark, 'unit', '')))
+            return value
+
+        best = None
+        for _ in range(repeat):
+            gc.collect()
+            start = time.time()
+            getattr(benchmark, method)(*combination)
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+        report('{:<64} {:>12.6f} s'.format(name, best))
+        return best
+    except Exception as err:
+        report('{:<64} failed: {}: {}'.format(name, type(err).__name__, err))
+        return None
+#---
+
+
+def compare(results, baseline, threshold=1.1, report=print):
+    """
+    Reports the benchmarks which got slower (or, for track_* benchmarks, larger) than a baseline by more than the
+    threshold ratio.
+
+    :returns: list of benchmark names which regressed
+    """
+    regressed = []
+    for name in sorted(results):
+        old, new = baseline.get(name), results[name]
+        if old and new:
+            ratio = new / old
+            if ratio > threshold:
+                regressed.append(name)
+            report('{:<64} {:>7.2f}x{}'.format(name, ratio, '  REGRESSION' if ratio > threshold else ''))
+    return regressed
+#---
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Runs the python-iproute2 benchmark suite.')
+    parser.add_argument('--sizes', default='1k,100k', help='Comma separated table sizes (1k, 100k, 1m)')
+    parser.add_argument('--variants', default=','.join(generators.VARIANTS), help='Comma separated table variants')
+    parser.add_argument('--bench', default=None, help='Only run benchmarks whose names match this expression')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each timing benchmark')
+    parser.add_argument('--save', default=None, help='Write the results to this JSON file')
+    parser.add_argument('--compare', default=None, help='Compare the results with this earlier JSON file')
+    parser.add_argument('--threshold', type=float, default=1.1, help='Ratio counted as a regression')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes.split(','), args.variants.split(','), args.bench, args.repeat)
+
+    if args.save:
+        with open(args.save, 'w') as results_file:
+            json.dump({'python': sys.version.split()[0], 'results': results}, results_file, indent=1,
+                      sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        print()
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+#---
+
+
+if __name__ == '__main__':
+    sys.exit(main())
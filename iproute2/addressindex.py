@@ -0,0 +1,330 @@
+# coding=utf-8
+#
+# NAME:         addressindex.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   A host-wide index of interface addresses, answering "which interface owns this address" and "which interface's
+# subnet contains this address" for every interface at once, built from a single dump of every link (cmd.interfaces).
+#
+#   Addresses are keyed by their integer form, so finding an owner is a dictionary lookup.  The subnets of every
+# address are kept in a radix tree per family, flattened into sorted intervals (route.intervals) for containment
+# queries.  Refreshing re-reads the dump but only re-indexes the interfaces whose addresses changed, and addresses
+# held by more than one interface are tracked as they're indexed.
+#
+
+import threading
+from collections import namedtuple
+
+from iproute2 import interface
+from iproute2.route import intervals
+from iproute2.route import radix
+from iproute2.utils import _clock
+from iproute2.utils import cmd
+from iproute2.utils import prefix
+
+FAMILIES = {'inet': prefix.IP_V4, 'inet6': prefix.IP_V6}
+LINK_SCOPE = 'link'
+
+
+Address = namedtuple('Address', ('local', 'prefixlen', 'family', 'scope', 'ifname', 'ifindex'))
+
+
+def link_addresses(link):
+    """
+    The addresses of a link, as returned by cmd.interfaces.
+
+    :returns: tuple of class:Address
+    """
+    return tuple(Address(address['local'], int(address['prefixlen']), address['family'], address.get('scope'),
+                         link['ifname'], link['ifindex'])
+                 for address in link['addr_info'] if address.get('family') in FAMILIES and address.get('local'))
+#---
+
+
+class AddressIndex(object):
+    """
+    Every address of every interface, indexed by address, subnet and MAC.  Queries answer from the index until it's
+    refreshed: explicitly (meth:refresh), when a monitor event reports a change (see meth:watch), or once 'ttl'
+    seconds have passed, if a TTL is set.
+
+    """
+    def __init__(self, ttl=None, fetch=None):
+        """
+        Constructor.  The first dump is read by the first query.
+
+        :param ttl: Seconds the index is trusted for; None trusts it until it's refreshed or invalidated
+        :param fetch: Callable returning every link, laid out like cmd.interfaces (the default)
+        """
+        self.ttl = ttl
+        self.fetch = fetch or cmd.interfaces
+        self.links = {}         # name -> (MAC, tuple of class:Address) as last indexed
+        self.owners = {}        # (family, integer address) -> tuple of class:Address
+        self.macs = {}          # MAC -> tuple of interface names
+        self.subnets = {prefix.IP_V4: radix.RadixTree(32), prefix.IP_V6: radix.RadixTree(128)}
+        self.duplicated = set()     # Keys of owners held by more than one interface
+        self.loads = 0          # Number of dumps read
+        self.expires = None     # Clock time the index stops being trusted; None before the first dump
+        self._intervals = None  # family -> intervals.IntervalTable, built when first needed
+        self._lock = threading.Lock()
+        self._watcher = None
+    #---
+
+
+    def __len__(self):
+        self._current()
+        return len(self.owners)
+    #---
+
+
+    def __contains__(self, address):
+        return bool(self.owners_of(address))
+    #---
+
+
+    def _current(self):
+        """
+        Refreshes the index if it isn't trusted any more.
+
+        """
+        expires = self.expires
+        if expires is None or expires <= _clock():
+            with self._lock:
+                if self.expires == expires:     # Another thread may have refreshed it while this one waited
+                    self._refresh()
+    #---
+
+
+    def refresh(self):
+        """
+        Dumps every interface and re-indexes those whose addresses (or MAC) changed.
+
+        :returns: set of the names of the interfaces which were re-indexed
+        """
+        with self._lock:
+            return self._refresh()
+    #---
+
+
+    def _refresh(self):
+        expires = self.expires
+        self.expires = None         # Changes reported during the dump leave it untrusted (see meth:invalidate)
+        try:
+            links = self.fetch()
+        except cmd.IPCommandError as err:
+            if self.expires is None:
+                self.expires = expires
+            raise interface.InterfaceError('Unexpected error ({}): {}'.format(err.code, err.message))
+
+        changed = set()
+        current = {}
+        for link in links:
+            entry = current[link['ifname']] = (link.get('address'), link_addresses(link))
+            if self.links.get(link['ifname']) != entry:
+                changed.add(link['ifname'])
+        changed.update(name for name in self.links if name not in current)
+
+        for name in changed:
+            self._remove(name)
+        # Re-indexed in dump order, so an address's owners (and a MAC's interfaces) don't depend on set order
+        for link in links:
+            if link['ifname'] in changed:
+                self._add(link['ifname'], current[link['ifname']])
+        if changed:
+            self._intervals = None
+
+        self.loads += 1
+        if self.expires is None:
+            self.expires = _clock() + self.ttl if self.ttl is not None else float('inf')
+        return changed
+    #---
+
+
+    def _add(self, name, entry):
+        mac, addresses = entry
+        self.links[name] = entry
+        if mac is not None:
+            self.macs[mac] = self.macs.get(mac, ()) + (name,)
+
+        for address in addresses:
+            family = FAMILIES[address.family]
+            key = family, prefix.parse_address(address.local)[1]
+            owners = self.owners[key] = self.owners.get(key, ()) + (address,)
+            if len(set(owner.ifname for owner in owners)) > 1:
+                self.duplicated.add(key)
+
+            bits = prefix.FAMILY_BITS[family]
+            network = key[1] & (((1 << bits) - 1) ^ ((1 << (bits - address.prefixlen)) - 1))
+            self.subnets[family].insert(network, address.prefixlen, address)
+    #---
+
+
+    def _remove(self, name):
+        entry = self.links.pop(name, None)
+        if entry is None:
+            return
+        mac, addresses = entry
+        if mac is not None:
+            names = tuple(owner for owner in self.macs.get(mac, ()) if owner != name)
+            if names:
+                self.macs[mac] = names
+            else:
+                self.macs.pop(mac, None)
+
+        for address in addresses:
+            family = FAMILIES[address.family]
+            key = family, prefix.parse_address(address.local)[1]
+            owners = tuple(owner for owner in self.owners.get(key, ()) if owner is not address)
+            if owners:
+                self.owners[key] = owners
+            else:
+                self.owners.pop(key, None)
+            if len(set(owner.ifname for owner in owners)) < 2:
+                self.duplicated.discard(key)
+
+            bits = prefix.FAMILY_BITS[family]
+            network = key[1] & (((1 << bits) - 1) ^ ((1 << (bits - address.prefixlen)) - 1))
+            self.subnets[family].remove(network, address.prefixlen, address)
+    #---
+
+
+    def _key(self, address):
+        try:
+            return prefix.parse_address(address)
+        except prefix.PrefixError as err:
+            raise interface.AddressError(str(err))
+    #---
+
+
+    def owners_of(self, address):
+        """
+        Finds the interfaces holding an address.
+
+        :param address: IPv4 or IPv6 address
+        :returns: tuple of class:Address (empty if no interface holds it; more than one if it's duplicated)
+        :raises: interface.AddressError if the address is invalid
+        """
+        key = self._key(address)
+        self._current()
+        return self.owners.get(key, ())
+    #---
+
+
+    def owner(self, address):
+        """
+        Finds the interface holding an address.
+
+        :param address: IPv4 or IPv6 address
+        :returns: str - interface name, or None if no interface holds it
+        """
+        owners = self.owners_of(address)
+        return owners[0].ifname if owners else None
+    #---
+
+
+    def mac_owners(self, mac):
+        """
+        Finds the interfaces with a MAC address.
+
+        :returns: tuple of interface names
+        """
+        self._current()
+        return self.macs.get(mac.lower(), ())
+    #---
+
+
+    def containing(self, address):
+        """
+        Finds the most specific interface subnet containing an address.
+
+        :param address: IPv4 or IPv6 address
+        :returns: tuple of class:Address whose subnet it is (empty if no subnet contains the address)
+        """
+        return self.containing_many((address,))[0]
+    #---
+
+
+    def containing_many(self, addresses):
+        """
+        meth:containing for a batch of addresses.
+
+        :returns: list of tuples of class:Address, in the same order as the addresses
+        """
+        keys = [self._key(address) for address in addresses]
+        self._current()
+
+        tables = self._intervals
+        if tables is None:
+            tables = self._intervals = dict((family, intervals.IntervalTable(tree, tuple))
+                                            for family, tree in self.subnets.items())
+        return [tables[family].find(value) or () for family, value in keys]
+    #---
+
+
+    def duplicates(self, link_local=False):
+        """
+        Finds the addresses held by more than one interface.
+
+        :param link_local: Include link scope addresses, which are only meaningful on their own link
+        :returns: dict of address -> tuple of class:Address
+        """
+        self._current()
+        duplicates = {}
+        for key in self.duplicated:
+            owners = self.owners[key]
+            if link_local or owners[0].scope != LINK_SCOPE:
+                duplicates[owners[0].local] = owners
+        return duplicates
+    #---
+
+
+    def invalidate(self, name=None, index=None):
+        """
+        Stops trusting the index, so the next query refreshes it.  Takes the same arguments as
+        InterfaceRegistry.invalidate, though the whole index is refreshed either way.
+
+        """
+        self.expires = 0
+    #---
+
+
+    def follow(self, events=None):
+        """
+        Invalidates the index as interfaces change.
+
+        :param events: Iterable of (interface index, interface name or None) tuples.  Defaults to monitoring the
+                       system with cmd.monitor_interfaces (which never ends on its own).
+        """
+        for index, name in events if events is not None else cmd.monitor_interfaces():
+            self.invalidate(name, index)
+    #---
+
+
+    def watch(self, events=None):
+        """
+        Starts following changes (see meth:follow) in a background thread.  Only one watch runs per index.
+
+        :returns: threading.Thread
+        """
+        with self._lock:
+            if self._watcher is None or not self._watcher.is_alive():
+                self._watcher = threading.Thread(target=self.follow, args=(events,), name='AddressIndex')
+                self._watcher.daemon = True
+                self._watcher.start()
+            return self._watcher
+    #---
+#---
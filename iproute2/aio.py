@@ -0,0 +1,200 @@
+# coding=utf-8
+#
+# NAME:         aio.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Coroutines behind the asyncio methods of RoutingTable (aload) and Interface (aopen, aGetAddresses, ...).  Python
+# 3.7+ only, which is why the classes only import this module when one of those methods is called.
+#
+#   They behave like the synchronous methods: interfaces read from an InterfaceRegistry answer from it, changes made
+# inside a 'with cmd.batch()' block are queued on the batch, and 'ip -json' output is read wherever the synchronous
+# code reads it.
+#
+
+import asyncio
+
+from iproute2.route import routerecord
+from iproute2.utils import aiocmd
+from iproute2.utils import cmd
+from iproute2 import interface as interface_module
+
+
+def _in_executor(func, *args):
+    """
+    Runs a blocking call (an InterfaceRegistry dump, parsing a table) in the loop's default executor.
+
+    """
+    return asyncio.get_event_loop().run_in_executor(None, func, *args)
+#---
+
+
+async def load_table(table, table_txt=None, family=4, netns=None, timeout=None, use_json=None):
+    """
+    See RoutingTable.aload.  Decides between text and 'ip -json route' the way RoutingTable.load does.
+
+    """
+    timeout = timeout or aiocmd.DEFAULT_TIMEOUT
+    routes = None
+    if table_txt:
+        if table_txt.lstrip().startswith('['):
+            routes = cmd.json_loads(table_txt)
+        else:
+            table.tokenized_table = table.tokenize_table(table_txt)
+    else:
+        table.family = family       # 'default' in the fetched table is that family's
+        if use_json is None:
+            use_json = (table.parser is routerecord.parse_route and cmd.backend == cmd.BACKEND_IP and
+                        await aiocmd.ajson_supported(timeout=timeout))
+        if use_json:
+            routes = await aiocmd.aroutes_json(family=family, netns=netns, timeout=timeout)
+        else:
+            table.tokenized_table = await aiocmd.aroutes(family=family, netns=netns, timeout=timeout)
+
+    # Parsing is CPU bound; running it in the executor lets the loop keep serving other tasks in between
+    if routes is not None:
+        await _in_executor(table.load_json, routes)
+    else:
+        await _in_executor(table.parse)
+    return table
+#---
+
+
+async def open_interface(interface_class, name, registry=None):
+    """
+    See Interface.aopen.
+
+    """
+    interface = interface_class.__new__(interface_class)
+    interface.name = name
+    interface.addresses = {'v4': [], 'v6': [], 'mac': None}
+    if registry is not None:
+        await _in_executor(registry.link, name)     # Raises InterfaceError if there's no such interface
+        interface.registry = registry
+        return interface
+
+    try:
+        await aiocmd.ainterfaces(name)
+    except cmd.IPCommandError as err:
+        if err.code == 255:
+            raise interface_module.InterfaceError('Invalid interface name: {}'.format(name))
+        raise interface_module.InterfaceError('Unexpected error ({}): {}'.format(err.code, err.message))
+    return interface
+#---
+
+
+async def get_addresses(interface):
+    """
+    See Interface.getAddresses.
+
+    """
+    if interface.registry is not None:
+        return interface._storeAddresses(await _in_executor(interface.registry.link, interface.name))
+
+    try:
+        link = (await aiocmd.ainterfaces(interface.name))[0]
+    except cmd.IPCommandError as err:
+        raise interface_module.InterfaceError('Unexpected error ({}): {}'.format(err.code, err.message))
+
+    return interface._storeAddresses(link)
+#---
+
+
+async def _refresh_addresses(interface):
+    interface._invalidate()
+    return await get_addresses(interface)
+#---
+
+
+async def add_address(interface, address):
+    """
+    See Interface.addAddress.  Inside a 'with cmd.batch()' block the command is queued on the batch, and None
+    returned; otherwise the refreshed addresses are returned.
+
+    """
+    command = 'address add "{}" dev "{}"'.format(address, interface.name)
+    if interface._queue(command, interface._refreshAddresses):
+        return None
+
+    try:
+        await aiocmd.aip(command)
+    except cmd.IPCommandError as err:
+        if err.code == 254:
+            raise interface_module.AddressError('{} already exists on {}'.format(address, interface.name))
+        raise interface_module.InterfaceError('Unexpected error ({}): {}'.format(err.code, err.message))
+
+    return await _refresh_addresses(interface)
+#---
+
+
+async def del_address(interface, address):
+    """
+    See Interface.delAddress, and func:add_address for batches.
+
+    """
+    command = 'address del "{}" dev "{}"'.format(address, interface.name)
+    if interface._queue(command, interface._refreshAddresses):
+        return None
+
+    try:
+        await aiocmd.aip(command)
+    except cmd.IPCommandError as err:
+        if err.code == 254:
+            raise interface_module.AddressError('{} does not exist on {}'.format(address, interface.name))
+        raise interface_module.InterfaceError('Unexpected error ({}): {}'.format(err.code, err.message))
+
+    return await _refresh_addresses(interface)
+#---
+
+
+async def set_state(interface, state):
+    """
+    See Interface.up and Interface.down.  Queued on the current batch inside a 'with cmd.batch()' block.
+
+    :param state: 'up' or 'down'
+    """
+    command = 'link set "{}" {}'.format(interface.name, state)
+    if interface._queue(command, interface._invalidate):
+        return
+
+    try:
+        await aiocmd.aip(command)
+    except cmd.IPCommandError as err:
+        if err.code == 2:
+            raise interface_module.RequiresEscalationError('Altering interface state requires escalated privileges.')
+        raise interface_module.InterfaceError('Unexpected error: {}'.format(err.message))
+    interface._invalidate()
+#---
+
+
+async def status(interface, simple=False):
+    """
+    See Interface.status.  The simple status of an interface read from a registry comes from the registry's cache.
+
+    """
+    if simple and interface.registry is not None:
+        return (await _in_executor(interface.registry.link, interface.name))['operstate']
+
+    try:
+        iproute = await aiocmd.aip('link show "{}"'.format(interface.name))
+    except cmd.IPCommandError as err:
+        raise interface_module.InterfaceError('Unexpected error ({}): {}'.format(err.code, err.message))
+
+    if simple:
+        return iproute.split('state')[1].split()[0]
+    return iproute
+#---
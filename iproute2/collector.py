@@ -0,0 +1,128 @@
+# coding=utf-8
+#
+# NAME:         collector.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Collects the routing tables of many network namespaces (or hosts) concurrently.  Each target is fetched and
+# parsed by a worker thread from a bounded pool: the routes are parsed as they're read, so one namespace's parsing
+# overlaps with the others' 'ip' processes (or netlink dumps) and the time spent waiting on them.
+#
+
+import os
+from multiprocessing.pool import ThreadPool
+
+from iproute2.routingtable import RoutingTable
+from iproute2.utils import _clock
+from iproute2.utils import cmd
+from iproute2.utils import netlink
+
+
+def list_namespaces():
+    """
+    Lists the named network namespaces (those 'ip netns list' shows).
+
+    :returns: list of str
+    """
+    try:
+        return sorted(os.listdir(netlink.NETNS_RUN_DIR))
+    except OSError:
+        return []
+#---
+
+
+class RouteCollector(object):
+    """
+    Fetches and parses the routing table of many targets at once.  After meth:collect, 'timings' holds the seconds
+    each target took and 'errors' the exception raised by each target which failed.
+
+    """
+    def __init__(self, workers=8, parser=None, table=None, family=4, fetch=None):
+        """
+        Constructor
+
+        :param workers: Most targets fetched at the same time
+        :param parser: Route parser handed to each RoutingTable (see RoutingTable)
+        :param table: Table to fetch from each target ('main' when None, 'all' for every table)
+        :param family: 4 or 6
+        :param fetch: Callable taking a target and returning an iterable of 'ip route' lines or token lists.  Defaults
+                      to utils.cmd.stream_routes inside the named network namespace; pass something else to collect
+                      from remote hosts.
+
+        """
+        self.workers = workers
+        self.parser = parser
+        self.table = table
+        self.family = family
+        self.fetch = fetch or self._fetchNamespace
+        self.timings = {}
+        self.errors = {}
+    #---
+
+
+    def _fetchNamespace(self, namespace):
+        return cmd.stream_routes(self.table, self.family, netns=namespace)
+    #---
+
+
+    def _collectOne(self, target):
+        """
+        Fetches and parses a single target.  Runs in a worker thread.
+
+        :returns: tuple - (target, RoutingTable or None, exception or None, seconds taken)
+        """
+        start = _clock()
+        try:
+            table = RoutingTable(description=target, parser=self.parser, family=self.family)
+            table.load(stream=self.fetch(target))
+        except Exception as err:
+            return target, None, err, _clock() - start
+        return target, table, None, _clock() - start
+    #---
+
+
+    def collect(self, targets=None):
+        """
+        Collects every target's routing table.  Targets which fail don't stop the others; their errors are kept in
+        'errors'.
+
+        :param targets: Iterable of network namespace names (None for the current namespace) or whatever the fetch
+                        callable takes.  Defaults to every named network namespace.
+        :returns: dict of target -> class:RoutingTable, for the targets which succeeded
+        """
+        targets = list_namespaces() if targets is None else list(targets)
+        tables = {}
+        self.timings = {}
+        self.errors = {}
+        if not targets:
+            return tables
+
+        pool = ThreadPool(max(1, min(self.workers, len(targets))))
+        try:
+            for target, table, error, elapsed in pool.imap_unordered(self._collectOne, targets):
+                self.timings[target] = elapsed
+                if error is None:
+                    tables[target] = table
+                else:
+                    self.errors[target] = error
+        finally:
+            pool.close()
+            pool.join()
+
+        return tables
+    #---
+#---
@@ -26,7 +26,9 @@
 from __future__ import print_function
 
 import logging
-from utils import cmd
+import threading
+from iproute2.utils import _clock
+from iproute2.utils import cmd
 
 IP_V4 = 4
 IP_V6 = 6
@@ -36,6 +38,9 @@ INT_MBPS = 0x3
 INT_KBPS = 0x2
 INT_BPS = 0x1
 
+# Bits per second in one of each unit
+UNIT_SCALES = {INT_GBPS: 10 ** 9, INT_MBPS: 10 ** 6, INT_KBPS: 10 ** 3, INT_BPS: 1}
+
 
 # Exceptions
 class InterfaceError(Exception):
@@ -57,17 +62,29 @@ class Interface(object):
     name = None             # Interface name as per the OS
     display_name = None
     units = INT_MBPS
-    bandwidth_in = 0
-    bandwidth_out = 0
-    addresses = {'v4':[], 'v6':[], 'mac': None}
+    bandwidth_in = 0        # Receive rate in 'units' (see stats.StatsSampler.update)
+    bandwidth_out = 0       # Transmit rate in 'units'
+    addresses = None        # Address cache, see meth:getAddresses
+    registry = None         # InterfaceRegistry the interface's state is read from, if any
 
 
-    def __init__(self, name):
+    def __init__(self, name, registry=None):
         """
         Constructor
+
+        :param name: Interface name
+        :param registry: class:InterfaceRegistry to read the interface's links and addresses from.  The interface is
+                         then checked against the registry's cache rather than by running 'ip'.
         """
+        self.addresses = {'v4': [], 'v6': [], 'mac': None}
+        if registry is not None:
+            registry.link(name)     # Raises InterfaceError if there's no such interface
+            self.name = name
+            self.registry = registry
+            return
+
         try:
-            cmd.ip('link show "{}"'.format(name))
+            cmd.interfaces(name)
         except cmd.IPCommandError as err:
             if err.code == 255:
                 raise InterfaceError('Invalid interface name: {}'.format(name))
@@ -85,35 +102,82 @@ class Interface(object):
 
         :return: Dictionary of interface's v4 and v6 addresses.
         """
-        v4 = []
-        v6 = []
-        ip_cmd_output = cmd.ip('address show dev "{}"'.format(self.name))
-        for cmd_line in ip_cmd_output:
-            split_line = cmd_line.decode('utf-8').strip().split()
-
-            # MAC address
-            if split_line[0] == 'link/ether':
-                self.addresses['mac'] = split_line[1]
-            # IPv4 address
-            elif split_line[0] == 'inet':
-                v4.append(tuple(split_line[1].split('/')))
-            # IPv6 address
-            elif split_line[0] == 'inet6':
-                v6.append(tuple(split_line[1].split('/')))
-
-        self.addresses['v4'] = v4
-        self.addresses['v6'] = v6
+        if self.registry is not None:
+            return self._storeAddresses(self.registry.link(self.name))
+
+        try:
+            link = cmd.interfaces(self.name)[0]
+        except cmd.IPCommandError as err:
+            raise InterfaceError("Unexpected error ({}): {}".format(err.code, err.message))
+
+        return self._storeAddresses(link)
+    #---
+
+
+    def _storeAddresses(self, link):
+        """
+        Caches the addresses of a link, as returned by cmd.interfaces.
+
+        """
+        self.addresses = {'mac': link['address'],
+                          'v4': [(address['local'], str(address['prefixlen']))
+                                 for address in link['addr_info'] if address['family'] == 'inet'],
+                          'v6': [(address['local'], str(address['prefixlen']))
+                                 for address in link['addr_info'] if address['family'] == 'inet6']}
 
         return self.addresses
     #---
 
 
+    def _refreshAddresses(self):
+        """
+        Refreshes the address cache after a change, making sure the registry (if any) doesn't answer from its cache.
+
+        """
+        self._invalidate()
+        return self.getAddresses()
+    #---
+
+
+    def _invalidate(self):
+        """
+        Tells the registry (if any) that the interface's state just changed.
+
+        """
+        if self.registry is not None:
+            self.registry.invalidate(self.name)
+    #---
+
+
+    def _queue(self, command, refresh=None):
+        """
+        Queues a command on the thread's current batch (see cmd.batch), if there is one.
+
+        :param refresh: Callable to run once the batch has been committed
+        :returns: bool - True if the command was queued
+        """
+        batch = cmd.current_batch()
+        if batch is None:
+            return False
+        batch.add(command)
+        if refresh is not None:
+            batch.on_commit(refresh)
+        return True
+    #---
+
+
     def addAddress(self, address):
         """
         Adds an IP address to an interface.
 
+        Inside a 'with cmd.batch()' block the command is queued on the batch instead, and the address cache is
+        refreshed once the batch has run.
+
         :param address: String containing IP address and subnet in CIDR notation.
         """
+        if self._queue('address add "{}" dev "{}"'.format(address, self.name), self._refreshAddresses):
+            return
+
         try:
             cmd.ip('address add "{}" dev "{}"'.format(address, self.name))
         except cmd.IPCommandError as err:
@@ -122,7 +186,7 @@ class Interface(object):
             else:
                 raise InterfaceError("Unexpected error ({}): {}".format(err.code, err.message))
         else:
-            self.getAddresses()     # Update the IP address cache
+            self._refreshAddresses()     # Update the IP address cache
     #---
 
 
@@ -130,56 +194,74 @@ class Interface(object):
         """
         Removes an IP address from an interface.
 
+        Queued on the current batch, like meth:addAddress, inside a 'with cmd.batch()' block.
+
         :param address: String containing IP address and subnet in CIDR notation.
         """
+        if self._queue('address del "{}" dev "{}"'.format(address, self.name), self._refreshAddresses):
+            return
+
         try:
-            cmd.cmd.ip('address del "{}" dev "{}"'.format(address, self.name))
-        except cmd.IPCommmandError as err:
+            cmd.ip('address del "{}" dev "{}"'.format(address, self.name))
+        except cmd.IPCommandError as err:
             if err.code == 254:
                 raise AddressError('{} does not exist on {}'.format(address, self.name))
             else:
                 raise InterfaceError('Unexpected error ({}): {}'.format(err.code, err.message))
-        self.getAddresses()     # Update the IP address cache
+        self._refreshAddresses()     # Update the IP address cache
 
 
     def up(self):
         """
-        Brings the interface up.
+        Brings the interface up (queued on the current batch inside a 'with cmd.batch()' block).
         """
+        if self._queue('link set "{}" up'.format(self.name), self._invalidate):
+            return
+
         try:
-            cmd.ip_cmd('link set "{}" up'.format(self.name))
+            cmd.ip('link set "{}" up'.format(self.name))
         except cmd.IPCommandError as err:
             if err.code == 2:
                 errmsg = 'Altering interface state requires escalated privileges.'
                 raise RequiresEscalationError(errmsg)
             else:
                 raise InterfaceError('Unexpected error: {}'.format(err.message))
+        self._invalidate()
 
 
     def down(self):
         """
-        Disables the interface.
+        Disables the interface (queued on the current batch inside a 'with cmd.batch()' block).
         """
+        if self._queue('link set "{}" down'.format(self.name), self._invalidate):
+            return
+
         try:
-            cmd.ip_cmd('link set "{}" down'.format(self.name))
+            cmd.ip('link set "{}" down'.format(self.name))
         except cmd.IPCommandError as err:
             if err.code == 2:
                 errmsg = 'Altering interface state requires escalated privileges.'
                 raise RequiresEscalationError(errmsg)
             else:
                 raise InterfaceError('Unexpected error: {}'.format(err.message))
+        self._invalidate()
 
 
     def status(self, simple=False):
         """
         Fetches the status of the interface, according to iproute.
 
+        The simple status of an interface read from a registry comes from the registry's cache.
+
         :param simple: Return only the status, no additional information if ``True``.
         :return: Simple status string if param:simple is ``True``, otherwise,
                  full iproute status string.
         """
+        if simple and self.registry is not None:
+            return self.registry.link(self.name)['operstate']
+
         try:
-            iproute = cmd.ip('show "{}"'.format(self.name))
+            iproute = cmd.ip('link show "{}"'.format(self.name))
         except cmd.IPCommandError as err:
             raise InterfaceError("Unexpected error ({}): {}".format(err.code, err.message))
 
@@ -188,3 +270,203 @@ class Interface(object):
         else:
             return iproute
     #---
+
+
+    # asyncio versions of the methods above (Python 3.7+).  Each returns a coroutine; see iproute2.aio.
+
+    @classmethod
+    def aopen(cls, name, registry=None):
+        """
+        Coroutine version of the constructor: validates the interface name without blocking the event loop.
+
+        :param registry: class:InterfaceRegistry to read the interface's links and addresses from (see the
+                         constructor)
+        :returns: class:Interface
+        """
+        from iproute2 import aio
+        return aio.open_interface(cls, name, registry)
+    #---
+
+
+    def aGetAddresses(self):
+        from iproute2 import aio
+        return aio.get_addresses(self)
+    #---
+
+
+    def aAddAddress(self, address):
+        from iproute2 import aio
+        return aio.add_address(self, address)
+    #---
+
+
+    def aDelAddress(self, address):
+        from iproute2 import aio
+        return aio.del_address(self, address)
+    #---
+
+
+    def aUp(self):
+        from iproute2 import aio
+        return aio.set_state(self, 'up')
+    #---
+
+
+    def aDown(self):
+        from iproute2 import aio
+        return aio.set_state(self, 'down')
+    #---
+
+
+    def aStatus(self, simple=False):
+        from iproute2 import aio
+        return aio.status(self, simple)
+    #---
+
+
+# Interface Registry Class
+class InterfaceRegistry(object):
+    """
+    Caches the links and addresses of every interface on the host, read in a single dump (cmd.interfaces).  Each
+    interface's entry is trusted for 'ttl' seconds after the dump which read it, or until a monitor event (see
+    meth:watch) reports that it changed; asking for an entry which isn't trusted any more dumps every interface
+    again.  With a watch running, the TTL only guards against missed events and can be long.
+
+    Safe to share between threads: concurrent requests for stale entries wait for one dump rather than each running
+    their own.
+    """
+    def __init__(self, ttl=1.0, fetch=None):
+        """
+        Constructor
+
+        :param ttl: Seconds an interface's entry is trusted for
+        :param fetch: Callable returning every link, laid out like cmd.interfaces (the default)
+        """
+        self.ttl = ttl
+        self.fetch = fetch or cmd.interfaces
+        self.links = {}         # name -> link dict
+        self.names = {}         # interface index -> name
+        self.expires = {}       # name -> clock time the entry stops being trusted
+        self.loads = 0          # Number of dumps read
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._changed = None    # Names invalidated while a dump is being read (None in it means all of them)
+        self._watcher = None
+    #---
+
+
+    def __contains__(self, name):
+        try:
+            self.link(name)
+        except InterfaceError:
+            return False
+        return True
+    #---
+
+
+    def load(self):
+        """
+        Dumps every interface, replacing the whole cache.
+
+        """
+        with self._lock:
+            self._changed = set()
+        try:
+            links = self.fetch()
+        except cmd.IPCommandError as err:
+            raise InterfaceError('Unexpected error ({}): {}'.format(err.code, err.message))
+        finally:
+            with self._lock:
+                changed, self._changed = self._changed, None
+
+        expires = _clock() + self.ttl
+        with self._lock:
+            self.links = dict((link['ifname'], link) for link in links)
+            self.names = dict((link['ifindex'], link['ifname']) for link in links)
+            # Anything which changed while the dump was being read may have been read before the change
+            if None in changed:
+                self.expires = {}
+            else:
+                self.expires = dict((name, expires) for name in self.links if name not in changed)
+            self.loads += 1
+    #---
+
+
+    def link(self, name):
+        """
+        Fetches an interface's link, dumping every interface again if its entry isn't trusted any more.
+
+        :returns: dict, laid out like those of cmd.interfaces
+        :raises: InterfaceError if there's no such interface
+        """
+        link = self.links.get(name)
+        if link is None or self.expires.get(name, 0) <= _clock():
+            with self._load_lock:
+                # Another thread may have reloaded the cache while this one waited for the lock
+                if self.expires.get(name, 0) <= _clock():
+                    self.load()
+            link = self.links.get(name)
+            if link is None:
+                raise InterfaceError('Invalid interface name: {}'.format(name))
+        return link
+    #---
+
+
+    def interface(self, name):
+        """
+        Creates an class:Interface reading its state from this registry.
+
+        :raises: InterfaceError if there's no such interface
+        """
+        return Interface(name, registry=self)
+    #---
+
+
+    def invalidate(self, name=None, index=None):
+        """
+        Stops trusting the cached entry of an interface, so the next request for it reads a fresh dump.  Without a
+        name or an index every entry is invalidated.
+
+        :param name: Interface name
+        :param index: Interface index, when the name isn't known
+        """
+        with self._lock:
+            if name is None and index is not None:
+                name = self.names.get(index)
+                if name is None:
+                    return      # A new interface; there's nothing cached for it
+            if name is None:
+                self.expires.clear()
+            else:
+                self.expires.pop(name, None)
+            if self._changed is not None:
+                self._changed.add(name)
+    #---
+
+
+    def follow(self, events=None):
+        """
+        Invalidates entries as their interfaces change.
+
+        :param events: Iterable of (interface index, interface name or None) tuples.  Defaults to monitoring the
+                       system with cmd.monitor_interfaces (which never ends on its own).
+        """
+        for index, name in events if events is not None else cmd.monitor_interfaces():
+            self.invalidate(name, index)
+    #---
+
+
+    def watch(self, events=None):
+        """
+        Starts following changes (see meth:follow) in a background thread.  Only one watch runs per registry.
+
+        :returns: threading.Thread
+        """
+        with self._lock:
+            if self._watcher is None or not self._watcher.is_alive():
+                self._watcher = threading.Thread(target=self.follow, args=(events,), name='InterfaceRegistry')
+                self._watcher.daemon = True
+                self._watcher.start()
+            return self._watcher
+    #---
+#---
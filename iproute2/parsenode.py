@@ -38,6 +38,7 @@ class ParseNode(object):
 
         """
         self.children = OrderedDict()
+        self._child_values = {}   # Child attributes already resolved by meth:_childAttr
         self.raw_data = ''  # The node's raw, text data
         self.next_data = None    # Data which will be passed to the child nodes of this node
         self.raw_includes_children = raw_includes_children
@@ -122,6 +123,53 @@ class ParseNode(object):
     #---
 
 
+    @classmethod
+    def childFields(cls):
+        """
+        Maps every attribute the child classes (and their children) define to the path of child names leading to the
+        node which holds it.  Where several children define the same attribute the first one wins, as it would when
+        searching the children in order.  Built once per class.
+
+        :returns: dict of attribute name -> tuple of child class names
+        """
+        if '_child_fields' not in cls.__dict__:
+            fields = {}
+            for child_class in getattr(cls, 'child_class_list', ()):
+                path = (child_class.__name__,)
+                for attr in dir(child_class):
+                    if not attr.startswith('_') and not callable(getattr(child_class, attr)):
+                        fields.setdefault(attr, path)
+                for attr, child_path in child_class.childFields().items():
+                    fields.setdefault(attr, path + child_path)
+            cls._child_fields = fields
+        return cls._child_fields
+    #---
+
+
+    def _childAttr(self, attr):
+        """
+        Fetches an attribute of a child node through the precomputed meth:childFields paths.  Resolved values are
+        kept in a cache of their own (parsed nodes aren't expected to change) rather than on the node itself, so that
+        item access, which reads the node's own variables, doesn't depend on what has been read before.
+
+        """
+        try:
+            return self.__dict__['_child_values'][attr]
+        except KeyError:
+            pass
+
+        path = self.childFields().get(attr)
+        if path is None or 'children' not in self.__dict__:
+            raise AttributeError(attr)
+
+        node = self
+        for name in path:
+            node = node.children[name]
+        value = self.__dict__.setdefault('_child_values', {})[attr] = getattr(node, attr)
+        return value
+    #---
+
+
     # Simply adds a segment to self.raw_data with the proper spacing
     def _addRawSegment(self, segment):
         self.raw_data += "%s " %segment
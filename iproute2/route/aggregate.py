@@ -0,0 +1,174 @@
+# coding=utf-8
+#
+# NAME:         aggregate.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Route aggregation: shrinks a set of routes into fewer prefixes which forward every address exactly as before.
+#
+#   Routes are compared by everything but their prefix and table ('forwarding signature'); a prefix's signature is
+# the set of signatures of every route under it (one per tos and metric), so prefixes only merge when all of their
+# routes match.  Two passes over the integer prefixes of each table and family:
+#
+#       1. Bottom up, one prefix length at a time, sibling prefixes with the same signature merge into their parent
+#          (replacing any route the parent had, which the two siblings completely hid).  Merged parents take part
+#          in the next length up, so runs of siblings collapse as far as they go.
+#       2. One sweep in address order, with a stack of the prefixes enclosing the current position, drops every
+#          prefix whose nearest enclosing prefix has the same signature.
+#
+#   The result never holds more prefixes than the input.  It isn't necessarily the smallest possible table (that
+# needs new prefixes chosen to exploit holes, as ORTC does), but it is for tables whose routes only ever nest or
+# abut.
+#
+
+from operator import attrgetter
+
+from iproute2.route import routerecord
+from iproute2.route import routewriter
+from iproute2.utils import prefix
+
+# Fields which don't change how a route forwards
+IGNORED_FIELDS = ('action', 'PREFIX', 'table')
+
+_signature_fields = tuple(field for field in routerecord.FIELDS if field not in IGNORED_FIELDS)
+_route_values = attrgetter(*_signature_fields)
+_record_values = attrgetter(*[field for field in _signature_fields if field not in routerecord.OPTION_FIELDS])
+
+
+def signature(route):
+    """
+    A route's forwarding signature: every value but its prefix and table, in a hashable form.
+
+    """
+    if type(route) is routerecord.RouteRecord:
+        # The same options may have been parsed in another order
+        options = route.option_values
+        return _record_values(route) + (frozenset(options) if options else None,)
+    return _route_values(route)
+#---
+
+
+def merge_siblings(prefixes, bits):
+    """
+    Pass 1: merges sibling prefixes with the same signature into their parent, bottom up.
+
+    :param prefixes: dict of (network, length) -> signature; changed in place
+    :param bits: Width of the address family
+    :returns: dict of (network, length) -> (network, length) of one of the prefixes each merged prefix came from
+    """
+    levels = [{} for _ in range(bits + 1)]
+    for (network, length), value in prefixes.items():
+        levels[length][network] = value
+
+    origins = {}
+    for length in range(bits, 0, -1):
+        level = levels[length]
+        half = 1 << (bits - length)
+        for network in [network for network in level if not network & half]:
+            value = level[network]
+            if level.get(network | half) != value:
+                continue
+            del level[network]
+            del level[network | half]
+            levels[length - 1][network] = value
+            origins[(network, length - 1)] = origins.pop((network, length), (network, length))
+            origins.pop((network | half, length), None)
+
+    prefixes.clear()
+    for length, level in enumerate(levels):
+        for network, value in level.items():
+            prefixes[(network, length)] = value
+    return dict((merged, origin) for merged, origin in origins.items() if merged in prefixes)
+#---
+
+
+def drop_covered(prefixes, bits):
+    """
+    Pass 2: drops every prefix whose nearest enclosing prefix has the same signature.
+
+    :param prefixes: dict of (network, length) -> signature; changed in place
+    :param bits: Width of the address family
+    :returns: int - number of prefixes dropped
+    """
+    enclosing = []      # Stack of (last address, signature)
+    dropped = 0
+    for network, length in sorted(prefixes):
+        while enclosing and enclosing[-1][0] < network:
+            enclosing.pop()
+        value = prefixes[(network, length)]
+        if enclosing and enclosing[-1][1] == value:
+            del prefixes[(network, length)]
+            dropped += 1
+            continue
+        enclosing.append((network | ((1 << (bits - length)) - 1), value))
+    return dropped
+#---
+
+
+def _moved(route, family, network, length, parser):
+    """
+    A copy of a route under another prefix, made by re-parsing its text.
+
+    """
+    tokens = next(routewriter.route_lines((route,))).split()
+    tokens[1 if route.TYPE else 0] = prefix.format_prefix(family, network, length)
+    return parser(tokens)
+#---
+
+
+def aggregate(routes, parser=routerecord.parse_route):
+    """
+    Aggregates routes (see the module description).  Routes are grouped by table and family; routes without an
+    integer prefix are passed through untouched.
+
+    :param routes: Iterable of route objects
+    :param parser: Callable turning a list of tokens into a route object, used for routes moved to a merged prefix
+    :returns: list of route objects: the original routes which survived, and new ones for the merged prefixes
+    """
+    groups = {}         # (table, family) -> {(network, length): [routes]}
+    result = []
+    for route in routes:
+        if route.network is None:
+            result.append(route)
+            continue
+        family, network, length = route.network
+        key = route.table or 'main', family
+        members = groups.get(key)
+        if members is None:
+            members = groups[key] = {}
+        group = members.get((network, length))
+        if group is None:
+            members[(network, length)] = [route]
+        else:
+            group.append(route)
+
+    for (_, family), members in sorted(groups.items()):
+        bits = prefix.FAMILY_BITS[family]
+        original = dict((key, frozenset(map(signature, group))) for key, group in members.items())
+        prefixes = dict(original)
+        origins = merge_siblings(prefixes, bits)
+        drop_covered(prefixes, bits)
+
+        for key in sorted(prefixes):
+            if original.get(key) == prefixes[key]:
+                result.extend(members[key])
+            else:
+                network, length = key
+                result.extend(_moved(route, family, network, length, parser)
+                              for route in members[origins[key]])
+    return result
+#---
@@ -0,0 +1,192 @@
+# coding=utf-8
+#
+# NAME:         coverage.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Coverage analysis of a routing table, for linting: routes no address can reach (every one of their addresses
+# belongs to more specific routes), next hops outside every connected route, and reject routes (blackhole,
+# unreachable, prohibit) overlapping other routes.
+#
+#   Everything comes from one walk over the radix index.  The walk visits prefixes in address order with covering
+# prefixes first, so a stack per routing table holds the prefixes enclosing the current one.  Each stack entry
+# tracks how far its more specific prefixes cover it without a gap; an entry whose more specific prefixes reached
+# its end when it leaves the stack is shadowed.  Connected routes found along the way are flattened into intervals
+# (route.intervals) afterwards, and each distinct next hop is checked against them once.
+#
+
+from iproute2.route import intervals
+from iproute2.route import radix
+from iproute2.utils import prefix
+
+REJECT_TYPES = frozenset(('blackhole', 'unreachable', 'prohibit'))
+UNICAST_TYPES = (None, 'unicast')
+ONLINK = 'onlink'
+
+
+class _Enclosing(object):
+    """
+    A prefix on the walk's stack.
+
+    """
+    __slots__ = ('end', 'covered', 'gap', 'routes')
+
+    def __init__(self, network, end, routes):
+        self.end = end
+        self.covered = network      # First address not yet covered by more specific prefixes
+        self.gap = False
+        self.routes = routes
+    #---
+#---
+
+
+def is_connected(route):
+    """
+    Whether a route reaches its prefix directly over its device (no gateway), as the kernel's link routes do.
+
+    """
+    return route.TYPE in UNICAST_TYPES and route.via is None and route.nexthop is None and route.dev is not None
+#---
+
+
+def gateways(route):
+    """
+    The gateways a route sends traffic through, leaving out those marked onlink (which the kernel doesn't require a
+    connected route for).
+
+    :returns: list of str
+    """
+    if route.nexthop is not None:
+        return [nexthop.via for nexthop in route.nexthop if nexthop.via is not None and ONLINK not in nexthop.flags]
+    if route.via is not None and route.NHFLAGS != ONLINK:
+        return [route.via]
+    return []
+#---
+
+
+class CoverageReport(object):
+    """
+    The findings of meth:analyze.
+
+    """
+    def __init__(self):
+        self.shadowed = []      # Routes every address of which is taken by more specific routes in their table
+        self.unreachable = []   # (route, gateway) for gateways no connected route covers, grouped by gateway
+        self.overlaps = []      # (reject route, route) for reject routes directly enclosing or enclosed by a route
+    #---
+
+
+    def __len__(self):
+        return len(self.shadowed) + len(self.unreachable) + len(self.overlaps)
+    #---
+
+
+    def __str__(self):
+        """
+        Lists the findings, one per line.
+
+        """
+        lines = ['shadowed: {}'.format(route) for route in self.shadowed]
+        lines += ['unreachable gateway {}: {}'.format(gateway, route) for route, gateway in self.unreachable]
+        lines += ['overlap: {} / {}'.format(reject, route) for reject, route in self.overlaps]
+        return '\n'.join(lines)
+    #---
+#---
+
+
+def _close(entry, report):
+    if not entry.gap and entry.covered > entry.end:
+        report.shadowed.extend(entry.routes)
+#---
+
+
+def analyze(index):
+    """
+    Analyzes the routes of a radix index (see the module description).  Routes in different tables never shadow
+    or overlap one another; connected routes of every table count for next hops.
+
+    :param index: dict of family -> class:radix.RadixTree, as built by RoutingTable.build_index
+    :returns: class:CoverageReport
+    """
+    report = CoverageReport()
+    connected = dict((family, radix.RadixTree(tree.bits)) for family, tree in index.items())
+    checked = {}        # gateway -> routes using it
+
+    for family in sorted(index):
+        tree = index[family]
+        bits = tree.bits
+        stacks = {}     # table -> list of class:_Enclosing
+
+        for node in tree.walk():
+            start = node.network
+            end = start | ((1 << (bits - node.length)) - 1)
+
+            # The node's routes are in order of preference, whichever table they're in
+            values = node.values
+            if len(values) == 1:
+                tables = ((values[0].table or 'main', values),)
+            else:
+                tables = {}
+                for route in values:
+                    tables.setdefault(route.table or 'main', []).append(route)
+                tables = tables.items()
+            for route in values:
+                if is_connected(route):
+                    connected[family].insert(start, node.length, route)
+                for gateway in gateways(route):
+                    users = checked.get(gateway)
+                    if users is None:
+                        checked[gateway] = [route]
+                    else:
+                        users.append(route)
+
+            for table, routes in tables:
+                stack = stacks.setdefault(table, [])
+                while stack and stack[-1].end < start:
+                    _close(stack.pop(), report)
+
+                if stack:
+                    enclosing = stack[-1]
+                    if start == enclosing.covered:
+                        enclosing.covered = end + 1
+                    else:
+                        enclosing.gap = True
+                    # Only the preferred route at each prefix carries traffic
+                    if (routes[0].TYPE in REJECT_TYPES) != (enclosing.routes[0].TYPE in REJECT_TYPES):
+                        if routes[0].TYPE in REJECT_TYPES:
+                            report.overlaps.append((routes[0], enclosing.routes[0]))
+                        else:
+                            report.overlaps.append((enclosing.routes[0], routes[0]))
+
+                stack.append(_Enclosing(start, end, routes))
+
+        for stack in stacks.values():
+            while stack:
+                _close(stack.pop(), report)
+
+    # Resolve the gateways against the connected routes, each distinct gateway once
+    tables = dict((family, intervals.IntervalTable(tree)) for family, tree in connected.items())
+    for gateway, users in checked.items():
+        try:
+            family, address = prefix.parse_address(gateway)
+        except prefix.PrefixError:
+            continue            # Not an address this module can check
+        if family in tables and tables[family].find(address) is None:
+            report.unreachable.extend((route, gateway) for route in users)
+
+    return report
+#---
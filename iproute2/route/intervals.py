@@ -0,0 +1,105 @@
+# coding=utf-8
+#
+# NAME:         intervals.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Flattens a radix tree of nested prefixes into sorted, non-overlapping address intervals.  Once flattened, a
+# longest-prefix-match becomes a single binary search over the interval start addresses, which lets large batches
+# of addresses be resolved without walking the tree for each one.
+#
+
+from bisect import bisect_right
+
+
+class IntervalTable(object):
+    """
+    Sorted, non-overlapping address intervals, each mapped to the value of the most specific prefix covering it.
+    Interval i covers the addresses from starts[i] up to (but not including) starts[i+1].
+
+    """
+    def __init__(self, tree, convert=None):
+        """
+        Constructor.  Flattens the tree with a single sweep over its prefixes.
+
+        :param tree: class:radix.RadixTree to flatten
+        :param convert: Optional callable applied to the winning values list of each prefix (the stored result is
+                        None where no prefix matches)
+
+        """
+        self.starts = []
+        self.values = []
+        self._convert = convert or (lambda values: values[0])
+
+        bits = tree.bits
+        covering = []      # Stack of (last address, result) for the prefixes enclosing the current position
+
+        self._mark(0, None)
+        for node in tree.walk():
+            start = node.network
+            while covering and covering[-1][0] < start:
+                end = covering.pop()[0]
+                self._mark(end + 1, covering[-1][1] if covering else None)
+
+            result = self._convert(node.values)
+            self._mark(start, result)
+            covering.append((start | ((1 << (bits - node.length)) - 1), result))
+
+        while covering:
+            end = covering.pop()[0]
+            self._mark(end + 1, covering[-1][1] if covering else None)
+    #---
+
+
+    def __len__(self):
+        return len(self.starts)
+    #---
+
+
+    def _mark(self, start, result):
+        """
+        Records that every address from start onwards resolves to result, until the next mark.
+
+        """
+        if self.starts and self.starts[-1] == start:
+            self.values[-1] = result
+        elif not self.values or self.values[-1] is not result:
+            self.starts.append(start)
+            self.values.append(result)
+    #---
+
+
+    def find(self, address):
+        """
+        Resolves a single integer address.
+
+        """
+        return self.values[bisect_right(self.starts, address) - 1]
+    #---
+
+
+    def findMany(self, addresses):
+        """
+        Resolves a sequence of integer addresses in one pass.
+
+        :returns: list of results, in the same order as the addresses
+        """
+        starts = self.starts
+        values = self.values
+        return [values[bisect_right(starts, address) - 1] for address in addresses]
+    #---
+#---
@@ -0,0 +1,127 @@
+# coding=utf-8
+#
+# NAME:         lookupcache.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   A bounded cache of address lookup results, for callers asking about the same destinations over and over.  A hit
+# is a dictionary lookup on the address text, skipping both parsing the address and walking the tree.
+#
+#   Entries are checked against generation counters rather than thrown away when the table changes.  Addresses are
+# divided into blocks at several lengths (LEVELS: /8, /16 and /24 for IPv4), and each block has a counter.  A change
+# to a prefix bumps one counter: that of the block at the longest level no longer than the prefix, which the prefix
+# lies inside.  Every prefix containing an address therefore bumps the counter of one of the address's own blocks,
+# so an entry which still matches the counters of all of them can't have been affected by a change.  Changes
+# elsewhere in the table leave it alone, and a change to a /12 only invalidates the addresses of one /8.  Level 0 is
+# the whole family, bumped by changes to prefixes shorter than the first level (such as the default route).
+#
+
+from iproute2.utils import lrucache
+from iproute2.utils import prefix
+
+# Lengths of the blocks generations are counted for, shortest first
+LEVELS = {prefix.IP_V4: (0, 8, 16, 24), prefix.IP_V6: (0, 16, 32, 48, 64)}
+
+NO_CHANGES = (0,) * max(len(levels) for levels in LEVELS.values())     # Generation of blocks never changed
+MISSING = object()      # Returned by LookupCache.get for addresses it can't answer
+
+
+class LookupCache(object):
+    """
+    Maps address text to the route a lookup found for it, invalidated by generation counters (see the module
+    description).
+
+    """
+    def __init__(self, maxsize=4096):
+        """
+        Constructor
+
+        :param maxsize: Maximum number of addresses kept; the least recently used are evicted first
+
+        """
+        self.entries = lrucache.LRUCache(maxsize)
+        self.generations = {}       # (family, level, block) -> number of changes to prefixes counted against the block
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0              # Misses for entries invalidated by a change
+    #---
+
+
+    def __len__(self):
+        return len(self.entries)
+    #---
+
+
+    def get(self, address):
+        """
+        Fetches the cached result for an address, if it's still valid.
+
+        :param address: Address text, as passed to the lookup
+        :returns: route object, None (the lookup found no route), or MISSING
+        """
+        entry = self.entries.get(address)
+        if entry is not None:
+            route, blocks, generations = entry
+            if list(map(self.generations.get, blocks, NO_CHANGES)) == generations:
+                self.hits += 1
+                return route
+            self.entries.pop(address)
+            self.stale += 1
+        self.misses += 1
+        return MISSING
+    #---
+
+
+    def put(self, address, family, value, route):
+        """
+        Caches the result of a lookup.
+
+        :param address: Address text, as passed to the lookup
+        :param family: Address family
+        :param value: Integer address
+        :param route: Route object found (or None)
+        """
+        bits = prefix.FAMILY_BITS[family]
+        blocks = [(family, level, value >> (bits - level)) for level in LEVELS[family]]
+        self.entries.put(address, (route, blocks, list(map(self.generations.get, blocks, NO_CHANGES))))
+    #---
+
+
+    def invalidate(self, family, network, length):
+        """
+        Records a change to the routes of a prefix, invalidating the entries it may have affected.
+
+        """
+        level = 0
+        for block_length in LEVELS[family]:
+            if block_length > length:
+                break
+            level = block_length
+        block = family, level, network >> (prefix.FAMILY_BITS[family] - level)
+        self.generations[block] = self.generations.get(block, 0) + 1
+    #---
+
+
+    def clear(self):
+        """
+        Drops every entry (after the whole table is replaced).
+
+        """
+        self.entries.clear()
+        self.generations.clear()
+    #---
+#---
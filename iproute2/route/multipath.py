@@ -0,0 +1,243 @@
+# coding=utf-8
+#
+# NAME:         multipath.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Multipath (ECMP) routes.  The 'nexthop via ... dev ... weight N' sections of a route are gathered into a
+# NexthopGroup, which is shared by every route using an identical set of next hops.
+#
+#   Each group also holds the kernel's hash-threshold selection index: next hop i owns the flow hashes up to
+# round(2^31 * (w0 + ... + wi) / total weight) - 1, so choosing the next hop for a flow hash is a binary search.
+# Dead next hops take no traffic.  The kernel's flow hash itself is seeded at boot, so callers supply their own: a
+# 32-bit hash, of which the kernel (fib_multipath_hash) keeps the top 31 bits.
+#
+
+from bisect import bisect_left
+from collections import namedtuple
+
+# Keywords of a nexthop section which take a parameter, and the flags which may follow them
+NEXTHOP_KEYWORDS = frozenset(('via', 'dev', 'weight'))
+NEXTHOP_FLAGS = frozenset(('onlink', 'pervasive', 'dead', 'linkdown'))
+DEAD = 'dead'
+
+FLOW_HASH_MASK = 0xffffffff     # Flow hashes are 32 bits wide
+HASH_BITS = 31                  # The kernel compares the top 31 bits of the flow hash against the thresholds
+
+# Pools of shared next hops and groups (keyed by their next hops), so routes with the same next hops hold the same
+# objects.  Each pool is emptied when it reaches SHARED_LIMIT entries, as route.routerecord.value_pool does.
+SHARED_LIMIT = 16384
+shared_nexthops = {}
+shared_groups = {}
+
+
+Nexthop = namedtuple('Nexthop', ('via', 'dev', 'weight', 'flags'))
+
+
+def format_nexthop(nexthop):
+    """
+    Text of one next hop, as 'ip route' prints it after 'nexthop'.
+
+    """
+    words = []
+    if nexthop.via is not None:
+        words.extend(('via', nexthop.via))
+    if nexthop.dev is not None:
+        words.extend(('dev', nexthop.dev))
+    words.extend(('weight', str(nexthop.weight)))
+    words.extend(nexthop.flags)
+    return ' '.join(words)
+#---
+
+
+class NexthopGroup(object):
+    """
+    The next hops of a multipath route, in the order the kernel lists them.  Groups compare (and hash) by their next
+    hops, and iterate over them.
+
+    """
+    __slots__ = ('nexthops', 'choices', 'bounds', '_hash')
+
+    def __init__(self, nexthops):
+        """
+        Constructor.  Builds the selection index.
+
+        :param nexthops: Iterable of class:Nexthop
+        """
+        self.nexthops = tuple(nexthops)
+        self._hash = hash(self.nexthops)
+
+        self.choices = tuple(nexthop for nexthop in self.nexthops if DEAD not in nexthop.flags)
+        total = sum(nexthop.weight for nexthop in self.choices)
+        bounds = []
+        cumulative = 0
+        for nexthop in self.choices:
+            cumulative += nexthop.weight
+            # The kernel's DIV_ROUND_CLOSEST_ULL(cumulative << 31, total) - 1
+            bounds.append(((cumulative << HASH_BITS) + total // 2) // total - 1)
+        self.bounds = bounds
+    #---
+
+
+    def __eq__(self, other):
+        return isinstance(other, NexthopGroup) and self.nexthops == other.nexthops
+    #---
+
+
+    def __ne__(self, other):
+        return not self == other
+    #---
+
+
+    def __hash__(self):
+        return self._hash
+    #---
+
+
+    def __len__(self):
+        return len(self.nexthops)
+    #---
+
+
+    def __iter__(self):
+        return iter(self.nexthops)
+    #---
+
+
+    def __getitem__(self, item):
+        return self.nexthops[item]
+    #---
+
+
+    def __str__(self):
+        return ' '.join('nexthop ' + format_nexthop(nexthop) for nexthop in self.nexthops)
+    #---
+
+
+    def __repr__(self):
+        return 'NexthopGroup({!r})'.format(self.nexthops)
+    #---
+
+
+    def select(self, flow_hash):
+        """
+        Picks the next hop the kernel would send a flow with this hash to.
+
+        :param flow_hash: 32-bit integer flow hash; like the kernel, only its top 31 bits are used
+        :returns: class:Nexthop, or None if every next hop is dead
+        """
+        try:
+            return self.choices[bisect_left(self.bounds, (flow_hash & FLOW_HASH_MASK) >> 1)]
+        except IndexError:
+            return None
+    #---
+
+
+    def select_many(self, flow_hashes):
+        """
+        meth:select for a batch of flow hashes.
+
+        :returns: list of class:Nexthop (or None), in the same order as the hashes
+        """
+        if not self.choices:
+            return [None] * len(flow_hashes)
+        choices, bounds = self.choices, self.bounds
+        return [choices[bisect_left(bounds, (flow_hash & FLOW_HASH_MASK) >> 1)] for flow_hash in flow_hashes]
+    #---
+#---
+
+
+def make_group(nexthops):
+    """
+    Builds (or fetches the shared copy of) the group for a list of next hops.
+
+    :param nexthops: Iterable of dicts holding any of 'via', 'dev', 'weight' (str or int, 1 when absent) and 'flags'
+    :returns: class:NexthopGroup
+    """
+    if len(shared_nexthops) >= SHARED_LIMIT:
+        shared_nexthops.clear()
+    if len(shared_groups) >= SHARED_LIMIT:
+        shared_groups.clear()
+
+    share = shared_nexthops.setdefault
+    members = []
+    for nexthop in nexthops:
+        member = Nexthop(nexthop.get('via'), nexthop.get('dev'), int(nexthop.get('weight') or 1),
+                         tuple(nexthop.get('flags') or ()))
+        members.append(share(member, member))
+
+    members = tuple(members)
+    group = shared_groups.get(members)
+    if group is None:
+        group = shared_groups[members] = NexthopGroup(members)
+    return group
+#---
+
+
+def split_nexthops(tokens):
+    """
+    Separates the nexthop sections of a tokenized multipath route from the rest of it.  Tokens which don't belong to
+    a next hop ('mtu 1400' after the last one, say) stay with the route.
+
+    :param tokens: list of str tokens of a whole route (see utils.cmd.join_multipath)
+    :returns: tuple - (list of the route's other tokens, class:NexthopGroup or None if the route has no nexthops)
+    """
+    if 'nexthop' not in tokens:
+        return tokens, None
+
+    remaining = []
+    nexthops = []
+    nexthop = None
+    position = 0
+    count = len(tokens)
+    while position < count:
+        token = tokens[position]
+        position += 1
+        if token == 'nexthop':
+            nexthop = {}
+            nexthops.append(nexthop)
+        elif nexthop is not None and token in NEXTHOP_KEYWORDS and position < count:
+            value = tokens[position]
+            position += 1
+            # Gateways of another family are printed 'via inet6 <address>'
+            if token == 'via' and value in ('inet', 'inet6') and position < count:
+                value = tokens[position]
+                position += 1
+            nexthop[token] = value
+        elif nexthop is not None and token in NEXTHOP_FLAGS:
+            nexthop.setdefault('flags', []).append(token)
+        else:
+            remaining.append(token)
+
+    return remaining, make_group(nexthops)
+#---
+
+
+def select_nexthop(route, flow_hash):
+    """
+    Picks the next hop a flow takes through a route.  Routes without nexthop sections have a single next hop, which
+    every flow takes.
+
+    :param route: Route object (routegrammar.ROUTE or routerecord.RouteRecord)
+    :param flow_hash: 32-bit integer flow hash (see meth:NexthopGroup.select)
+    :returns: class:Nexthop, or None if every next hop of the route is dead
+    """
+    group = route.nexthop
+    if group is not None:
+        return group.select(flow_hash)
+    return Nexthop(route.via, route.dev, int(route.weight or 1), (route.NHFLAGS,) if route.NHFLAGS else ())
+#---
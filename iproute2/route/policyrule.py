@@ -0,0 +1,172 @@
+# coding=utf-8
+#
+# NAME:         policyrule.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Routing policy rules, as printed by 'ip rule'.  A rule selects packets (by source, destination, interfaces, tos
+# and firewall mark) and says what to do with them: look the destination up in a routing table, jump to another
+# rule or reject the packet outright.
+#
+
+from iproute2.utils import prefix
+
+# Actions which end the rule search without a table lookup
+REJECT_ACTIONS = frozenset(('blackhole', 'unreachable', 'prohibit'))
+ACTIONS = REJECT_ACTIONS | frozenset(('lookup', 'goto', 'nop'))
+
+# Selector keyword -> field, for the selectors which take a parameter
+SELECTORS = {'from': 'source', 'to': 'destination', 'tos': 'tos', 'dsfield': 'tos', 'fwmark': 'fwmark',
+             'iif': 'iif', 'oif': 'oif', 'lookup': 'table', 'table': 'table', 'goto': 'goto',
+             'suppress_prefixlength': 'suppress_prefixlength', 'pref': 'priority', 'priority': 'priority'}
+
+FWMARK_MASK = 0xffffffff
+
+
+# Exceptions
+class PolicyRuleError(ValueError):
+    pass
+
+
+def _prefix_matches(network, address):
+    """
+    Checks an address against a normalized prefix (see utils.prefix.parse_prefix).  A network of None matches
+    anything.
+
+    :param network: (family, integer network, length) tuple or None
+    :param address: (family, integer address) tuple or None
+    """
+    if network is None:
+        return True
+    if address is None:
+        return False
+
+    family, value, length = network
+    if family != address[0]:
+        return False
+    host_bits = prefix.FAMILY_BITS[family] - length
+    return address[1] >> host_bits == value >> host_bits
+#---
+
+
+class PolicyRule(object):
+    """
+    One routing policy rule.  'source' and 'destination' hold normalized prefixes (None for 'all'), 'fwmark' and
+    'fwmask' integers, 'table' the table name as 'ip rule' prints it, and 'action' one of ACTIONS.
+
+    """
+    __slots__ = ('priority', 'invert', 'source', 'destination', 'tos', 'fwmark', 'fwmask', 'iif', 'oif', 'action',
+                 'table', 'goto', 'suppress_prefixlength', 'l3mdev', 'text')
+
+    def __init__(self):
+        self.priority = 0
+        self.invert = False
+        self.source = self.destination = self.tos = self.fwmark = self.iif = self.oif = None
+        self.fwmask = FWMARK_MASK
+        self.action = 'lookup'
+        self.table = self.goto = self.suppress_prefixlength = None
+        self.l3mdev = False
+        self.text = ''
+    #---
+
+
+    def __str__(self):
+        return self.text
+    #---
+
+
+    def matches(self, destination, source=None, iif=None, oif=None, fwmark=0, tos=None):
+        """
+        Checks whether a packet is selected by this rule.
+
+        :param destination: (family, integer address) tuple, as from utils.prefix.parse_address
+        :param source: (family, integer address) tuple, or None when the source isn't known
+        :param iif: Name of the interface the packet arrived on ('lo' for locally generated packets)
+        :param oif: Name of the interface the packet is bound to leave by
+        :param fwmark: Firewall mark of the packet
+        :param tos: Type of service of the packet, as printed by iproute2 ('0x10')
+        :returns: bool
+        """
+        selected = (_prefix_matches(self.source, source) and
+                    _prefix_matches(self.destination, destination) and
+                    (self.iif is None or self.iif == iif) and
+                    (self.oif is None or self.oif == oif) and
+                    (self.fwmark is None or (fwmark or 0) & self.fwmask == self.fwmark) and
+                    (self.tos is None or self.tos == tos))
+        return selected != self.invert
+    #---
+#---
+
+
+def parse_rule(tokens):
+    """
+    Parses one tokenized line of 'ip rule' output.
+
+    :param tokens: list of str tokens ('32766:', 'from', 'all', 'lookup', 'main')
+    :returns: class:PolicyRule
+    :raises: PolicyRuleError
+    """
+    rule = PolicyRule()
+    rule.text = ' '.join(tokens)
+    position = 0
+    count = len(tokens)
+
+    if tokens and tokens[0].endswith(':'):
+        try:
+            rule.priority = int(tokens[0][:-1])
+        except ValueError:
+            raise PolicyRuleError('Invalid rule priority: {}'.format(rule.text))
+        position += 1
+
+    while position < count:
+        token = tokens[position]
+
+        if token == 'not':
+            rule.invert = True
+        elif token in REJECT_ACTIONS or token == 'nop':
+            rule.action = token
+        elif token in SELECTORS and position + 1 < count:
+            field = SELECTORS[token]
+            value = tokens[position + 1]
+            position += 1
+
+            try:
+                if field in ('source', 'destination'):
+                    setattr(rule, field, None if value == 'all' else prefix.normalize_prefix(value))
+                elif field == 'fwmark':
+                    mark, _, mask = value.partition('/')
+                    rule.fwmark = int(mark, 0)
+                    rule.fwmask = int(mask, 0) if mask else FWMARK_MASK
+                elif field == 'table':
+                    if value == '[l3mdev-table]':
+                        rule.l3mdev = True
+                    else:
+                        rule.table = value
+                elif field == 'goto':
+                    rule.action = 'goto'
+                    rule.goto = int(value) if value != 'none' else None
+                elif field in ('priority', 'suppress_prefixlength'):
+                    setattr(rule, field, int(value))
+                else:
+                    setattr(rule, field, value)
+            except ValueError:        # Includes utils.prefix.PrefixError
+                raise PolicyRuleError('Invalid rule {}: {}'.format(token, rule.text))
+        # Anything else ('[detached]', 'proto ...', unknown selectors) doesn't take part in resolution
+        position += 1
+
+    return rule
+#---
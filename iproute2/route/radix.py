@@ -0,0 +1,245 @@
+# coding=utf-8
+#
+# NAME:         radix.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Defines a compressed radix (Patricia) tree keyed on integer prefixes.  Used to answer longest-prefix-match
+# questions against a routing table in O(prefix length) time.
+#
+
+
+class RadixNode(object):
+    """
+    A single node of the tree.  Nodes without values are glue nodes, created where two prefixes diverge.
+
+    """
+    __slots__ = ('network', 'length', 'children', 'values')
+
+    def __init__(self, network, length):
+        self.network = network
+        self.length = length
+        self.children = [None, None]
+        self.values = []
+    #---
+#---
+
+
+class RadixTree(object):
+    """
+    Compressed binary tree of prefixes for one address family.  Each prefix holds a list of values, kept in order of
+    preference by the optional sort key.
+
+    """
+    def __init__(self, bits, key=None):
+        """
+        Constructor
+
+        :param bits: Width of the address family in bits (32 or 128)
+        :param key: Optional sort key used to order the values stored under a single prefix
+
+        """
+        self.bits = bits
+        self.key = key
+        self.root = RadixNode(0, 0)
+        self.prefix_count = 0
+    #---
+
+
+    def __len__(self):
+        return self.prefix_count
+    #---
+
+
+    def _bit(self, network, position):
+        """
+        Returns the bit of the network found at the given position (0 being the most significant).
+
+        """
+        return (network >> (self.bits - position - 1)) & 1
+    #---
+
+
+    def _commonLength(self, network_a, network_b, max_length):
+        """
+        Returns how many leading bits the two networks share, up to max_length.
+
+        """
+        diff = (network_a ^ network_b) >> (self.bits - max_length)
+        return max_length - diff.bit_length()
+    #---
+
+
+    def insert(self, network, length, value):
+        """
+        Adds a value under the prefix network/length, creating the prefix if it doesn't exist.
+
+        :returns: list of the values now stored under the prefix, in order of preference
+        """
+        bits = self.bits
+        node = self.root
+        while node.length != length:
+            # Inlined _bit() and _commonLength(); this loop dominates building an index
+            bit = (network >> (bits - node.length - 1)) & 1
+            child = node.children[bit]
+
+            if child is None:
+                child = node.children[bit] = RadixNode(network, length)
+                node = child
+                break
+
+            max_length = length if length < child.length else child.length
+            common = max_length - ((network ^ child.network) >> (bits - max_length)).bit_length()
+            if common == child.length:
+                node = child
+                continue
+
+            # The new prefix diverges from the child somewhere along its edge, so the edge has to be split
+            if common == length:
+                new_node = RadixNode(network, length)
+                new_node.children[self._bit(child.network, length)] = child
+            else:
+                new_node = RadixNode(network & ~((1 << (self.bits - common)) - 1), common)
+                new_node.children[self._bit(child.network, common)] = child
+                leaf = new_node.children[self._bit(network, common)] = RadixNode(network, length)
+                node.children[bit] = new_node
+                node = leaf
+                break
+
+            node.children[bit] = new_node
+            node = new_node
+            break
+
+        if not node.values:
+            self.prefix_count += 1
+        node.values.append(value)
+        if self.key and len(node.values) > 1:
+            node.values.sort(key=self.key)
+        return node.values
+    #---
+
+
+    def remove(self, network, length, value):
+        """
+        Removes a value from the prefix network/length, pruning the prefix if it no longer holds anything.
+
+        :raises: KeyError if the value isn't stored under the prefix
+        """
+        path = []
+        node = self.root
+        while node is not None and node.length < length:
+            path.append(node)
+            node = node.children[self._bit(network, node.length)]
+
+        if node is None or node.length != length or node.network != network or value not in node.values:
+            raise KeyError('{}/{}'.format(network, length))
+
+        node.values.remove(value)
+        if node.values:
+            return
+        self.prefix_count -= 1
+
+        # Splice out nodes which no longer serve a purpose, working back up towards the root
+        while path and not node.values:
+            parent = path.pop()
+            remaining = [child for child in node.children if child is not None]
+            if len(remaining) > 1:
+                break
+            parent.children[parent.children.index(node)] = remaining[0] if remaining else None
+            node = parent
+    #---
+
+
+    def exact(self, network, length):
+        """
+        Fetches the values stored under exactly network/length.
+
+        :returns: list of values (empty if the prefix isn't present)
+        """
+        node = self.root
+        while node is not None and node.length < length:
+            node = node.children[self._bit(network, node.length)]
+
+        if node is None or node.length != length or node.network != network:
+            return []
+        return node.values
+    #---
+
+
+    def walk(self):
+        """
+        Iterates over every prefix holding values, in address order with covering prefixes ahead of the prefixes they
+        contain.
+
+        :returns: generator of class:RadixNode
+        """
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.values:
+                yield node
+            for child in reversed(node.children):
+                if child is not None:
+                    stack.append(child)
+    #---
+
+
+    def nodes(self):
+        """
+        Lists every prefix holding values, in no particular order.  Much cheaper than meth:walk for callers which
+        don't need address order.
+
+        :returns: list of class:RadixNode
+        """
+        found = []
+        stack = [self.root]
+        pop = stack.pop
+        push = stack.extend
+        while stack:
+            node = pop()
+            if node is None:
+                continue
+            if node.values:
+                found.append(node)
+            push(node.children)
+        return found
+    #---
+
+
+    def longestMatch(self, address):
+        """
+        Finds the most specific prefix containing the address.
+
+        :param address: Integer address
+        :returns: list of values of the matching prefix (empty if nothing matches)
+        """
+        bits = self.bits
+        best = self.root.values
+        node = self.root
+        while node is not None:
+            shift = bits - node.length
+            if (address >> shift) != (node.network >> shift):
+                break
+            if node.values:
+                best = node.values
+            if not shift:
+                break
+            node = node.children[(address >> (shift - 1)) & 1]
+
+        return best
+    #---
+#---
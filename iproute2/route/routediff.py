@@ -0,0 +1,230 @@
+# coding=utf-8
+#
+# NAME:         routediff.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Computes the differences between two sets of routes.  Routes are matched up by a hashable key (normally
+# RoutingTable.route_key) so the comparison is linear in the number of routes; only routes whose values differ are
+# compared field by field.  RoutingTable.diff goes through RouteDiff.between_indexes, which matches routes up by
+# prefix straight from the two radix trees and settles an unchanged RouteRecord with a single tuple comparison.
+#
+
+from operator import attrgetter
+
+from iproute2.route import routerecord
+from iproute2.route import routewriter
+
+# Fields compared between two routes sharing a key, per grammar segment.  PREFIX, tos, table and metric are part of
+# the key itself.
+COMPARED_FIELDS = (
+    ('NODE_SPEC', ('TYPE', 'proto', 'scope')),
+    ('INFO_SPEC', ('nexthop',)),
+    ('NH', routerecord.SEGMENT_FIELDS['NH']),
+    ('OPTIONS', routerecord.SEGMENT_FIELDS['OPTIONS']),
+)
+
+_route_values = attrgetter(*[field for _, fields in COMPARED_FIELDS for field in fields])
+
+# RouteRecords keep their OPTIONS fields together as one shared tuple, which compares much faster
+_RECORD_FIELDS = [field for segment, fields in COMPARED_FIELDS if segment != 'OPTIONS' for field in fields]
+_record_values = attrgetter(*_RECORD_FIELDS + ['option_values'])
+# The same plus the fields of RoutingTable.route_key (other than the prefix), so that an unchanged RouteRecord
+# under an unchanged prefix is settled by a single tuple comparison
+_keyed_record_values = attrgetter(*['tos', 'table', 'metric'] + _RECORD_FIELDS + ['option_values'])
+_record_type = routerecord.RouteRecord
+
+
+def _prefix_routes(tree):
+    """
+    Maps each prefix of a radix tree, as network << 8 | length (integers hash much faster than route.network tuples),
+    to the list of routes stored under it.
+
+    """
+    return {node.network << 8 | node.length: node.values for node in tree.nodes()}
+#---
+
+
+class RouteChange(object):
+    """
+    A route present in both sets whose values differ.
+
+    """
+    __slots__ = ('old', 'new', 'changes')
+
+    def __init__(self, old, new):
+        """
+        Constructor.  Works out which fields changed.
+
+        :param old: Route object from the first set
+        :param new: Route object from the second set
+
+        """
+        self.old = old
+        self.new = new
+        self.changes = {}       # segment name -> {field: (old value, new value)}
+
+        for segment, fields in COMPARED_FIELDS:
+            for field in fields:
+                old_value = getattr(old, field)
+                new_value = getattr(new, field)
+                if old_value != new_value:
+                    self.changes.setdefault(segment, {})[field] = (old_value, new_value)
+    #---
+
+
+    def __str__(self):
+        changes = ['{} {} -> {}'.format(field, old_value, new_value)
+                   for segment, _ in COMPARED_FIELDS
+                   for field, (old_value, new_value) in sorted(self.changes.get(segment, {}).items())]
+        return '{} ({})'.format(self.new, ', '.join(changes))
+    #---
+#---
+
+
+class RouteDiff(object):
+    """
+    The differences between two sets of routes: the routes only in the second set (added), only in the first
+    (removed), and in both but with different values (modified, as class:RouteChange).
+
+    """
+    def __init__(self, old_routes, new_routes, key):
+        """
+        Constructor.  Computes the differences.
+
+        :param old_routes: Iterable of route objects
+        :param new_routes: Iterable of route objects
+        :param key: Callable returning the hashable identity of a route
+
+        """
+        self.added = []
+        self.removed = []
+        self.modified = []
+        self._diffRoutes(old_routes, new_routes, key)
+    #---
+
+
+    @classmethod
+    def between_indexes(cls, old_index, new_index, key):
+        """
+        Computes the differences between the routes of two RoutingTable indexes.  Routes are first matched up by
+        prefix straight from the radix tree nodes, so only prefixes holding more than one route (several tables,
+        metrics or tos values) are keyed route by route.  Gives the same result as the constructor, about three times
+        as fast.
+
+        :param old_index: dict of family -> route.radix.RadixTree (RoutingTable.index)
+        :param new_index: dict of family -> route.radix.RadixTree
+        :param key: Callable returning the hashable identity of a route, made up of its prefix plus fields RouteDiff
+                    compares or tos, table and metric, as RoutingTable.route_key is
+        :returns: class:RouteDiff
+        """
+        diff = cls((), (), key)
+        added = diff.added
+        removed = diff.removed
+        record_type = _record_type
+        keyed_values = _keyed_record_values
+
+        for family in set(old_index) | set(new_index):
+            old_prefixes = _prefix_routes(old_index[family]) if family in old_index else {}
+            new_prefixes = _prefix_routes(new_index[family]) if family in new_index else {}
+
+            for network, new_values in new_prefixes.items():
+                if network not in old_prefixes:
+                    added.extend(new_values)
+
+            for network, old_values in old_prefixes.items():
+                new_values = new_prefixes.get(network)
+                if new_values is None:
+                    removed.extend(old_values)
+                    continue
+                if len(old_values) == 1 and len(new_values) == 1:
+                    old = old_values[0]
+                    new = new_values[0]
+                    if old is new or (type(old) is record_type and type(new) is record_type and
+                                      keyed_values(old) == keyed_values(new)):
+                        continue
+                    if key(old) == key(new):
+                        diff._diffPair(old, new)
+                        continue
+                diff._diffRoutes(old_values, new_values, key)
+        return diff
+    #---
+
+
+    def _diffRoutes(self, old_routes, new_routes, key):
+        old_keyed = {key(route): route for route in old_routes}
+        new_keyed = {key(route): route for route in new_routes}
+
+        self.added.extend(route for route_key, route in new_keyed.items() if route_key not in old_keyed)
+        for route_key, old in old_keyed.items():
+            new = new_keyed.get(route_key)
+            if new is None:
+                self.removed.append(old)
+            else:
+                self._diffPair(old, new)
+    #---
+
+
+    def _diffPair(self, old, new):
+        if new is old:
+            return
+        if type(old) is _record_type and type(new) is _record_type:
+            if _record_values(old) != _record_values(new):
+                self._compare(old, new)
+        elif _route_values(old) != _route_values(new):
+            self._compare(old, new)
+    #---
+
+
+    def _compare(self, old, new):
+        # option_values also differ when the same options were merely printed in another order (as 'ip route' and
+        # route.routewriter order them differently), so only count routes with a field which actually changed
+        change = RouteChange(old, new)
+        if change.changes:
+            self.modified.append(change)
+    #---
+
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.modified)
+    #---
+
+
+    def __str__(self):
+        """
+        Lists the differences, one route per line, marked '+' (added), '-' (removed) or '~' (modified).
+
+        """
+        lines = ['+ {}'.format(route) for route in self.added]
+        lines += ['- {}'.format(route) for route in self.removed]
+        lines += ['~ {}'.format(change) for change in self.modified]
+        return '\n'.join(lines)
+    #---
+
+
+    def write_batch(self, output):
+        """
+        Writes the 'ip -batch' script turning the first set of routes into the second: a 'route del' for each
+        removed route and a 'route replace' for each added or modified one.
+
+        :param output: File object to write to
+        :returns: int - number of commands written
+        """
+        replace = self.added + [change.new for change in self.modified]
+        return routewriter.RouteWriter(output).write_batch(replace, self.removed)
+    #---
+#---
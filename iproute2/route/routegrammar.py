@@ -26,6 +26,8 @@ import sys
 import cidrize
 
 from iproute2 import parsenode
+from iproute2.route import multipath
+from iproute2.utils import prefix as prefix_utils
 
 
 # -------- NODE_SPEC --------
@@ -38,13 +40,14 @@ class NODE_SPEC(parsenode.ParseNode):
     Defines the 'NODE_SPEC' segment of the iproute2 routing grammar.
     """
     # Defined by iproute2's grammar
-    types = ('unicast', 'local', 'broadcast', 'multicast', 'throw',
+    types = ('unicast', 'local', 'broadcast', 'anycast', 'multicast', 'throw',
              'unreachable', 'prohibit', 'blackhole', 'nat')
     options = ('tos', 'table', 'proto', 'scope', 'metric')
 
     # NODE_SPEC variables/options
     TYPE = None
     PREFIX = None
+    network = None      # PREFIX as a (family, integer network, length) tuple, when it can be expressed as one
     tos = None
     table = None
     proto = None
@@ -67,9 +70,9 @@ class NODE_SPEC(parsenode.ParseNode):
             self._addRawSegment(self.TYPE)      # Make sure we have the string segment stored
             tokens.remove(tokens[0])
 
-        # PREFIX validation
+        # PREFIX validation.  'default' is ::/0 in an IPv6 route (see ROUTE for routes whose family is known).
         if tokens[0] == 'default':
-            self.PREFIX = '0.0.0.0/0'
+            self.PREFIX = prefix_utils.DEFAULT_PREFIXES[prefix_utils.tokens_family(tokens)]
         else:
             self.PREFIX = tokens[0]
 
@@ -107,12 +110,20 @@ class NODE_SPEC(parsenode.ParseNode):
 
     def validatePrefix(self, prefix):
         """
-        Validates an Internet network or ip address (/32).
+        Validates an Internet network or ip address (/32).  The forms 'ip route' prints are parsed directly (and
+        cached) into self.network; anything else is handed to cidrize.
 
         :param prefix, The network in CIDR notation.
         :return, Text of error from cidrize on error, otherwise None.
 
         """
+        try:
+            self.network = prefix_utils.normalize_prefix(prefix)
+        except prefix_utils.PrefixError:
+            pass
+        else:
+            return None
+
         try:
             cidrize.cidrize(prefix)
         except cidrize.CidrizeError:
@@ -148,12 +159,6 @@ class NH(parsenode.ParseNode):
         :return, Array of tokens that were not used by the parser.
 
         """
-        # NHFLAGS is optional
-        if tokens[0] in self.flags:
-            self.NHFLAGS = tokens[0]
-            self._addRawSegment(self.NHFLAGS)      # Make sure we have the string segment stored
-            tokens.remove(tokens[0])
-
         # Option parsing
         new_token_list = list(tokens)
         matched_option = False
@@ -163,6 +168,13 @@ class NH(parsenode.ParseNode):
                 matched_option = False
                 continue
 
+            # NHFLAGS is optional, and 'ip route' prints it after the options ('via ... dev ... onlink')
+            if token in self.flags:
+                self.NHFLAGS = token
+                self._addRawSegment(self.NHFLAGS)      # Make sure we have the string segment stored
+                new_token_list.remove(token)
+                continue
+
             # If the token is matched, store it
             if token in self.options:
                 self[token] = tokens[tokens.index(token)+1]
@@ -253,25 +265,40 @@ class INFO_SPEC(parsenode.ParseNode):
 
     """
     child_class_list = (NH, OPTIONS)
-    #TODO: This is reference to NH according to the grammar, and there can be multiples.  Fix it to support this.
-    nexthop = None
+    nexthop = None      # route.multipath.NexthopGroup of a multipath route's 'nexthop' sections
 
 
     def __getattr__(self, attr):
         """
-        Allows child attributes to be fetched from the parent (making life MUCH easier for most cases).
+        Allows child attributes to be fetched from the parent (making life MUCH easier for most cases).  See
+        ParseNode.childFields.
 
         """
-        for child in self.children:
-            if hasattr(self.children[child], attr):
-                return getattr(self.children[child], attr)
-
-        raise AttributeError
+        return self._childAttr(attr)
+    #---
 
 
     def parse(self, tokens):
+        """
+        Gathers the 'nexthop' sections of a multipath route into self.nexthop, leaving the rest for NH and OPTIONS.
+
+        """
+        tokens, self.nexthop = multipath.split_nexthops(tokens)
         return tokens
     #---
+
+
+    def __str__(self):
+        """
+        Prints the 'nexthop' sections after NH and OPTIONS, where 'ip route' prints them and the only place it reads
+        them back from ('nexthop via ... mtu 1400' is rejected).
+
+        """
+        text = parsenode.ParseNode.__str__(self)
+        if self.nexthop is None:
+            return text
+        return (text + ' ' + str(self.nexthop)).strip()
+    #---
 #---
 
 
@@ -286,16 +313,27 @@ class ROUTE(parsenode.ParseNode):
     actions = ('add', 'del', 'change', 'append', 'replace', 'monitor')
     action = None
 
-    def __getattr__(self, attr):
+    def __init__(self, tokens, raw_includes_children=True, family=None):
+        """
+        Constructor
+
+        :param family: Address family the route was listed for (4 or 6), which 'default' depends on; None works it
+                       out from the route (see utils.prefix.tokens_family)
+
         """
-        Allows child attributes to be fetched from the parent (making life MUCH easier for most cases).
+        self.family = family
+        parsenode.ParseNode.__init__(self, tokens, raw_includes_children)
+    #---
 
+
+    def __getattr__(self, attr):
         """
-        for child in self.children:
-            if hasattr(self.children[child], attr):
-                return getattr(self.children[child], attr)
+        Allows child attributes to be fetched from the parent (making life MUCH easier for most cases).  See
+        ParseNode.childFields.
 
-        raise AttributeError
+        """
+        return self._childAttr(attr)
+    #---
 
 
     def parse(self, tokens):
@@ -311,6 +349,12 @@ class ROUTE(parsenode.ParseNode):
             self._addRawSegment(self.action)     # Make sure we have the string segment stored
             tokens.remove(tokens[0])
 
+        # Settle what 'default' means before NODE_SPEC sees it
+        if self.family is not None:
+            position = 1 if tokens and tokens[0] in NODE_SPEC.types else 0
+            if position < len(tokens) and tokens[position] == 'default':
+                tokens[position] = prefix_utils.DEFAULT_PREFIXES[self.family]
+
         return tokens
     #---
 #---
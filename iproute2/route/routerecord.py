@@ -0,0 +1,353 @@
+# coding=utf-8
+#
+# NAME:         routerecord.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   A table-driven alternative to the ROUTE grammar tree.  Each route is parsed in a single pass over its tokens,
+# using a keyword map built from the grammar classes, into one flat RouteRecord.  Records answer the same attribute
+# names as routegrammar.ROUTE (and the same ['NODE_SPEC'] / ['INFO_SPEC']['NH'] style access), so either can be
+# handed to a RoutingTable.
+#
+
+from iproute2.utils import prefix
+from iproute2.route import multipath
+from iproute2.route import routegrammar
+
+# Fields held by each segment of the grammar, in the order iproute2 prints them
+SEGMENT_FIELDS = {
+    'ROUTE': ('action',),
+    'NODE_SPEC': ('TYPE', 'PREFIX') + routegrammar.NODE_SPEC.options,
+    'INFO_SPEC': ('nexthop',),
+    'NH': routegrammar.NH.options + ('NHFLAGS',),
+    'OPTIONS': routegrammar.OPTIONS.options,
+}
+SEGMENT_CHILDREN = {
+    'ROUTE': ('NODE_SPEC', 'INFO_SPEC'),
+    'INFO_SPEC': ('NH', 'OPTIONS'),
+}
+
+# keyword -> (segment, field) for every keyword which takes a parameter
+KEYWORDS = {}
+for _segment in (routegrammar.NODE_SPEC, routegrammar.NH, routegrammar.OPTIONS):
+    for _option in _segment.options:
+        KEYWORDS[_option] = (_segment.__name__, _option)
+
+ACTIONS = frozenset(routegrammar.ROUTE.actions)
+TYPES = frozenset(routegrammar.NODE_SPEC.types)
+NHFLAGS = frozenset(routegrammar.NH.flags)
+
+
+def _segment_fields(segment):
+    """
+    Returns every field reachable from a segment, including those of its child segments.
+
+    """
+    fields = SEGMENT_FIELDS[segment]
+    for child in SEGMENT_CHILDREN.get(segment, ()):
+        fields += _segment_fields(child)
+    return fields
+#---
+
+
+def _print_order(fields):
+    """
+    Reorders fields the way iproute2 prints them, which is grammar order except that a multipath route's 'nexthop'
+    sections come last, after the options.  'ip route' doesn't read them back anywhere else.
+
+    """
+    if 'nexthop' not in fields:
+        return fields
+    return tuple(field for field in fields if field != 'nexthop') + ('nexthop',)
+#---
+
+
+SEGMENT_ALL_FIELDS = {segment: _segment_fields(segment) for segment in SEGMENT_FIELDS}
+SEGMENT_PRINT_FIELDS = {segment: _print_order(fields) for segment, fields in SEGMENT_ALL_FIELDS.items()}
+
+# Fields of a whole route, in grammar order, and in print order
+FIELDS = SEGMENT_ALL_FIELDS['ROUTE']
+PRINT_FIELDS = SEGMENT_PRINT_FIELDS['ROUTE']
+ALL_FIELDS = frozenset(FIELDS)
+
+# The OPTIONS fields are rarely set, so rather than a slot each they share one slot holding (keyword, value) pairs
+OPTION_FIELDS = frozenset(routegrammar.OPTIONS.options)
+SLOT_FIELDS = tuple(field for field in FIELDS if field not in OPTION_FIELDS)
+
+# 'ip -json route' key -> field, for the keys holding a single value
+JSON_FIELDS = {'type': 'TYPE', 'tos': 'tos', 'table': 'table', 'protocol': 'proto', 'scope': 'scope',
+               'metric': 'metric', 'gateway': 'via', 'dev': 'dev', 'weight': 'weight'}
+# Metrics 'ip route' prints with a unit which 'ip -json route' leaves off
+JSON_MILLISECONDS = frozenset(('rtt', 'rttvar', 'rto_min'))
+
+# Pool of shared values.  dev, proto, scope, via, metric and whole option sets repeat across most routes of a table,
+# so each distinct value is only kept once.  Bounded by SHARED_VALUES_LIMIT (see func:value_pool).
+SHARED_VALUES_LIMIT = 65536
+shared_values = {}
+
+
+def value_pool():
+    """
+    Fetches the pool of shared values, emptying it first when it has reached SHARED_VALUES_LIMIT values, so that a
+    long running process doesn't hold on to every value of every table it has ever parsed.  Routes keep the values
+    they were given; they just stop being shared with the routes parsed after the pool was emptied.
+
+    :returns: the pool's setdefault method - share(value, value) returns the pooled copy of value
+    """
+    if len(shared_values) >= SHARED_VALUES_LIMIT:
+        shared_values.clear()
+    return shared_values.setdefault
+#---
+
+
+# -------- RouteSegment --------
+
+class RouteSegment(object):
+    """
+    A view of one grammar segment of a RouteRecord, standing in for the ParseNode children of a ROUTE.
+
+    """
+    __slots__ = ('record', 'name', 'fields')
+
+    def __init__(self, record, name):
+        self.record = record
+        self.name = name
+        self.fields = SEGMENT_PRINT_FIELDS[name]
+    #---
+
+
+    def __getattr__(self, attr):
+        if attr in self.fields:
+            return getattr(self.record, attr)
+        raise AttributeError(attr)
+    #---
+
+
+    def __getitem__(self, item):
+        if item in SEGMENT_CHILDREN.get(self.name, ()):
+            return RouteSegment(self.record, item)
+        return getattr(self, item)
+    #---
+
+
+    def __str__(self):
+        return self.record.format(self.fields)
+    #---
+#---
+
+
+# -------- RouteRecord --------
+
+class RouteRecord(object):
+    """
+    A parsed route, flattened into a single object.  Fields which weren't present in the route read as None.
+    'network' holds the integer form of PREFIX (see utils.prefix.parse_prefix) and 'option_values' the OPTIONS
+    fields which were present, as a tuple of (keyword, value) pairs ('options' is the grammar's keyword list on ROUTE,
+    so it isn't reused here).
+
+    """
+    __slots__ = SLOT_FIELDS + ('network', 'option_values')
+
+    def __init__(self):
+        # Every slot starts out as None, so that reading an absent field is a plain slot lookup rather than a trip
+        # through __getattr__ (route_key, diffs and lookups read the absent fields of most routes)
+        self.action = self.TYPE = self.PREFIX = self.network = self.option_values = None
+        self.tos = self.table = self.proto = self.scope = self.metric = None
+        self.nexthop = self.via = self.dev = self.weight = self.NHFLAGS = None
+    #---
+
+
+    def __getattr__(self, attr):
+        # Only reached for OPTIONS fields (and any slot __init__ doesn't know about)
+        if attr in OPTION_FIELDS:
+            for keyword, value in self.option_values or ():
+                if keyword == attr:
+                    return value
+            return None
+        if attr in ALL_FIELDS or attr == 'network' or attr == 'option_values':
+            return None
+        raise AttributeError(attr)
+    #---
+
+
+    def __getitem__(self, item):
+        """
+        Getter for dictionary style operation.  Supports the grammar's segment names as well as field names.
+
+        """
+        if item in SEGMENT_CHILDREN['ROUTE'] or item in SEGMENT_CHILDREN['INFO_SPEC']:
+            return RouteSegment(self, item)
+        if item in ALL_FIELDS:
+            return getattr(self, item)
+        raise KeyError(item)
+    #---
+
+
+    def __str__(self):
+        return self.format(PRINT_FIELDS)
+    #---
+
+
+    def format(self, fields):
+        """
+        Rebuilds the text of the given fields, in the order given (see PRINT_FIELDS).
+
+        """
+        text = []
+        for field in fields:
+            value = getattr(self, field)
+            if value is None:
+                continue
+            if field in KEYWORDS:
+                text.append(field)
+            text.append(value if field != 'nexthop' else str(value))
+        return ' '.join(text)
+    #---
+#---
+
+
+def parse_route(tokens, family=None):
+    """
+    Parses one tokenized route in a single pass.  A drop-in replacement for routegrammar.ROUTE(tokens) which doesn't
+    consume the tokens it's given.
+
+    :param tokens: list of str tokens from a single line of 'ip route' output (with a multipath route's nexthop
+                   lines joined on)
+    :param family: Address family the route was listed for (4 or 6), which 'default' depends on; None works it out
+                   from the route (see utils.prefix.tokens_family)
+    :returns: class:RouteRecord
+    """
+    record = RouteRecord()
+    share = value_pool()
+    line = tokens
+    if 'nexthop' in tokens:
+        tokens, record.nexthop = multipath.split_nexthops(tokens)
+    position = 0
+    count = len(tokens)
+
+    if tokens[position] in ACTIONS:
+        record.action = share(tokens[position], tokens[position])
+        position += 1
+    if tokens[position] in TYPES:
+        record.TYPE = share(tokens[position], tokens[position])
+        position += 1
+
+    if tokens[position] == 'default':
+        record.PREFIX = prefix.DEFAULT_PREFIXES[prefix.tokens_family(line, family)]
+    else:
+        record.PREFIX = tokens[position]
+    try:
+        record.network = prefix.normalize_prefix(record.PREFIX)
+    except prefix.PrefixError as err:
+        raise routegrammar.NODE_SPEC_Error("Prefix (%s) did not pass validation: %s" % (record.PREFIX, err))
+    position += 1
+
+    keywords = KEYWORDS
+    options = None
+    while position < count:
+        token = tokens[position]
+        if token in keywords and position + 1 < count:
+            value = share(tokens[position + 1], tokens[position + 1])
+            if token in OPTION_FIELDS:
+                if options is None:
+                    options = []
+                options.append((token, value))
+            else:
+                setattr(record, token, value)
+            position += 2
+            continue
+        if token in NHFLAGS:
+            record.NHFLAGS = share(token, token)
+        position += 1
+
+    if options:
+        options = tuple(options)
+        record.option_values = share(options, options)
+
+    return record
+#---
+
+
+def json_family(route):
+    """
+    Works out the address family of a route decoded from 'ip -json route', the same way utils.prefix.tokens_family
+    does for text: from its gateway or source address, or the IPv6-only 'pref' key.
+
+    :returns: int - 4 or 6; 4 when nothing in the route tells
+    """
+    if 'pref' in route:
+        return prefix.IP_V6
+    address = route.get('gateway') or route.get('prefsrc')
+    if address is None and route.get('nexthops'):
+        address = route['nexthops'][0].get('gateway')
+    return prefix.IP_V6 if address is not None and ':' in address else prefix.IP_V4
+#---
+
+
+def parse_json_route(route, family=None):
+    """
+    Converts one route from the output of 'ip -json route' straight into a RouteRecord, without going through text
+    tokens.  The nexthops of multipath routes become a route.multipath.NexthopGroup.
+
+    :param route: dict decoded from the JSON array 'ip -json route' prints
+    :param family: Address family the route was listed for (4 or 6), which 'default' depends on; None works it out
+                   from the route (see func:json_family)
+    :returns: class:RouteRecord
+    """
+    record = RouteRecord()
+    share = value_pool()
+
+    destination = route.get('dst', 'default')
+    if destination == 'default':
+        destination = prefix.DEFAULT_PREFIXES[family or json_family(route)]
+    record.PREFIX = destination
+    try:
+        record.network = prefix.normalize_prefix(destination)
+    except prefix.PrefixError as err:
+        raise routegrammar.NODE_SPEC_Error("Prefix (%s) did not pass validation: %s" % (destination, err))
+
+    options = None
+    for key, value in route.items():
+        if key in JSON_FIELDS:
+            value = str(value)
+            setattr(record, JSON_FIELDS[key], share(value, value))
+        elif key == 'flags':
+            for flag in value:
+                if flag in NHFLAGS:
+                    record.NHFLAGS = share(flag, flag)
+        elif key == 'prefsrc':
+            options = options or []
+            options.append(('src', share(value, value)))
+        elif key == 'metrics':
+            options = options or []
+            for metrics in value:
+                for name, metric in metrics.items():
+                    if name in OPTION_FIELDS:
+                        metric = '{}ms'.format(metric) if name in JSON_MILLISECONDS else str(metric)
+                        options.append((name, share(metric, metric)))
+        elif key == 'nexthops' and value:
+            record.nexthop = multipath.make_group(
+                {'via': nexthop.get('gateway'), 'dev': nexthop.get('dev'), 'weight': nexthop.get('weight'),
+                 'flags': [flag for flag in nexthop.get('flags', ()) if flag in multipath.NEXTHOP_FLAGS]}
+                for nexthop in value)
+
+    if options:
+        options = tuple(options)
+        record.option_values = share(options, options)
+
+    return record
+#---
@@ -0,0 +1,206 @@
+# coding=utf-8
+#
+# NAME:         routewriter.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Writes routes back out as 'ip route' lines, or as 'ip -batch' scripts of 'route replace' / 'route del'
+# commands, straight from the route objects.
+#
+#   Apart from its prefix, a route's text is made of values repeated across most of a table (type, protocol, next
+# hop, device, option sets).  The text around the prefix is therefore built once per distinct combination of those
+# values and reused, so writing a RouteRecord costs one tuple of attribute reads, one dictionary lookup and one string
+# concatenation.  Grammar routes (routegrammar.ROUTE) are written with their own str().  Lines are written in chunks.
+#
+
+from operator import attrgetter
+
+from iproute2.route import routegrammar
+from iproute2.route import routerecord
+
+# Fields printed before and after the prefix, in print order (a multipath route's nexthops last).  The action ('add',
+# 'del', ...) of routes read from 'ip monitor' is left out; batch scripts supply their own.
+HEAD_FIELDS = ('TYPE',)
+TAIL_FIELDS = routerecord.PRINT_FIELDS[routerecord.PRINT_FIELDS.index('PREFIX') + 1:]
+# Fields identifying a route to 'ip route del'
+DELETE_FIELDS = ('tos', 'table', 'metric')
+
+CHUNK_SIZE = 65536      # Lines written at a time
+
+# RouteRecords keep their OPTIONS fields together as one tuple, which makes for a much cheaper cache key
+TAIL_SLOT_FIELDS = tuple(field for field in TAIL_FIELDS if field not in routerecord.OPTION_FIELDS)
+_record_key = attrgetter(*(HEAD_FIELDS + TAIL_SLOT_FIELDS + ('option_values',)))
+_delete_values = attrgetter(*(HEAD_FIELDS + DELETE_FIELDS))
+
+
+def _format(fields, values):
+    """
+    Text of field values, as RouteRecord.format prints them.
+
+    """
+    text = []
+    for field, value in zip(fields, values):
+        if value is None:
+            continue
+        if field in routerecord.KEYWORDS:
+            text.append(field)
+        text.append(str(value))
+    return ' '.join(text)
+#---
+
+
+def _affixes(fields, values):
+    """
+    The text printed before and after the prefix, spaces included.
+
+    :param fields: Fields following the prefix
+    :param values: Values of HEAD_FIELDS and then fields
+    :returns: tuple of str - (head, tail)
+    """
+    head = _format(HEAD_FIELDS, values[:len(HEAD_FIELDS)])
+    tail = _format(fields, values[len(HEAD_FIELDS):])
+    return (head + ' ' if head else ''), (' ' + tail if tail else '')
+#---
+
+
+def _record_affixes(key):
+    """
+    meth:_affixes from a RouteRecord's _record_key, without going through its attributes.
+
+    """
+    head = len(HEAD_FIELDS)
+    values = dict(zip(TAIL_SLOT_FIELDS, key[head:-1]))
+    for keyword, value in key[-1] or ():
+        values.setdefault(keyword, value)       # The first of a repeated option is the one a record reads back
+    return _affixes(TAIL_FIELDS, key[:head] + tuple(values.get(field) for field in TAIL_FIELDS))
+#---
+
+
+def route_lines(routes, command=''):
+    """
+    Formats routes as 'ip route' lines: the text of str(route), less any action.
+
+    :param routes: Iterable of route objects
+    :param command: Text to start each line with ('route replace ' for a batch script)
+    :returns: generator of str, without line endings
+    """
+    affixes = {}
+    record_type = routerecord.RouteRecord
+    record_key = _record_key
+    actions = routegrammar.ROUTE.actions
+
+    for route in routes:
+        if type(route) is record_type:
+            key = record_key(route)
+            found = affixes.get(key)
+            if found is None:
+                found = affixes[key] = _record_affixes(key)
+            yield command + found[0] + route.PREFIX + found[1]
+        else:
+            # Reading a grammar route's fields one by one costs more than its own str()
+            line = str(route)
+            action, _, rest = line.partition(' ')
+            yield command + (rest if action in actions else line)
+#---
+
+
+def delete_lines(routes, command='route del '):
+    """
+    Formats the commands deleting routes: their type, prefix, tos, table and metric, which is what the kernel
+    matches a deletion on.
+
+    :param routes: Iterable of route objects
+    :returns: generator of str, without line endings
+    """
+    affixes = {}
+    delete_values = _delete_values
+    for route in routes:
+        key = delete_values(route)
+        found = affixes.get(key)
+        if found is None:
+            found = affixes[key] = _affixes(DELETE_FIELDS, key)
+        yield command + found[0] + route.PREFIX + found[1]
+#---
+
+
+class RouteWriter(object):
+    """
+    Writes lines to a file object (anything with a write method), a chunk at a time.
+
+    """
+    def __init__(self, output, chunk_size=CHUNK_SIZE):
+        """
+        Constructor
+
+        :param output: File object to write to
+        :param chunk_size: Lines gathered before each write
+
+        """
+        self.output = output
+        self.chunk_size = chunk_size
+        self.lines = 0          # Lines written so far
+    #---
+
+
+    def write_lines(self, lines):
+        """
+        Writes lines, adding the line endings.
+
+        :param lines: Iterable of str
+        :returns: int - number of lines written
+        """
+        written = 0
+        chunk = []
+        append = chunk.append
+        size = self.chunk_size
+        for line in lines:
+            append(line)
+            if len(chunk) >= size:
+                self.output.write('\n'.join(chunk) + '\n')
+                written += len(chunk)
+                del chunk[:]
+        if chunk:
+            self.output.write('\n'.join(chunk) + '\n')
+            written += len(chunk)
+
+        self.lines += written
+        return written
+    #---
+
+
+    def write_routes(self, routes):
+        """
+        Writes routes as 'ip route' lines, which 'ip route restore'-style tooling or 'ip route add' will take back.
+
+        :param routes: Iterable of route objects
+        :returns: int - number of routes written
+        """
+        return self.write_lines(route_lines(routes))
+    #---
+
+
+    def write_batch(self, replace=(), delete=()):
+        """
+        Writes an 'ip -batch' script: the deletions first, then a 'route replace' for each route to install.
+
+        :param replace: Iterable of route objects to add or update
+        :param delete: Iterable of route objects to remove
+        :returns: int - number of commands written
+        """
+        return self.write_lines(delete_lines(delete)) + self.write_lines(route_lines(replace, 'route replace '))
+    #---
+#---
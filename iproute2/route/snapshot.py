@@ -0,0 +1,379 @@
+# coding=utf-8
+#
+# NAME:         snapshot.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   A compact binary snapshot of a parsed routing table, laid out so it can be memory-mapped and queried in place.
+# Opening a snapshot only reads its header; lookups binary search the flattened address intervals (see
+# intervals.IntervalTable) directly in the mapped file and decode just the route they land on.  Processes mapping
+# the same snapshot share its pages.
+#
+#   Layout (little endian unless noted, every section starting on an 8 byte boundary):
+#
+#       header          HEADER
+#       string index    (string count + 1) x uint32 offsets into the string data
+#       string data     UTF-8 text of every distinct field value
+#       routes          route count x ROUTE: family, prefix length, network (16 bytes, big endian) and one string
+#                       number per STORED_FIELDS entry (NO_STRING when absent)
+#       per family      interval starts (big endian, 4 or 16 bytes each, so they sort as bytes) followed by the
+#                       int32 route number each interval resolves to (-1 where no route matches)
+#
+
+import mmap
+import os
+import struct
+from bisect import bisect_right
+
+from iproute2.utils import prefix
+from iproute2.route import intervals
+from iproute2.route import multipath
+from iproute2.route import routerecord
+
+MAGIC = b'IPR2SNAP'
+VERSION = 1
+
+# Fields stored for each route.  option_values is stored as the text of its keyword/value pairs, and a multipath
+# route's nexthop group as its 'nexthop ...' text.
+STORED_FIELDS = routerecord.SLOT_FIELDS + ('option_values',)
+NO_STRING = 0xffffffff
+
+# magic, version, route count, string count, IPv4 interval count, IPv6 interval count, then section offsets: string
+# index, string data, routes, IPv4 starts, IPv4 routes, IPv6 starts, IPv6 routes
+HEADER = struct.Struct('<8sIIIII4x7Q')
+ROUTE = struct.Struct('<BB2x16s{}I'.format(len(STORED_FIELDS)))
+ROUTE_NUMBER = struct.Struct('<i')
+
+FAMILIES = (prefix.IP_V4, prefix.IP_V6)
+KEY_WIDTH = {prefix.IP_V4: 4, prefix.IP_V6: 16}
+
+
+# Exceptions
+class SnapshotError(Exception):
+    pass
+
+
+def _pack_address(family, value):
+    """
+    Packs an integer address big endian, so packed addresses of one family sort the same way as the integers.
+
+    """
+    if family == prefix.IP_V4:
+        return struct.pack('>I', value)
+    return struct.pack('>QQ', value >> 64, value & 0xffffffffffffffff)
+#---
+
+
+def _unpack_address(data):
+    if len(data) == 4:
+        return struct.unpack('>I', data)[0]
+    high, low = struct.unpack('>QQ', data)
+    return (high << 64) | low
+#---
+
+
+def _align(position):
+    return (position + 7) & ~7
+#---
+
+
+def _options_text(route):
+    """
+    The OPTIONS fields of a route as 'keyword value ...' text, or None if it has none.
+
+    """
+    options = getattr(route, 'option_values', None)
+    if options is None and not isinstance(route, routerecord.RouteRecord):
+        options = [(field, getattr(route, field, None)) for field in routerecord.SEGMENT_FIELDS['OPTIONS']]
+    words = []
+    for keyword, value in options or ():
+        if value is not None:
+            words.extend((keyword, str(value)))
+    return ' '.join(words) if words else None
+#---
+
+
+def write_snapshot(routes, tree_index, path):
+    """
+    Writes a snapshot.  The file is written beside path and renamed into place, so readers never see half of one.
+
+    :param routes: Every route of the table, in address order (RoutingTable.routes())
+    :param tree_index: dict of family -> radix.RadixTree (RoutingTable.index)
+    :param path: File to write
+    """
+    strings = []
+    string_numbers = {}
+
+    def number(value):
+        if value is None:
+            return NO_STRING
+        value = str(value)
+        if value not in string_numbers:
+            string_numbers[value] = len(strings)
+            strings.append(value)
+        return string_numbers[value]
+
+    route_numbers = {}
+    packed_routes = []
+    for route in routes:
+        if route.network is None:
+            continue
+        family, network, length = route.network
+        values = [number(getattr(route, field)) for field in STORED_FIELDS[:-1]] + [number(_options_text(route))]
+        route_numbers[id(route)] = len(packed_routes)
+        packed_routes.append(ROUTE.pack(family, length, _pack_address(prefix.IP_V6, network), *values))
+
+    encoded = [text.encode('utf-8') for text in strings]
+    string_offsets = [0]
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data))
+
+    family_intervals = {}
+    for family in FAMILIES:
+        table = intervals.IntervalTable(tree_index[family])
+        # A prefix reaching the top of the address space ends with an interval starting just past it
+        count = bisect_right(table.starts, (1 << prefix.FAMILY_BITS[family]) - 1)
+        family_intervals[family] = (b''.join(_pack_address(family, start) for start in table.starts[:count]),
+                                    b''.join(ROUTE_NUMBER.pack(-1 if route is None else route_numbers[id(route)])
+                                             for route in table.values[:count]),
+                                    count)
+
+    sections = [struct.pack('<{}I'.format(len(string_offsets)), *string_offsets), b''.join(encoded),
+                b''.join(packed_routes)]
+    for family in FAMILIES:
+        sections.extend(family_intervals[family][:2])
+
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        position = _align(position)
+        offsets.append(position)
+        position += len(section)
+
+    header = HEADER.pack(MAGIC, VERSION, len(packed_routes), len(strings), family_intervals[prefix.IP_V4][2],
+                         family_intervals[prefix.IP_V6][2], *offsets)
+
+    temporary = '{}.tmp{}'.format(path, os.getpid())
+    try:
+        with open(temporary, 'wb') as snapshot_file:
+            snapshot_file.write(header)
+            for offset, section in zip(offsets, sections):
+                snapshot_file.write(b'\0' * (offset - snapshot_file.tell()))
+                snapshot_file.write(section)
+        os.rename(temporary, path)
+    except Exception:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+#---
+
+
+class _Keys(object):
+    """
+    The packed interval starts of one family, as a sequence bisect can search without unpacking them all.
+
+    """
+    def __init__(self, data, offset, count, width):
+        self.data = data
+        self.offset = offset
+        self.count = count
+        self.width = width
+    #---
+
+
+    def __len__(self):
+        return self.count
+    #---
+
+
+    def __getitem__(self, item):
+        start = self.offset + item * self.width
+        return self.data[start:start + self.width]
+    #---
+#---
+
+
+def _invalid_route(err):
+    """
+    The error RoutingTable.lookup raises for an invalid address.  routingtable imports this module, so it's only
+    imported here once an error has to be raised.
+
+    """
+    from iproute2 import routingtable
+    return routingtable.InvalidRouteError(str(err))
+#---
+
+
+class RouteSnapshot(object):
+    """
+    A memory-mapped snapshot, answering the same queries as a loaded RoutingTable (lookup, lookup_many, routes) by
+    reading the mapped file.  Routes come back as routerecord.RouteRecords.
+
+    """
+    def __init__(self, path):
+        """
+        Constructor.  Maps the file and reads its header.
+
+        :param path: Snapshot written by func:write_snapshot
+        :raises: SnapshotError if the file isn't a snapshot this version understands
+        """
+        with open(path, 'rb') as snapshot_file:
+            if os.fstat(snapshot_file.fileno()).st_size < HEADER.size:
+                raise SnapshotError('Not a routing table snapshot: {}'.format(path))
+            self.data = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = HEADER.unpack_from(self.data, 0)
+        if header[0] != MAGIC:
+            self.data.close()
+            raise SnapshotError('Not a routing table snapshot: {}'.format(path))
+        if header[1] != VERSION:
+            self.data.close()
+            raise SnapshotError('Unsupported snapshot version {}: {}'.format(header[1], path))
+
+        (_, _, self.route_count, self.string_count, v4_count, v6_count, self._string_index, self._string_data,
+         self._routes, v4_keys, v4_routes, v6_keys, v6_routes) = header
+
+        self._keys = {prefix.IP_V4: _Keys(self.data, v4_keys, v4_count, KEY_WIDTH[prefix.IP_V4]),
+                      prefix.IP_V6: _Keys(self.data, v6_keys, v6_count, KEY_WIDTH[prefix.IP_V6])}
+        self._route_numbers = {prefix.IP_V4: v4_routes, prefix.IP_V6: v6_routes}
+        self._strings = {}      # string number -> decoded str, filled in as routes are read
+    #---
+
+
+    def __len__(self):
+        return self.route_count
+    #---
+
+
+    def close(self):
+        self.data.close()
+    #---
+
+
+    def __enter__(self):
+        return self
+    #---
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+    #---
+
+
+    def _string(self, number):
+        if number == NO_STRING:
+            return None
+        text = self._strings.get(number)
+        if text is None:
+            start, end = struct.unpack_from('<II', self.data, self._string_index + number * 4)
+            text = self.data[self._string_data + start:self._string_data + end].decode('utf-8')
+            text = self._strings[number] = routerecord.value_pool()(text, text)
+        return text
+    #---
+
+
+    def route(self, number):
+        """
+        Decodes one route.
+
+        :param number: Route number, 0 to len(snapshot) - 1 (routes are stored in address order)
+        :returns: class:routerecord.RouteRecord
+        """
+        if not 0 <= number < self.route_count:
+            raise IndexError(number)
+        values = ROUTE.unpack_from(self.data, self._routes + number * ROUTE.size)
+        family, length, network = values[:3]
+
+        record = routerecord.RouteRecord()
+        record.network = (family, _unpack_address(network[-KEY_WIDTH[family]:]), length)
+        string = self._string
+        for field, value in zip(STORED_FIELDS[:-1], values[3:-1]):
+            if value != NO_STRING:
+                setattr(record, field, string(value))
+        if record.nexthop is not None:
+            record.nexthop = multipath.split_nexthops(record.nexthop.split())[1]
+
+        options = string(values[-1])
+        if options is not None:
+            words = options.split()
+            options = tuple(zip(words[::2], words[1::2]))
+            record.option_values = routerecord.value_pool()(options, options)
+        return record
+    #---
+
+
+    def routes(self):
+        """
+        Iterates over every route, in address order.
+
+        :returns: generator of class:routerecord.RouteRecord
+        """
+        for number in range(self.route_count):
+            yield self.route(number)
+    #---
+
+
+    def _find(self, family, value):
+        """
+        Finds the number of the route an integer address resolves to, or -1.
+
+        """
+        position = bisect_right(self._keys[family], _pack_address(family, value)) - 1
+        if position < 0:
+            return -1
+        return ROUTE_NUMBER.unpack_from(self.data, self._route_numbers[family] + position * ROUTE_NUMBER.size)[0]
+    #---
+
+
+    def lookup(self, address):
+        """
+        Finds the route a packet to the address would take (see RoutingTable.lookup).
+
+        :param address: IPv4 or IPv6 address
+        :returns: class:routerecord.RouteRecord, or None if no route matches
+        :raises: routingtable.InvalidRouteError if the address isn't valid
+        """
+        try:
+            number = self._find(*prefix.parse_address(address))
+        except prefix.PrefixError as err:
+            raise _invalid_route(err)
+        return None if number < 0 else self.route(number)
+    #---
+
+
+    def lookup_many(self, addresses):
+        """
+        Resolves a batch of addresses (see RoutingTable.lookup_many).  Each route hit is only decoded once.
+
+        :returns: list of (via, dev) tuples in the same order as the addresses, None where no route matches
+        :raises: routingtable.InvalidRouteError if any of the addresses isn't valid
+        """
+        nexthops = {-1: None}
+        results = []
+        parse_address = prefix.parse_address
+        for address in addresses:
+            try:
+                number = self._find(*parse_address(address))
+            except prefix.PrefixError as err:
+                raise _invalid_route(err)
+            if number not in nexthops:
+                route = self.route(number)
+                nexthops[number] = (route.via, route.dev)
+            results.append(nexthops[number])
+        return results
+    #---
+#---
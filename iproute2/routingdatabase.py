@@ -0,0 +1,257 @@
+# coding=utf-8
+#
+# NAME:         routingdatabase.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Defines the routing policy database: every routing table on the host, loaded from a single 'ip route show table
+# all' dump, along with the 'ip rule' list which decides which table a packet is looked up in.
+#
+
+from iproute2.routingtable import RoutingTable, RoutingTableError
+from iproute2.utils import cmd
+from iproute2.utils import netlink
+from iproute2.utils import prefix
+from iproute2.route import policyrule
+from iproute2.route import routegrammar
+
+# The rules the kernel starts out with, used until a rule list is loaded
+DEFAULT_RULES = ('0: from all lookup local', '32766: from all lookup main', '32767: from all lookup default')
+
+
+def table_name(table):
+    """
+    Normalizes a table id into the name iproute2 prints for it ('main' for None or 254, '100' for 100).
+
+    :param table: Table name or number (str or int), or None for the main table
+    :returns: str
+    """
+    if table is None:
+        return 'main'
+    table = str(table)
+    if table.isdigit():
+        return netlink.ROUTE_TABLES.get(int(table), table)
+    return table
+#---
+
+
+class RoutingDatabase(object):
+    """
+    Every routing table of one address family, plus the policy rules.
+
+    """
+    def __init__(self, family=4, parser=None):
+        """
+        Constructor
+
+        :param family: 4 or 6
+        :param parser: Callable turning a list of tokens into a route object (see RoutingTable)
+
+        """
+        self.family = family
+        self.parser = parser or routegrammar.ROUTE
+        self.tables = {}            # table name -> RoutingTable
+        self.routes_by_key = {}     # (table name, network, metric, tos) -> route object
+        self.rules = [policyrule.parse_rule(rule.split()) for rule in DEFAULT_RULES]
+    #---
+
+
+    def __getitem__(self, table):
+        """
+        Getter for dictionary style operation.  Operates off table names or numbers.
+
+        :returns: class:RoutingTable
+        """
+        return self.tables[table_name(table)]
+    #---
+
+
+    def __contains__(self, table):
+        return table_name(table) in self.tables
+    #---
+
+
+    def __len__(self):
+        return len(self.routes_by_key)
+    #---
+
+
+    def load(self, routes_txt=None, rules_txt=None):
+        """
+        Loads every routing table and the rule list.  Without text, the system's tables are read in one dump ('ip
+        route show table all') and its rules from 'ip rule'.
+
+        :param routes_txt: Text output from 'ip route show table all'
+        :type routes_txt: str
+        :param rules_txt: Text output from 'ip rule'
+        :type rules_txt: str
+
+        """
+        lines = routes_txt.splitlines() if routes_txt else cmd.stream_routes('all', self.family)
+        parser = self.parser
+        family = self.family
+        self.build(parser(tokens, family=family) for tokens in RoutingTable.tokenize_stream(lines))
+
+        rules = [line.split() for line in rules_txt.splitlines()] if rules_txt else cmd.rules(self.family)
+        self.load_rules(rules)
+    #---
+
+
+    def load_rules(self, rules):
+        """
+        Replaces the rule list.
+
+        :param rules: Iterable of tokenized 'ip rule' lines
+        """
+        rules = [policyrule.parse_rule(tokens) for tokens in rules if tokens]
+        # Rules sharing a priority keep the order they were listed in
+        self.rules = sorted(rules, key=lambda rule: rule.priority)
+    #---
+
+
+    def build(self, routes):
+        """
+        Sorts route objects into their tables and indexes them.
+
+        :param routes: Iterable of route objects
+        """
+        by_table = {}
+        routes_by_key = self.routes_by_key = {}
+
+        for route in routes:
+            name = table_name(route.table)
+            by_table.setdefault(name, []).append(route)
+            routes_by_key[self.route_key(route, name)] = route
+
+        self.tables = {}
+        for name, table_routes in by_table.items():
+            table = self.tables[name] = RoutingTable(description=name, parser=self.parser, family=self.family)
+            table.build(table_routes)
+    #---
+
+
+    @staticmethod
+    def route_key(route, name=None):
+        """
+        Identifies a route within the database: its table, prefix, metric and tos.
+
+        :param name: The route's table name, when already known
+        """
+        network = route.network if route.network is not None else str(route.PREFIX)
+        return (name or table_name(route.table)), network, int(route.metric or 0), route.tos
+    #---
+
+
+    def get(self, route_prefix, table='main', metric=0, tos=None):
+        """
+        Fetches the route with exactly this table, prefix, metric and tos.
+
+        :param route_prefix: Prefix as printed by 'ip route' ('10.0.0.0/8', 'default')
+        :param table: Table name or number
+        :returns: route object, or None if there's no such route
+        """
+        try:
+            network = prefix.normalize_prefix(route_prefix, self.family)
+        except prefix.PrefixError:
+            network = route_prefix
+        return self.routes_by_key.get((table_name(table), network, int(metric or 0), tos))
+    #---
+
+
+    def lookup(self, address, table='main'):
+        """
+        Finds the route a packet to the address would take in one table (see RoutingTable.lookup), ignoring the rules.
+
+        :param address: IPv4 or IPv6 address
+        :param table: Table name or number
+        :returns: route object, or None if the table holds no matching route (or doesn't exist)
+        """
+        name = table_name(table)
+        if name not in self.tables:
+            return None
+        return self.tables[name].lookup(address)
+    #---
+
+
+    def resolve(self, destination, source=None, iif=None, oif=None, fwmark=0, tos=None):
+        """
+        Finds the route a packet would take, working through the rules in priority order the way the kernel does.  A
+        lookup which finds no route, finds a 'throw' route or is suppressed (suppress_prefixlength) moves on to the
+        next rule, as does a goto whose target rule doesn't exist.
+
+        :param destination: Destination address of the packet
+        :param source: Source address of the packet, if known
+        :param iif: Interface the packet arrived on ('lo' for locally generated packets)
+        :param oif: Interface the packet is bound to leave by
+        :param fwmark: Firewall mark of the packet
+        :param tos: Type of service of the packet, as iproute2 prints it ('0x10')
+        :returns: tuple - (class:route.policyrule.PolicyRule, route object) for the deciding rule; the route is None
+                  when the rule itself rejects the packet.  None if nothing matches.
+        """
+        try:
+            destination_value = prefix.parse_address(destination)
+            source_value = prefix.parse_address(source) if source else None
+        except prefix.PrefixError as err:
+            raise RoutingTableError(str(err))
+
+        rules = self.rules
+        position = 0
+        while position < len(rules):
+            rule = rules[position]
+            position += 1
+
+            # Rules bound to a VRF device's table can't be resolved without knowing the packet's VRF
+            if rule.l3mdev or not rule.matches(destination_value, source_value, iif, oif, fwmark, tos):
+                continue
+
+            if rule.action in policyrule.REJECT_ACTIONS:
+                return rule, None
+            if rule.action == 'goto':
+                position = self._gotoTarget(rule, position)
+                continue
+            if rule.action != 'lookup':
+                continue
+
+            route = self.lookup(destination, rule.table)
+            if route is None or route.TYPE == 'throw':
+                continue
+            if (rule.suppress_prefixlength is not None and route.network is not None and
+                    route.network[2] <= rule.suppress_prefixlength):
+                continue
+            return rule, route
+
+        return None
+    #---
+
+
+    def _gotoTarget(self, rule, position):
+        """
+        Finds where a 'goto' rule carries on from.  The kernel jumps to the first rule with exactly the target priority,
+        which always lies further down since it rejects backward jumps.  A goto without such a rule ('[unresolved]' in
+        'ip rule' output) does nothing, and the search carries on with the next rule.
+
+        :param rule: The goto class:route.policyrule.PolicyRule
+        :param position: Index of the rule following the goto
+        :returns: int - index of the next rule to consider
+        """
+        rules = self.rules
+        for target in range(position, len(rules)):
+            if rules[target].priority == rule.goto:
+                return target
+        return position
+    #---
+#---
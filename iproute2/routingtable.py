@@ -22,8 +22,20 @@
 #   Defines a routing table.
 #
 
+import logging
+
 from iproute2.utils import cmd
+from iproute2.utils import prefix
+from iproute2.route import aggregate
+from iproute2.route import coverage
+from iproute2.route import intervals
+from iproute2.route import lookupcache
+from iproute2.route import radix
+from iproute2.route import routediff
 from iproute2.route import routegrammar
+from iproute2.route import routerecord
+from iproute2.route import routewriter
+from iproute2.route import snapshot
 
 
 # Exceptions
@@ -39,15 +51,29 @@ class RoutingTable(object):
     Defines a routing table.
 
     """
-    def __init__(self, table_txt=None, description=None):
+    def __init__(self, table_txt=None, description=None, parser=None, cache_size=None, family=None):
         """
         Constructor
 
+        :param parser: Callable turning a list of tokens (and a 'family' keyword) into a route object.  Defaults to
+                       the routing grammar (route.routegrammar.ROUTE); route.routerecord.parse_route is a much faster
+                       alternative.
+        :param cache_size: Number of addresses meth:lookup caches the results of (see route.lookupcache); None
+                           doesn't cache
+        :param family: Address family of the routes loaded (4 or 6), which 'default' depends on; None works out each
+                       route's family from the route itself (see utils.prefix.tokens_family), as a table listing
+                       both families needs
+
         """
         self.tokenized_table = self.tokenize_table(table_txt) if table_txt else None
         self.description = description
+        self.parser = parser or routegrammar.ROUTE
+        self.family = family
         self.table = None
         self.table_no_cidr = None
+        self.index = None
+        self.nexthop_intervals = None
+        self.lookup_cache = lookupcache.LookupCache(cache_size) if cache_size else None
     #---
 
 
@@ -58,7 +84,10 @@ class RoutingTable(object):
         :returns: str
         """
         if not self.tokenized_table:
-            return None
+            # Tables changed by incremental updates no longer match their original text
+            if self.index is None:
+                return None
+            return '\n'.join(routewriter.route_lines(self.routes()))
 
         table = (' '.join(route) for route in self.tokenized_table)
         text_table = '\n'.join(table)
@@ -77,7 +106,7 @@ class RoutingTable(object):
         """
         # 'Default' needs to be switched to a proper netaddr
         if item == 'default':
-            item = '0.0.0.0/0'
+            item = prefix.DEFAULT_PREFIXES[self.family or prefix.IP_V4]
 
         try:
             return self.__dict__[item]
@@ -95,7 +124,8 @@ class RoutingTable(object):
     @staticmethod
     def tokenize_table(table_txt):
         """
-        Simply tokenizes the output of 'ip route'
+        Simply tokenizes the output of 'ip route'.  The 'nexthop' lines of multipath routes are joined onto their
+        route.
 
         :param table_txt: Text output from 'ip route'
         :type table_txt: str
@@ -104,36 +134,520 @@ class RoutingTable(object):
 
         """
         output_tokens = table_txt.strip().split('\n')
+        if 'nexthop' in table_txt:
+            return list(cmd.join_multipath(output_tokens))
         table = [token.split() for token in output_tokens]
 
         return table
     #---
 
-    def load(self, table_txt=None):
+
+    @staticmethod
+    def tokenize_stream(lines):
+        """
+        Tokenizes 'ip route' output one line at a time, as it's read, joining multipath routes' 'nexthop' lines onto
+        their route (see utils.cmd.join_multipath).
+
+        :param lines: File object or any other iterable of lines (token lists are passed through untouched)
+
+        :returns: generator of lists - tokenized routing lines
+        """
+        return cmd.join_multipath(lines)
+    #---
+
+
+    def parse_stream(self, lines):
+        """
+        Lazily parses 'ip route' output into route objects, one line at a time.
+
+        :param lines: File object or any other iterable of lines or token lists
+
+        :returns: generator of route objects
+        """
+        parser = self.parser
+        family = self.family
+        for tokens in self.tokenize_stream(lines):
+            yield parser(tokens, family=family)
+    #---
+
+
+    def load(self, table_txt=None, stream=None, use_json=None):
         """
         Loads a routing table from the provided text.  If text is not provided then the system routing table is loaded.
 
-        :param table_txt: Text output from 'ip route'
+        Passing stream instead parses the routes as they are read, without holding the text or its tokens, so peak
+        memory is bounded by the finished table.  The table's string form is then rebuilt from its routes.
+
+        Output of 'ip -json route' skips tokenizing altogether: its fields are copied straight into
+        route.routerecord.RouteRecords.  Text which is a JSON array is always read that way, and the system table is
+        fetched as JSON when the table's parser produces RouteRecords anyway (routerecord.parse_route) and iproute2
+        can print JSON.
+
+        :param table_txt: Text output from 'ip route' or 'ip -json route'
         :type table_txt: str
+        :param stream: File object or iterable of lines (or token lists) from 'ip route', or True to stream the
+                       system routing table
+        :param use_json: Whether to fetch the system table as JSON; None decides as described above
 
         """
-        if not table_txt:
-            table_txt = cmd.route()
+        family = self.family or prefix.IP_V4      # Family of the system table, when that's what is loaded
+        if stream is not None:
+            self.tokenized_table = None
+            self.build(self.parse_stream(cmd.stream_routes(family=family) if stream is True else stream))
+            return
+
+        if table_txt and table_txt.lstrip().startswith('['):
+            self.load_json(cmd.json_loads(table_txt))
+            return
+
+        if not table_txt and use_json is None:
+            use_json = (self.parser is routerecord.parse_route and cmd.backend == cmd.BACKEND_IP and
+                        cmd.json_supported())
+        if not table_txt and use_json:
+            self.load_json(cmd.routes_json(family=family))
+            return
+
+        if table_txt:
+            self.tokenized_table = self.tokenize_table(table_txt)
+        else:
+            self.tokenized_table = cmd.routes(family=family)    # Already tokenized by whichever backend cmd is using
 
-        self.tokenized_table = self.tokenize_table(table_txt)
         self.parse()
     #---
 
 
+    def aload(self, table_txt=None, family=4, netns=None, timeout=None, use_json=None):
+        """
+        asyncio version of meth:load (Python 3.7+).  The system table is fetched without blocking the event loop, and
+        parsed in the loop's default executor.  Text and JSON are told apart, and the system table fetched as JSON,
+        as meth:load does.
+
+        :param family: 4 or 6 - the family of the system table fetched, which the table then keeps (see the
+                       constructor)
+        :param netns: Named network namespace to fetch the table from
+        :param timeout: Seconds to wait for the table (utils.aiocmd.DEFAULT_TIMEOUT when None)
+        :param use_json: Whether to fetch the system table as JSON; None decides as meth:load does
+        :returns: coroutine, which returns this table once it's loaded
+        """
+        from iproute2 import aio
+        return aio.load_table(self, table_txt, family, netns, timeout, use_json)
+    #---
+
+
+    def load_json(self, routes, family=None):
+        """
+        Loads routes decoded from 'ip -json route' output.
+
+        :param routes: Iterable of dicts
+        :param family: Address family the routes were listed for (4 or 6); defaults to the table's family, and when
+                       that's None too, each route's family is worked out from the route (see
+                       route.routerecord.json_family)
+        """
+        self.tokenized_table = None
+        family = family or self.family
+        parse_json_route = routerecord.parse_json_route
+        self.build(parse_json_route(route, family) for route in routes)
+    #---
+
+
     def parse(self):
         """
         Uses the routing grammar to parse the tokens into route objects.
 
         """
-        route_objs = (routegrammar.ROUTE(route) for route in self.tokenized_table)
-        self.table = {str(route_obj.PREFIX):route_obj for route_obj in route_objs}
-        self.table_no_cidr = {key.split('/')[0]:value for key, value in self.table.iteritems()}
+        # The grammar consumes the tokens it's handed, so give it a copy to keep tokenized_table intact
+        parser = self.parser
+        family = self.family
+        self.build(parser(list(route), family=family) for route in self.tokenized_table)
+    #---
+
+
+    def build(self, routes):
+        """
+        Fills the dictionary views and the index from route objects, in a single pass so the routes can be produced
+        lazily.  Where several routes share a prefix the views hold the preferred one, as meth:_prefixChanged leaves
+        them after a change.
+
+        :param routes: Iterable of route objects
+
+        """
+        table = self.table = {}
+        table_no_cidr = self.table_no_cidr = {}
+        self.build_index(())
+        index = self.index
+
+        for route in routes:
+            key = str(route.PREFIX)
+            if route.network is not None:
+                family, network, length = route.network
+                route = index[family].insert(network, length, route)[0]
+            table[key] = route
+            table_no_cidr[key.split('/')[0]] = route
+    #---
+
+
+    @staticmethod
+    def route_key(route):
+        """
+        Identifies a route the way the kernel does: a table holds at most one route per prefix, tos and metric.
+
+        """
+        return route.network, route.tos, route.table or 'main', int(route.metric or 0)
+    #---
+
+
+    @staticmethod
+    def route_metric(route):
+        """
+        Sort key which orders routes for the same prefix by preference (lowest metric first).
+
+        """
+        return int(route.metric or 0)
+    #---
+
+
+    def build_index(self, routes):
+        """
+        Builds the longest-prefix-match index (one radix tree per address family) from route objects.
+
+        Routes whose prefix can't be expressed as a single network (exotic forms only cidrize understands) are left out.
+
+        :param routes: Iterable of route objects
+
+        """
+        self.index = {family: radix.RadixTree(bits, key=self.route_metric)
+                      for family, bits in prefix.FAMILY_BITS.items()}
+        self.nexthop_intervals = None
+        if self.lookup_cache is not None:
+            self.lookup_cache.clear()
+
+        for route in routes:
+            # The parsers work out the integer prefix while validating it
+            if route.network is None:
+                continue
+            family, network, length = route.network
+            self.index[family].insert(network, length, route)
+    #---
+
+
+    def lookup(self, address):
+        """
+        Finds the route a packet to the address would take: the longest matching prefix, with the lowest metric
+        winning between routes for the same prefix.
+
+        :param address: IPv4 or IPv6 address
+        :type address: str
+
+        :returns: route object (see :param parser: of the constructor), or None if no route matches
+        """
+        if self.index is None:
+            raise RoutingTableError('No routing table has been loaded')
+
+        cache = self.lookup_cache
+        if cache is not None:
+            route = cache.get(address)
+            if route is not lookupcache.MISSING:
+                return route
+
+        try:
+            family, value = prefix.parse_address(address)
+        except prefix.PrefixError as err:
+            raise InvalidRouteError(str(err))
+
+        routes = self.index[family].longestMatch(value)
+        route = routes[0] if routes else None
+        if cache is not None:
+            cache.put(address, family, value, route)
+        return route
+    #---
+
+
+    def lookup_many(self, addresses):
+        """
+        Resolves a batch of addresses in one call.  The index is flattened into sorted address intervals (once per
+        load) and the addresses are resolved against them with a binary search each, rather than a tree walk each.
+
+        :param addresses: Iterable of IPv4 and/or IPv6 addresses
+        :type addresses: iterable of str
+
+        :returns: list of (via, dev) tuples in the same order as the addresses, None where no route matches.
+                  Multipath routes give (None, None); see route.multipath.select_nexthop.
+        """
+        if self.index is None:
+            raise RoutingTableError('No routing table has been loaded')
+
+        if self.nexthop_intervals is None:
+            nexthop = lambda routes: (routes[0].via, routes[0].dev)
+            self.nexthop_intervals = {family: intervals.IntervalTable(tree, nexthop)
+                                      for family, tree in self.index.items()}
+
+        # Split the batch by family, remembering where each address came from
+        positions = {family: [] for family in self.index}
+        values = {family: [] for family in self.index}
+        parse_address = prefix.parse_address
+        try:
+            for position, address in enumerate(addresses):
+                family, value = parse_address(address)
+                positions[family].append(position)
+                values[family].append(value)
+        except prefix.PrefixError as err:
+            raise InvalidRouteError(str(err))
+
+        results = [None] * sum(len(family_positions) for family_positions in positions.values())
+        for family, table in self.nexthop_intervals.items():
+            for position, result in zip(positions[family], table.findMany(values[family])):
+                results[position] = result
+
+        return results
+    #---
+
+
+    def routes(self):
+        """
+        Iterates over every indexed route, in address order.
+
+        :returns: generator of route objects
+        """
+        if self.index is None:
+            return
+        for family in sorted(self.index):
+            for node in self.index[family].walk():
+                for route in node.values:
+                    yield route
+    #---
+
+
+    def save(self, path):
+        """
+        Saves the table as a binary snapshot (see route.snapshot), which meth:open maps back in without parsing.
+
+        :param path: File to write
+        """
+        if self.index is None:
+            raise RoutingTableError('No routing table has been loaded')
+        snapshot.write_snapshot(self.routes(), self.index, path)
+    #---
+
+
+    def write(self, output=None):
+        """
+        Writes the table out as 'ip route' lines (see route.routewriter), which 'ip route add' takes back.  Unlike
+        str(), always built from the parsed routes.
+
+        :param output: File object to write to; when None, the text is returned instead
+        :returns: int - number of routes written, or str when output is None
+        """
+        if self.index is None:
+            raise RoutingTableError('No routing table has been loaded')
+        if output is None:
+            return ''.join(line + '\n' for line in routewriter.route_lines(self.routes()))
+        return routewriter.RouteWriter(output).write_routes(self.routes())
+    #---
+
+
+    def write_batch(self, output, other=None):
+        """
+        Writes an 'ip -batch' script.  With no other table, the script installs this table ('route replace' for every
+        route); otherwise it turns this table into the other one, touching only the routes which differ.
+
+        :param output: File object to write to
+        :param other: class:RoutingTable to move to
+        :returns: int - number of commands written
+        """
+        if other is not None:
+            return self.diff(other).write_batch(output)
+        if self.index is None:
+            raise RoutingTableError('No routing table has been loaded')
+        return routewriter.RouteWriter(output).write_batch(self.routes())
+    #---
+
+
+    @staticmethod
+    def open(path):
+        """
+        Maps a snapshot written by meth:save.  Only its header is read up front; lookups search the mapped file
+        directly, so this is near-instant however large the table is, and processes opening the same snapshot share
+        its memory.
+
+        :param path: Snapshot file
+        :returns: class:route.snapshot.RouteSnapshot, which answers lookup(), lookup_many() and routes()
+        """
+        return snapshot.RouteSnapshot(path)
+    #---
+
+
+    def diff(self, other):
+        """
+        Compares this table (the older snapshot) with another.  Routes are matched up by route_key.
 
+        :param other: class:RoutingTable to compare against
+        :returns: class:route.routediff.RouteDiff - routes added, removed and modified (with per-field changes)
+        """
+        if self.index is None or other.index is None:
+            raise RoutingTableError('No routing table has been loaded')
+        return routediff.RouteDiff.between_indexes(self.index, other.index, self.route_key)
+    #---
+
+
+    def aggregate(self):
+        """
+        Shrinks the table into fewer prefixes which forward every address the same way: sibling prefixes whose routes
+        match (next hop, device, type, options, ... - everything but the prefix) merge into their parent, and
+        prefixes whose nearest enclosing prefix has matching routes are dropped.  See route.aggregate.
+
+        :returns: class:RoutingTable - a new table; this one is left as it is
+        """
+        if self.index is None:
+            raise RoutingTableError('No routing table has been loaded')
+        table = RoutingTable(description=self.description, parser=self.parser, family=self.family)
+        table.build(aggregate.aggregate(self.routes(), self.parser))
+        return table
+    #---
+
+
+    def analyze(self):
+        """
+        Lints the table in one walk over its index: routes shadowed by more specific routes, gateways no connected
+        route covers and reject routes (blackhole, unreachable, prohibit) overlapping other routes.  See
+        route.coverage.
+
+        :returns: class:route.coverage.CoverageReport
+        """
+        if self.index is None:
+            raise RoutingTableError('No routing table has been loaded')
+        return coverage.analyze(self.index)
+    #---
+
+
+    def add_route(self, route):
+        """
+        Adds a route to the table and its indexes, replacing any route it shares a route_key with.
+
+        :param route: Route object (as returned by the table's parser)
+        """
+        if route.network is None:
+            raise InvalidRouteError('Route has no usable prefix: {}'.format(route))
+        if self.index is None:
+            self.table, self.table_no_cidr = {}, {}
+            self.build_index(())
+
+        family, network, length = route.network
+        tree = self.index[family]
+        key = self.route_key(route)
+        for existing in tree.exact(network, length):
+            if self.route_key(existing) == key:
+                tree.remove(network, length, existing)
+                break
+        tree.insert(network, length, route)
+
+        self._prefixChanged(route)
+    #---
+
+
+    def remove_route(self, route):
+        """
+        Removes the route sharing a route_key with the given one from the table and its indexes.
+
+        :param route: Route object describing the route to remove (only the fields of route_key need to match)
+        :returns: The removed route object
+        :raises: KeyError if the table holds no such route
+        """
+        if self.index is None or route.network is None:
+            raise KeyError(str(route))
+
+        family, network, length = route.network
+        tree = self.index[family]
+        key = self.route_key(route)
+        for existing in tree.exact(network, length):
+            if self.route_key(existing) == key:
+                tree.remove(network, length, existing)
+                self._prefixChanged(existing)
+                return existing
+
+        raise KeyError(str(route))
+    #---
+
+
+    def _prefixChanged(self, route):
+        """
+        Points the dictionary views at the preferred remaining route for the prefix of route, and drops everything
+        derived from the whole table.
+
+        """
+        family, network, length = route.network
+        remaining = self.index[family].exact(network, length)
+        key = str(route.PREFIX)
+        short_key = key.split('/')[0]
+
+        if remaining:
+            self.table[key] = self.table_no_cidr[short_key] = remaining[0]
+        else:
+            self.table.pop(key, None)
+            if self.table_no_cidr.get(short_key) is route:
+                del self.table_no_cidr[short_key]
+
+        self.nexthop_intervals = None
+        self.tokenized_table = None
+        if self.lookup_cache is not None:
+            self.lookup_cache.invalidate(family, network, length)
+    #---
+
+
+    def apply(self, tokens):
+        """
+        Applies a single change to the table.  Routes with a 'del' action are removed; anything else (no action,
+        'add', 'change', 'append', 'replace') is added, replacing the route with the same route_key if there is one.
+
+        :param tokens: Tokenized route, as from 'ip monitor route' (see utils.cmd.monitor_tokens)
+        :returns: tuple - (action, route object); action is 'del' or 'add'
+        :raises: InvalidRouteError if the route can't be parsed, or is a deletion of a route the table doesn't hold
+        """
+        try:
+            route = self.parser(list(tokens), family=self.family)
+        except (routegrammar.NODE_SPEC_Error, IndexError, ValueError) as err:
+            raise InvalidRouteError('Unparseable route ({}): {}'.format(err, ' '.join(tokens)))
+        if route.action == 'del':
+            try:
+                return 'del', self.remove_route(route)
+            except KeyError:
+                raise InvalidRouteError('No such route to delete: {}'.format(' '.join(tokens)))
+
+        self.add_route(route)
+        return 'add', route
+    #---
+
+
+    def follow(self, events=None, table='main'):
+        """
+        Keeps the table up to date from a stream of route changes, applying each one as it arrives.  Changes which
+        can't be applied (deletions of routes the table doesn't hold, routes which don't parse) are logged and
+        skipped.
+
+        :param events: Iterable of 'ip monitor route' lines or token lists.  The 'nexthop' lines of multipath routes
+                       are joined onto their route as utils.cmd.join_multipath does, so each route is applied once the
+                       line after it arrives (or a None, marking it complete).  Defaults to monitoring the system with
+                       utils.cmd.monitor_routes (which never ends on its own, and yields whole routes).
+        :param table: Only apply changes to this routing table ('all' applies everything)
+        :returns: generator of (action, route object) tuples, one per applied change
+        """
+        if events is None:
+            events = cmd.monitor_routes()
+        else:
+            events = cmd.join_multipath(line if line is None or isinstance(line, list) else cmd.monitor_tokens(line)
+                                        for line in events)
+
+        for tokens in events:
+            if table != 'all':
+                route_table = tokens[tokens.index('table') + 1] if 'table' in tokens else 'main'
+                if route_table != table:
+                    continue
+
+            try:
+                change = self.apply(tokens)
+            except InvalidRouteError as err:
+                logging.warning('Skipped route change: {}'.format(err))
+                continue
+            yield change
     #---
 
 #---
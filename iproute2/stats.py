@@ -0,0 +1,340 @@
+# coding=utf-8
+#
+# NAME:         stats.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Samples the traffic counters of every interface and works out rates from them.  Each sample reads the counters
+# of all interfaces at once (a single read of /proc/net/dev, or one netlink link dump) without forking, so sampling
+# several times a second is cheap.
+#
+#   Samples are kept in preallocated ring buffers: one array per counter, holding a row of every interface's value
+# per sample.  Rates for all interfaces come from subtracting one row from another.
+#
+
+import math
+import threading
+from array import array
+
+from iproute2 import interface
+from iproute2.utils import _clock
+from iproute2.utils import netlink
+
+# Counters kept for each interface
+COUNTERS = ('rx_bytes', 'rx_packets', 'rx_errors', 'rx_dropped', 'tx_bytes', 'tx_packets', 'tx_errors', 'tx_dropped')
+
+PROC_NET_DEV = '/proc/net/dev'
+# Columns of /proc/net/dev holding COUNTERS, counting from the first after the interface name
+PROC_COLUMNS = (0, 1, 2, 3, 8, 9, 10, 11)
+
+# Values are stored as doubles so a missing interface can be recorded as NaN; they're exact up to 2^53 (8 PiB)
+NO_VALUE = float('nan')
+
+
+def read_proc(path=PROC_NET_DEV):
+    """
+    Reads the counters of every interface in the current network namespace from /proc/net/dev.
+
+    :returns: dict of interface name -> tuple of float values, in COUNTERS order
+    """
+    with open(path) as dev:
+        lines = dev.read().splitlines()[2:]     # Skip the two header lines
+
+    counters = {}
+    for line in lines:
+        name, _, values = line.partition(':')
+        values = values.split()
+        counters[name.strip()] = tuple(float(values[column]) for column in PROC_COLUMNS)
+    return counters
+#---
+
+
+def read_netlink(netns=None):
+    """
+    Reads the counters of every interface from a netlink link dump (IFLA_STATS64).  Unlike func:read_proc, can read
+    another network namespace.
+
+    :param netns: Name of the network namespace, or None for the current one
+    :returns: dict of interface name -> tuple of float values, in COUNTERS order
+    """
+    with netlink.NetlinkSocket(netns=netns) as sock:
+        links = sock.links()
+
+    counters = {}
+    for link in links:
+        stats = link.get('stats64')
+        if stats is not None:
+            counters[link['ifname']] = tuple(float(stats[direction][counter])
+                                             for direction in ('rx', 'tx')
+                                             for counter in ('bytes', 'packets', 'errors', 'dropped'))
+    return counters
+#---
+
+
+def _rates(older, newer, elapsed):
+    """
+    Per second rates between two rows of samples.  Missing values and counters which went backwards (the interface
+    was recreated) give None.
+
+    """
+    if elapsed <= 0:
+        return [None] * len(newer)
+    return [(new - old) / elapsed if new >= old else None for old, new in zip(older, newer)]
+#---
+
+
+class StatsSampler(object):
+    """
+    Keeps the last 'size' samples of every interface's counters.  Interfaces appearing after the first sample get a
+    column of their own from then on; interfaces which disappear are recorded as missing.  Samples may be taken in
+    one thread (see meth:start) while rates are read in others.
+
+    """
+    def __init__(self, size=60, read=None, clock=None):
+        """
+        Constructor
+
+        :param size: Number of samples kept (at least 2)
+        :param read: Callable returning the counters of every interface (see func:read_proc, the default, and
+                     func:read_netlink)
+        :param clock: Callable returning the time in seconds; defaults to a monotonic clock
+
+        """
+        if size < 2:
+            raise ValueError('A sampler needs to keep at least 2 samples')
+
+        self.size = size
+        self.read = read or read_proc
+        self.clock = clock or _clock
+        self.names = []             # Interface names, in column order
+        self.columns = {}           # Interface name -> column
+        self.times = array('d', [NO_VALUE]) * size
+        self.values = dict((counter, array('d')) for counter in COUNTERS)     # size rows of len(names) columns
+        self.count = 0              # Samples taken so far
+        self._stop = None
+        self._thread = None
+        # Held while a sample is written and while rates are worked out, so readers never see a sample half written
+        # or rows being widened by a sampler running in meth:start's thread
+        self._lock = threading.RLock()
+    #---
+
+
+    def _addColumns(self, names):
+        """
+        Widens every row to make room for new interfaces.  Earlier samples hold no value for them.
+
+        """
+        width = len(self.names)
+        for name in sorted(names):
+            self.columns[name] = len(self.names)
+            self.names.append(name)
+        padding = array('d', [NO_VALUE]) * (len(self.names) - width)
+
+        for counter, values in self.values.items():
+            grown = array('d')
+            for row in range(self.size):
+                grown.extend(values[row * width:(row + 1) * width])
+                grown.extend(padding)
+            self.values[counter] = grown
+    #---
+
+
+    def sample(self):
+        """
+        Reads every interface's counters into the next row of the ring buffers, overwriting the oldest sample once
+        they're full.
+
+        :returns: float - time of the sample
+        """
+        counters = self.read()
+        now = self.clock()
+
+        with self._lock:
+            new = [name for name in counters if name not in self.columns]
+            if new:
+                self._addColumns(new)
+
+            width = len(self.names)
+            start = (self.count % self.size) * width
+            missing = (NO_VALUE,) * len(COUNTERS)
+            # Transpose the per interface tuples into one row per counter
+            rows = zip(*[counters.get(name, missing) for name in self.names])
+            for counter, row in zip(COUNTERS, rows):
+                self.values[counter][start:start + width] = array('d', row)
+
+            self.times[self.count % self.size] = now
+            self.count += 1
+        return now
+    #---
+
+
+    def _row(self, counter, age):
+        """
+        One counter's values for every interface, 'age' samples before the latest.
+
+        :returns: tuple - (sample time, array of values)
+        """
+        row = (self.count - 1 - age) % self.size
+        width = len(self.names)
+        return self.times[row], self.values[counter][row * width:(row + 1) * width]
+    #---
+
+
+    def _intervals(self, window):
+        """
+        Number of intervals between samples available, at most window.
+
+        """
+        available = min(self.count, self.size) - 1
+        return available if window is None else min(window, available)
+    #---
+
+
+    def rates(self, counter='rx_bytes', window=1):
+        """
+        Per second rate of a counter for every interface, averaged over the last intervals between samples.
+
+        :param counter: One of COUNTERS
+        :param window: Number of intervals to average over (1 is the rate since the previous sample)
+        :returns: dict of interface name -> float, or None where it isn't known.  Empty before the second sample.
+        """
+        with self._lock:
+            window = self._intervals(window)
+            if window < 1:
+                return {}
+
+            end_time, end = self._row(counter, 0)
+            start_time, start = self._row(counter, window)
+            names = list(self.names)
+        return dict(zip(names, _rates(start, end, end_time - start_time)))
+    #---
+
+
+    def percentiles(self, counter='rx_bytes', percentile=95, window=None):
+        """
+        A percentile (nearest rank) of the rates of a counter between consecutive samples, for every interface.
+
+        :param counter: One of COUNTERS
+        :param percentile: 0 to 100
+        :param window: Number of recent intervals to consider; every sample kept when None
+        :returns: dict of interface name -> float, or None for interfaces without any known rate
+        """
+        with self._lock:
+            window = self._intervals(window)
+            if window < 1:
+                return {}
+
+            samples = [self._row(counter, age) for age in range(window + 1)]
+            names = list(self.names)
+        rows = [_rates(older, newer, newer_time - older_time)
+                for (newer_time, newer), (older_time, older) in zip(samples, samples[1:])]
+
+        result = {}
+        for name, rates in zip(names, zip(*rows)):
+            rates = sorted(rate for rate in rates if rate is not None)
+            if rates:
+                rank = int(math.ceil(percentile / 100.0 * len(rates)))
+                result[name] = rates[max(rank, 1) - 1]
+            else:
+                result[name] = None
+        return result
+    #---
+
+
+    def update(self, interfaces, window=1):
+        """
+        Sets the bandwidth_in and bandwidth_out of Interface objects from the byte rates, in each one's units.
+        Interfaces without a known rate are left alone.
+
+        :param interfaces: Iterable of class:interface.Interface
+        :param window: See meth:rates
+        """
+        with self._lock:        # Both rates from the same samples
+            received = self.rates('rx_bytes', window)
+            sent = self.rates('tx_bytes', window)
+
+        for link in interfaces:
+            scale = interface.UNIT_SCALES[link.units]
+            if received.get(link.name) is not None:
+                link.bandwidth_in = received[link.name] * 8 / scale
+            if sent.get(link.name) is not None:
+                link.bandwidth_out = sent[link.name] * 8 / scale
+    #---
+
+
+    def run(self, interval=1.0, count=None, callback=None):
+        """
+        Samples at a fixed interval, until count samples have been taken or meth:stop is called.  Sleeps are measured
+        from when each sample was due, so the interval doesn't drift with the time spent sampling.
+
+        :param interval: Seconds between samples (fractions are fine)
+        :param count: Number of samples to take; None runs until stopped
+        :param callback: Called with the sampler after each sample
+        """
+        self._stop = threading.Event()
+        self._run(interval, count, callback, self._stop)
+    #---
+
+
+    def _run(self, interval, count, callback, stop):
+        due = self.clock()
+        taken = 0
+        while count is None or taken < count:
+            self.sample()
+            taken += 1
+            if callback is not None:
+                callback(self)
+
+            due += interval
+            delay = due - self.clock()
+            if delay < 0:
+                due -= delay        # Fell behind; carry on from now rather than catching up
+                delay = 0
+            if count is not None and taken >= count:
+                break
+            if stop.wait(delay):
+                break
+    #---
+
+
+    def start(self, interval=1.0, callback=None):
+        """
+        Samples in a background thread (see meth:run) until meth:stop is called.
+
+        :returns: threading.Thread
+        """
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(interval, None, callback, self._stop),
+                                        name='StatsSampler')
+        self._thread.daemon = True
+        self._thread.start()
+        return self._thread
+    #---
+
+
+    def stop(self):
+        """
+        Stops a sampler started with meth:start or running meth:run.
+
+        """
+        if self._stop is not None:
+            self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    #---
+#---
@@ -21,4 +21,7 @@
 #
 #
 
+import time
 
+# Cache lifetimes and sampling intervals are measured on a clock which doesn't jump when the system time is set
+_clock = getattr(time, 'monotonic', time.time)
@@ -0,0 +1,199 @@
+# coding=utf-8
+#
+# NAME:         aiocmd.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   asyncio versions of the cmd functions (Python 3.7+ only; cmd re-exports them when they're available).  'ip' runs
+# as an asyncio subprocess; netlink dumps, which are short blocking reads, run in the loop's default executor.
+#
+#   Every call takes a timeout, after which the 'ip' process is killed and IPCommandError raised.  Cancelling a call
+# kills its process too.  At most max_concurrency calls run at once per event loop (see set_concurrency).
+#
+
+import asyncio
+import shlex
+import weakref
+
+from iproute2.utils import cmd
+
+DEFAULT_TIMEOUT = 30        # Seconds
+max_concurrency = 16
+
+_limits = weakref.WeakKeyDictionary()     # event loop -> asyncio.Semaphore
+
+
+def set_concurrency(limit):
+    """
+    Sets how many commands may run at once, per event loop.  Applies to event loops which haven't run a command yet.
+
+    :param limit: int
+    """
+    global max_concurrency
+
+    if limit < 1:
+        raise ValueError('Concurrency limit must be at least 1')
+    max_concurrency = limit
+    _limits.clear()
+#---
+
+
+def _limit():
+    loop = asyncio.get_event_loop()
+    if loop not in _limits:
+        _limits[loop] = asyncio.Semaphore(max_concurrency)
+    return _limits[loop]
+#---
+
+
+async def _run(ip_cmd, timeout):
+    """
+    Runs a command, returning its output.  The process is killed if the timeout expires or the caller is cancelled.
+
+    """
+    async with _limit():
+        process = await asyncio.create_subprocess_exec(*ip_cmd, stdout=asyncio.subprocess.PIPE,
+                                                       stderr=asyncio.subprocess.PIPE)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise cmd.IPCommandError('Command {} timed out after {}s'.format(ip_cmd, timeout), process.returncode)
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+
+    if process.returncode:
+        raise cmd.IPCommandError('Command {} returned non-zero exit status {}: {}'.format(
+            ip_cmd, process.returncode, stderr.decode('utf-8', 'replace').strip()), process.returncode)
+    return stdout.decode('utf-8')
+#---
+
+
+async def _executor(timeout, func, *args):
+    """
+    Runs a blocking call (a netlink dump) in the loop's default executor.  A timed out or cancelled call is abandoned
+    rather than interrupted.
+
+    """
+    async with _limit():
+        loop = asyncio.get_event_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(None, func, *args), timeout)
+        except asyncio.TimeoutError:
+            raise cmd.IPCommandError('Netlink dump timed out after {}s'.format(timeout), None)
+#---
+
+
+async def aip(ip_args, path_to_ip='/sbin/ip', netns=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Coroutine version of cmd.ip.
+
+    """
+    return await _run([path_to_ip] + (['-n', netns] if netns else []) + shlex.split(ip_args), timeout)
+#---
+
+
+async def ajson_supported(path_to_ip='/sbin/ip', timeout=DEFAULT_TIMEOUT):
+    """
+    Coroutine version of cmd.json_supported, sharing its answer.
+
+    :returns: bool
+    """
+    if path_to_ip not in cmd._json_support:
+        try:
+            output = await aip('-json link show lo', path_to_ip, timeout=timeout)
+            cmd._json_support[path_to_ip] = output.lstrip().startswith('[')
+        except (cmd.IPCommandError, OSError):
+            cmd._json_support[path_to_ip] = False
+    return cmd._json_support[path_to_ip]
+#---
+
+
+async def aip_json(ip_args, path_to_ip='/sbin/ip', netns=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Coroutine version of cmd.ip_json.
+
+    :returns: list of dicts
+    """
+    output = await aip('-json ' + ip_args, path_to_ip, netns, timeout)
+    return cmd.json_loads(output) if output.strip() else []
+#---
+
+
+async def aroutes(table=None, family=4, netns=None, path_to_ip='/sbin/ip', timeout=DEFAULT_TIMEOUT):
+    """
+    Coroutine version of cmd.routes.  Multipath routes' 'nexthop' lines are joined onto their route, as cmd.routes
+    does.
+
+    :returns: list of lists of str tokens
+    """
+    if cmd.backend == cmd.BACKEND_NETLINK:
+        return await _executor(timeout, lambda: cmd.routes(table, family, netns))
+
+    ip_cmd = [path_to_ip] + (['-n', netns] if netns else []) + ['-{}'.format(family), 'route']
+    if table:
+        ip_cmd += ['show', 'table', str(table)]
+    output = await _run(ip_cmd, timeout)
+    return list(cmd.join_multipath(output.splitlines()))
+#---
+
+
+async def aroutes_json(table=None, family=4, netns=None, path_to_ip='/sbin/ip', timeout=DEFAULT_TIMEOUT):
+    """
+    Coroutine version of cmd.routes_json.
+
+    :returns: list of dicts
+    """
+    args = '-{} route'.format(family)
+    if table:
+        args += ' show table {}'.format(table)
+    return await aip_json(args, path_to_ip, netns, timeout)
+#---
+
+
+async def arules(family=4, netns=None, path_to_ip='/sbin/ip', timeout=DEFAULT_TIMEOUT):
+    """
+    Coroutine version of cmd.rules.
+
+    :returns: list of lists of str tokens
+    """
+    if cmd.backend == cmd.BACKEND_NETLINK:
+        return await _executor(timeout, lambda: cmd.rules(family, netns=netns))
+
+    output = await aip('-{} rule show'.format(family), path_to_ip, netns, timeout)
+    return [line.split() for line in output.splitlines() if line.strip()]
+#---
+
+
+async def ainterfaces(name=None, path_to_ip='/sbin/ip', timeout=DEFAULT_TIMEOUT):
+    """
+    Coroutine version of cmd.interfaces.  Reads 'ip -json address' when iproute2 supports it, as cmd.interfaces
+    does.
+
+    :returns: list of dicts
+    """
+    if cmd.backend == cmd.BACKEND_NETLINK:
+        return await _executor(timeout, cmd.interfaces, name)
+
+    args = 'address show dev "{}"'.format(name) if name else 'address show'
+    if await ajson_supported(path_to_ip, timeout):
+        return cmd.json_links(await aip_json(args, path_to_ip, timeout=timeout))
+    return cmd.parse_addresses(await aip(args, path_to_ip, timeout=timeout))
+#---
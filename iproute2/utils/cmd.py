@@ -21,25 +21,290 @@
 #   Interface to iproute2 via the command-line
 #
 
+import os
+import select
+import shlex
+import socket
 import subprocess
+import sys
+import threading
+
+from iproute2.utils import netlink
+
+# Use the fastest JSON decoder available for 'ip -json' output
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    try:
+        from ujson import loads as json_loads
+    except ImportError:
+        try:
+            from simplejson import loads as json_loads
+        except ImportError:
+            from json import loads as json_loads
+
+# Backends
+BACKEND_IP = 'ip'              # Runs /sbin/ip and parses its output
+BACKEND_NETLINK = 'netlink'    # Talks rtnetlink directly, without forking
+
+backend = BACKEND_IP
+
+MONITOR_WAIT = 0.05     # Seconds 'ip monitor' is given to finish printing an event (the nexthop lines of a route)
+
+_json_support = {}      # path to ip -> whether it understands -json
+_batches = threading.local()    # Stack of the batches opened (with 'with') by each thread
+
 
 class IPCommandError(Exception):
     def __init__(self, message, code):
         super(IPCommandError, self).__init__(message)
+        self.message = message
         self.code = code
 
 
-def ip(ip_args, path_to_ip='/sbin/ip'):
+def set_backend(name):
+    """
+    Selects how the routing tables and interfaces are queried by func:routes and func:interfaces.
+
+    :param name: BACKEND_IP or BACKEND_NETLINK
+
+    """
+    global backend
+
+    if name not in (BACKEND_IP, BACKEND_NETLINK):
+        raise ValueError('Unknown backend: {}'.format(name))
+    backend = name
+#---
+
+
+def ip(ip_args, path_to_ip='/sbin/ip', netns=None):
     """
     Runs iproute2 on the command-line.
 
+    :param netns: Run the command inside this named network namespace ('ip -n')
+
     """
-    ip_cmd = '{} {}'.format(path_to_ip, ip_args)
+    ip_cmd = [path_to_ip] + (['-n', netns] if netns else []) + shlex.split(ip_args)
 
     try:
-        return subprocess.check_output(ip_cmd, shell=False)
+        return subprocess.check_output(ip_cmd, shell=False, universal_newlines=True)
     except subprocess.CalledProcessError as e:
-        raise IPCommandError(e.message, e.returncode)
+        raise IPCommandError(str(e), e.returncode)
+
+
+class BatchResult(object):
+    """
+    The outcome of one command of a class:Batch.  'ok' is None for commands which never ran (a batch without force
+    stops at its first failure); 'error' holds the message ip printed for a failed command.
+
+    """
+    __slots__ = ('command', 'ok', 'error')
+
+    def __init__(self, command, ok, error=None):
+        self.command = command
+        self.ok = ok
+        self.error = error
+    #---
+
+
+    def __repr__(self):
+        return 'BatchResult({!r}, {!r}, {!r})'.format(self.command, self.ok, self.error)
+    #---
+#---
+
+
+class Batch(object):
+    """
+    Accumulates ip commands and runs them all through a single 'ip -batch -' process.  Used as a context manager,
+    the batch is committed when the block exits normally and discarded if it raises; while the block runs, it's also
+    the thread's current batch (see func:current_batch), which Interface methods queue their commands on.
+
+    """
+    def __init__(self, path_to_ip='/sbin/ip', force=True, netns=None):
+        """
+        Constructor
+
+        :param force: Keep going after a command fails ('ip -force'), rather than stopping at the first failure
+        :param netns: Run the commands inside this named network namespace
+
+        """
+        self.path_to_ip = path_to_ip
+        self.force = force
+        self.netns = netns
+        self.commands = []
+        self.results = None
+        self._callbacks = []
+    #---
+
+
+    def __len__(self):
+        return len(self.commands)
+    #---
+
+
+    def __enter__(self):
+        if not hasattr(_batches, 'stack'):
+            _batches.stack = []
+        _batches.stack.append(self)
+        return self
+    #---
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _batches.stack.remove(self)
+        if exc_type is None:
+            self.commit()
+    #---
+
+
+    def add(self, command):
+        """
+        Queues a command, written as it would be after 'ip' on the command-line ('route add 10.0.0.0/8 dev eth0').
+
+        :returns: int - position of the command, and of its result in meth:commit's list
+        """
+        if '\n' in command:
+            raise ValueError('Batch commands must be a single line: {!r}'.format(command))
+        self.commands.append(command)
+        return len(self.commands) - 1
+    #---
+
+
+    def route_add(self, params):
+        return self.add('route add {}'.format(params))
+    #---
+
+
+    def route_del(self, params):
+        return self.add('route del {}'.format(params))
+    #---
+
+
+    def route_replace(self, params):
+        return self.add('route replace {}'.format(params))
+    #---
+
+
+    def address_add(self, address, dev):
+        return self.add('address add "{}" dev "{}"'.format(address, dev))
+    #---
+
+
+    def address_del(self, address, dev):
+        return self.add('address del "{}" dev "{}"'.format(address, dev))
+    #---
+
+
+    def on_commit(self, callback, *args):
+        """
+        Registers a call to make once the batch has run, such as refreshing a cache the commands made stale.  The
+        same call registered many times is only made once.
+
+        """
+        if (callback, args) not in self._callbacks:
+            self._callbacks.append((callback, args))
+    #---
+
+
+    def commit(self):
+        """
+        Runs every queued command in one ip process, then the meth:on_commit callbacks.  The queue is emptied.
+
+        :returns: list of class:BatchResult, one per command
+        :raises: IPCommandError if ip failed without reporting a failed command (it couldn't enter the network
+                 namespace, say); every command's result is then marked failed
+        """
+        commands, callbacks = self.commands, self._callbacks
+        self.commands, self._callbacks = [], []
+        if not commands:
+            self.results = []
+            return self.results
+
+        ip_cmd = [self.path_to_ip] + (['-n', self.netns] if self.netns else []) + \
+                 (['-force'] if self.force else []) + ['-batch', '-']
+        process = subprocess.Popen(ip_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   universal_newlines=True)
+        _, errors = process.communicate('\n'.join(commands) + '\n')
+
+        # ip reports each failure as its error message(s) followed by 'Command failed -:<line number>'
+        failures = {}
+        message = []
+        for line in errors.splitlines():
+            if line.startswith('Command failed -:'):
+                failures[int(line.rsplit(':', 1)[1]) - 1] = ' '.join(message) or 'Command failed'
+                message = []
+            elif line.strip():
+                message.append(line.strip())
+
+        if process.returncode and not failures:
+            # Nothing tells which commands ran, if any
+            error = ' '.join(message) or 'ip exited with status {}'.format(process.returncode)
+            self.results = [BatchResult(command, False, error) for command in commands]
+        else:
+            last_run = len(commands) - 1 if self.force or not failures else min(failures)
+            self.results = [BatchResult(command, None if position > last_run else position not in failures,
+                                        failures.get(position))
+                            for position, command in enumerate(commands)]
+
+        for callback, args in callbacks:
+            callback(*args)
+        if process.returncode and not failures:
+            raise IPCommandError('Command {} returned non-zero exit status {}: {}'.format(
+                ip_cmd, process.returncode, self.results[0].error), process.returncode)
+        return self.results
+    #---
+#---
+
+
+def batch(path_to_ip='/sbin/ip', force=True, netns=None):
+    """
+    Starts a class:Batch:
+
+        with cmd.batch() as commands:
+            commands.route_add('10.0.0.0/8 via 172.16.0.1')
+            interface.addAddress('10.1.0.1/24')
+        print(commands.results)
+
+    """
+    return Batch(path_to_ip, force, netns)
+#---
+
+
+def current_batch():
+    """
+    The innermost batch the calling thread has open with 'with', if any.
+
+    :returns: class:Batch or None
+    """
+    stack = getattr(_batches, 'stack', None)
+    return stack[-1] if stack else None
+#---
+
+
+def json_supported(path_to_ip='/sbin/ip'):
+    """
+    Checks (once per binary) whether iproute2 is new enough to print JSON ('ip -json', iproute2 4.13+).
+
+    :returns: bool
+    """
+    if path_to_ip not in _json_support:
+        try:
+            _json_support[path_to_ip] = ip('-json link show lo', path_to_ip).lstrip().startswith('[')
+        except (IPCommandError, OSError):
+            _json_support[path_to_ip] = False
+    return _json_support[path_to_ip]
+#---
+
+
+def ip_json(ip_args, path_to_ip='/sbin/ip', netns=None):
+    """
+    Runs iproute2 with JSON output and decodes it.
+
+    :returns: list of dicts
+    """
+    output = ip('-json ' + ip_args, path_to_ip, netns)
+    return json_loads(output) if output.strip() else []
+#---
 
 
 def route(params = ''):
@@ -48,3 +313,335 @@ def route(params = ''):
 
     """
     return ip('route {}'.format(params))
+
+
+def routes(table=None, family=4, netns=None):
+    """
+    Fetches a routing table as lists of tokens (the same layout RoutingTable.tokenize_table produces), using the
+    selected backend.
+
+    :param table: Table to fetch ('main' when None, 'all' for every table)
+    :param family: 4 or 6
+    :param netns: Named network namespace to fetch the table from, None for the current one
+    :returns: list of lists of str tokens
+    """
+    return list(stream_routes(table, family, netns=netns))
+#---
+
+
+def routes_json(table=None, family=4, netns=None, path_to_ip='/sbin/ip'):
+    """
+    Fetches a routing table from 'ip -json route' (see routerecord.parse_json_route).
+
+    :param table: Table to fetch ('main' when None, 'all' for every table)
+    :param family: 4 or 6
+    :returns: list of dicts
+    """
+    args = '-{} route'.format(family)
+    if table:
+        args += ' show table {}'.format(table)
+    return ip_json(args, path_to_ip, netns)
+#---
+
+
+def join_multipath(lines):
+    """
+    Tokenizes 'ip route' output, joining the 'nexthop' lines of each multipath route onto the route they belong to.
+    A route is yielded once the line after it has been read, or at a None, which marks everything before it as
+    complete (see func:monitor_routes).
+
+    :param lines: Iterable of lines or token lists, and Nones
+    :returns: generator of lists of str tokens
+    """
+    route = None
+    for line in lines:
+        if line is None:
+            if route is not None:
+                yield route
+                route = None
+            continue
+        tokens = line if isinstance(line, list) else line.split()
+        if not tokens:
+            continue
+        if tokens[0] == 'nexthop' and route is not None:
+            route = route + tokens
+            continue
+        if route is not None:
+            yield route
+        route = tokens
+    if route is not None:
+        yield route
+#---
+
+
+def stream_routes(table=None, family=4, path_to_ip='/sbin/ip', netns=None):
+    """
+    Like func:routes, but yields each route as soon as it has been read rather than reading the whole table first.
+
+    :returns: generator of lists of str tokens
+    """
+    if backend == BACKEND_NETLINK:
+        if table in (None, 'main'):
+            table_id = netlink.RT_TABLE_MAIN
+        elif table == 'all':
+            table_id = None
+        else:
+            names = {name: number for number, name in netlink.ROUTE_TABLES.items()}
+            table_id = names[table] if table in names else int(table)
+
+        try:
+            with netlink.NetlinkSocket(netns=netns) as sock:
+                for tokens in sock.iter_routes(socket.AF_INET6 if family == 6 else socket.AF_INET, table_id):
+                    yield tokens
+        except netlink.NetlinkError as err:
+            raise IPCommandError(str(err), err.code)
+        return
+
+    ip_cmd = [path_to_ip] + (['-n', netns] if netns else []) + ['-{}'.format(family), 'route']
+    if table:
+        ip_cmd += ['show', 'table', str(table)]
+
+    process = subprocess.Popen(ip_cmd, stdout=subprocess.PIPE, universal_newlines=True)
+    try:
+        for tokens in join_multipath(process.stdout):
+            yield tokens
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+    if returncode:
+        raise IPCommandError('Command {} returned non-zero exit status {}'.format(ip_cmd, returncode), returncode)
+#---
+
+
+def rules(family=4, path_to_ip='/sbin/ip', netns=None):
+    """
+    Fetches the routing policy rules ('ip rule') as lists of tokens, in priority order, using the selected backend.
+
+    :param family: 4 or 6
+    :param netns: Named network namespace to fetch the rules from, None for the current one
+    :returns: list of lists of str tokens
+    """
+    if backend == BACKEND_NETLINK:
+        try:
+            with netlink.NetlinkSocket(netns=netns) as sock:
+                return sock.rules(socket.AF_INET6 if family == 6 else socket.AF_INET)
+        except netlink.NetlinkError as err:
+            raise IPCommandError(str(err), err.code)
+
+    return [line.split() for line in ip('-{} rule show'.format(family), path_to_ip, netns).splitlines()
+            if line.strip()]
+#---
+
+
+def monitor_routes(path_to_ip='/sbin/ip'):
+    """
+    Follows changes to the routing tables (all tables, both families) using the selected backend.  Deleted routes are
+    given a leading 'del' action token; new and changed routes are plain routes.  The 'nexthop' lines of multipath
+    routes are joined onto their route, which is yielded once 'ip monitor' has printed the whole event.
+
+    :returns: generator of lists of str tokens, which only ends if the monitor does
+    """
+    if backend == BACKEND_NETLINK:
+        with netlink.NetlinkSocket(groups=netlink.RTMGRP_IPV4_ROUTE | netlink.RTMGRP_IPV6_ROUTE) as sock:
+            for tokens in sock.route_events():
+                yield tokens
+        return
+
+    process = subprocess.Popen([path_to_ip, 'monitor', 'route'], stdout=subprocess.PIPE)
+    try:
+        lines = (monitor_tokens(line) if line is not None else None for line in _monitor_lines(process.stdout))
+        for tokens in join_multipath(lines):
+            yield tokens
+    finally:
+        process.terminate()
+        process.wait()
+#---
+
+
+def _monitor_lines(stream, wait=MONITOR_WAIT):
+    """
+    Reads the lines of a monitor's output as they arrive.  'ip monitor' prints each event in one go, so whenever no
+    more output follows within 'wait' seconds a None is yielded, marking the event read so far as complete.
+
+    :param stream: Binary pipe
+    :returns: generator of str lines, and Nones
+    """
+    descriptor = stream.fileno()
+    pending = b''
+    while True:
+        while b'\n' in pending:
+            line, pending = pending.split(b'\n', 1)
+            yield line.decode('utf-8', 'replace')
+        if not select.select([descriptor], [], [], wait)[0]:
+            yield None
+        data = os.read(descriptor, 65536)
+        if not data:
+            if pending:
+                yield pending.decode('utf-8', 'replace')
+            return
+        pending += data
+#---
+
+
+def monitor_tokens(line):
+    """
+    Tokenizes a line of 'ip monitor' output, translating its 'Deleted' marker into a 'del' action.
+
+    :param line: One line from 'ip monitor route' (or 'ip monitor all')
+    :returns: list of str tokens, or None for lines which don't describe a route
+    """
+    tokens = line.split()
+    if not tokens or tokens[0] == 'Timestamp:':
+        return None
+
+    # 'ip monitor all' tags each line with the object it concerns
+    if tokens[0].startswith('['):
+        if not tokens[0].startswith('[ROUTE]'):
+            return None
+        tokens[0] = tokens[0][len('[ROUTE]'):]
+        if not tokens[0]:
+            tokens.pop(0)
+
+    if tokens and tokens[0] == 'Deleted':
+        tokens[0] = 'del'
+    return tokens or None
+#---
+
+
+def monitor_interfaces(path_to_ip='/sbin/ip'):
+    """
+    Follows changes to links and their addresses using the selected backend.
+
+    :returns: generator of (interface index, interface name) tuples, one per change, which only ends if the monitor
+              does.  The name is None where the backend doesn't report it (address changes read from netlink).
+    """
+    if backend == BACKEND_NETLINK:
+        groups = netlink.RTMGRP_LINK | netlink.RTMGRP_IPV4_IFADDR | netlink.RTMGRP_IPV6_IFADDR
+        with netlink.NetlinkSocket(groups=groups) as sock:
+            for change in sock.interface_events():
+                yield change
+        return
+
+    # One line per change, each starting '[Deleted] <index>: <name>[@<peer>][:]'
+    process = subprocess.Popen([path_to_ip, '-o', 'monitor', 'link', 'address'], stdout=subprocess.PIPE,
+                               universal_newlines=True)
+    try:
+        for line in iter(process.stdout.readline, ''):
+            tokens = line.split()
+            if tokens and tokens[0] == 'Deleted':
+                tokens.pop(0)
+            if len(tokens) < 2 or not tokens[0].endswith(':') or not tokens[0][:-1].isdigit():
+                continue
+            yield int(tokens[0][:-1]), tokens[1].rstrip(':').split('@')[0]
+    finally:
+        process.terminate()
+        process.wait()
+#---
+
+
+def interfaces(name=None):
+    """
+    Fetches links along with their addresses, using the selected backend.  Each link is a dict laid out like the
+    output of 'ip -json address': ifindex, ifname, flags, mtu, operstate, address (the MAC) and addr_info (a list of
+    dicts holding family, local, prefixlen, scope and, where present, broadcast and label).  The ip backend reads
+    'ip -json address' when iproute2 supports it (the dicts then carry its other keys too), and parses the text of
+    'ip address show' when it doesn't.
+
+    :param name: Only fetch this interface
+    :returns: list of dicts
+    :raises: IPCommandError (code 255 if the named interface doesn't exist, as /sbin/ip does)
+    """
+    if backend == BACKEND_NETLINK:
+        try:
+            with netlink.NetlinkSocket() as sock:
+                links = sock.interfaces()
+        except netlink.NetlinkError as err:
+            raise IPCommandError(str(err), err.code)
+
+        if name is not None:
+            links = [link for link in links if link['ifname'] == name]
+            if not links:
+                raise IPCommandError('Device "{}" does not exist.'.format(name), 255)
+        return links
+
+    args = 'address show dev "{}"'.format(name) if name else 'address show'
+    if json_supported():
+        return json_links(ip_json(args))
+    return parse_addresses(ip(args))
+#---
+
+
+def json_links(links):
+    """
+    Fills in the keys of the layout described by func:interfaces which 'ip -json address' leaves out of some links.
+
+    :param links: list of dicts decoded from 'ip -json address'
+    :returns: the same list
+    """
+    for link in links:
+        link.setdefault('flags', [])
+        link.setdefault('mtu', None)
+        link.setdefault('operstate', None)
+        link.setdefault('address', None)
+        link.setdefault('addr_info', [])
+    return links
+#---
+
+
+def parse_addresses(text):
+    """
+    Parses the output of 'ip address show' into the layout described by func:interfaces.
+
+    :param text: Text output from 'ip address show'
+    :returns: list of dicts
+    """
+    links = []
+    link = None
+    for line in text.splitlines():
+        tokens = line.split()
+        if not tokens:
+            continue
+
+        # Each link starts with an unindented '<index>: <name>: <FLAGS> ...' line
+        if not line[0].isspace():
+            link = {'ifindex': int(tokens[0].rstrip(':')),
+                    'ifname': tokens[1].rstrip(':').split('@')[0],
+                    'flags': tokens[2].strip('<>').split(',') if tokens[2] != '<>' else [],
+                    'mtu': int(tokens[tokens.index('mtu') + 1]) if 'mtu' in tokens else None,
+                    'operstate': tokens[tokens.index('state') + 1] if 'state' in tokens else None,
+                    'address': None,
+                    'addr_info': []}
+            links.append(link)
+        elif link is None:
+            continue
+        elif tokens[0].startswith('link/'):
+            if len(tokens) > 1 and tokens[0] != 'link/none':
+                link['address'] = tokens[1]
+        elif tokens[0] in ('inet', 'inet6'):
+            local, _, prefixlen = tokens[1].partition('/')
+            address = {'family': tokens[0],
+                       'local': local,
+                       'prefixlen': int(prefixlen) if prefixlen else (32 if tokens[0] == 'inet' else 128),
+                       'scope': tokens[tokens.index('scope') + 1] if 'scope' in tokens else None}
+            if 'brd' in tokens:
+                address['broadcast'] = tokens[tokens.index('brd') + 1]
+            # IPv4 addresses always end with their label
+            if tokens[0] == 'inet':
+                address['label'] = tokens[-1]
+            link['addr_info'].append(address)
+
+    return links
+#---
+
+
+# asyncio versions of the above, on interpreters which support them.  They're looked up when first used, since
+# aiocmd imports this module.
+ASYNC_FUNCTIONS = ('aip', 'aip_json', 'ajson_supported', 'aroutes', 'aroutes_json', 'arules', 'ainterfaces')
+
+
+def __getattr__(name):
+    if name in ASYNC_FUNCTIONS and sys.version_info >= (3, 7):
+        from iproute2.utils import aiocmd
+        return getattr(aiocmd, name)
+    raise AttributeError(name)
+#---
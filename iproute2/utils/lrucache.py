@@ -0,0 +1,95 @@
+# coding=utf-8
+#
+# NAME:         lrucache.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   A small bounded least-recently-used cache (functools.lru_cache isn't available on Python 2).
+#
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    Dictionary-like cache holding at most maxsize entries, evicting the least recently used first.
+
+    """
+    def __init__(self, maxsize=1024):
+        """
+        Constructor
+
+        :param maxsize: Maximum number of entries kept
+
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    #---
+
+
+    def __len__(self):
+        return len(self.entries)
+    #---
+
+
+    def __contains__(self, key):
+        return key in self.entries
+    #---
+
+
+    def get(self, key, default=None):
+        """
+        Fetches an entry, marking it as the most recently used.
+
+        """
+        try:
+            value = self.entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self.entries[key] = value
+        self.hits += 1
+        return value
+    #---
+
+
+    def put(self, key, value):
+        """
+        Stores an entry, evicting the least recently used one if the cache is full.
+
+        """
+        entries = self.entries
+        if key in entries:
+            del entries[key]
+        elif len(entries) >= self.maxsize:
+            entries.popitem(last=False)
+        entries[key] = value
+    #---
+
+
+    def pop(self, key, default=None):
+        return self.entries.pop(key, default)
+    #---
+
+
+    def clear(self):
+        self.entries.clear()
+    #---
+#---
@@ -0,0 +1,653 @@
+# coding=utf-8
+#
+# NAME:         netlink.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Interface to the kernel's routing tables via rtnetlink, rather than the command-line.  Dumps are read straight
+# off an AF_NETLINK socket and decoded into the same structures iproute2 prints: routes become token lists (exactly
+# what RoutingTable.tokenize_table produces) and links become dictionaries holding their addresses.
+#
+#   The decoding functions only ever see bytes, so they can be run against recorded dumps without any privileges.
+#
+
+import ctypes
+import os
+import socket
+import struct
+
+# Message types
+NLMSG_NOOP = 1
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+RTM_GETADDR = 22
+RTM_NEWROUTE = 24
+RTM_DELROUTE = 25
+RTM_GETROUTE = 26
+RTM_NEWRULE = 32
+RTM_GETRULE = 34
+
+# Message flags
+NLM_F_REQUEST = 0x1
+NLM_F_MULTI = 0x2
+NLM_F_DUMP = 0x300
+
+NETLINK_ROUTE = 0
+
+# Route attributes
+RTA_DST = 1
+RTA_SRC = 2
+RTA_OIF = 4
+RTA_GATEWAY = 5
+RTA_PRIORITY = 6
+RTA_PREFSRC = 7
+RTA_METRICS = 8
+RTA_MULTIPATH = 9
+RTA_TABLE = 15
+RTA_PREF = 20
+
+RTM_F_CLONED = 0x200
+RTNH_F_ONLINK = 0x4
+RTNH_F_LINKDOWN = 0x10
+
+# Rule attributes
+FRA_DST = 1
+FRA_SRC = 2
+FRA_IIFNAME = 3
+FRA_GOTO = 4
+FRA_PRIORITY = 6
+FRA_FWMARK = 10
+FRA_SUPPRESS_PREFIXLEN = 14
+FRA_TABLE = 15
+FRA_FWMASK = 16
+FRA_OIFNAME = 17
+FRA_L3MDEV = 19
+
+FIB_RULE_INVERT = 0x2
+
+# Link attributes
+IFLA_ADDRESS = 1
+IFLA_IFNAME = 3
+IFLA_MTU = 4
+IFLA_OPERSTATE = 16
+IFLA_STATS64 = 23
+
+# Address attributes
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+IFA_LABEL = 3
+IFA_BROADCAST = 4
+
+RT_TABLE_MAIN = 254
+
+# Network namespaces
+NETNS_RUN_DIR = '/var/run/netns'      # Where 'ip netns add' creates its named namespaces
+CLONE_NEWNET = 0x40000000
+
+# Multicast groups
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV4_ROUTE = 0x40
+RTMGRP_IPV6_IFADDR = 0x100
+RTMGRP_IPV6_ROUTE = 0x400
+
+# Structures
+NLMSGHDR = struct.Struct('=LHHLL')      # length, type, flags, sequence, port id
+RTMSG = struct.Struct('=BBBBBBBBI')     # family, dst_len, src_len, tos, table, protocol, scope, type, flags
+IFINFOMSG = struct.Struct('=BxHiII')    # family, type, index, flags, change
+IFADDRMSG = struct.Struct('=BBBBI')     # family, prefixlen, flags, scope, index
+RTATTR = struct.Struct('=HH')           # length, type
+RTNEXTHOP = struct.Struct('=HBBi')      # length, flags, hops, ifindex
+FIBRULEHDR = struct.Struct('=BBBBBBBBI')    # family, dst_len, src_len, tos, table, res1, res2, action, flags
+LINKSTATS64 = struct.Struct('=8Q')      # Leading rtnl_link_stats64 fields: packets, bytes, errors, dropped (rx, tx)
+
+# Names iproute2 prints for the numeric values (see /etc/iproute2/rt_*)
+ROUTE_TYPES = {1: 'unicast', 2: 'local', 3: 'broadcast', 4: 'anycast', 5: 'multicast', 6: 'blackhole',
+               7: 'unreachable', 8: 'prohibit', 9: 'throw', 10: 'nat'}
+ROUTE_PROTOCOLS = {1: 'redirect', 2: 'kernel', 3: 'boot', 4: 'static', 8: 'gated', 9: 'ra', 10: 'mrt',
+                   11: 'zebra', 12: 'bird', 13: 'dnrouted', 14: 'xorp', 15: 'ntk', 16: 'dhcp', 42: 'babel',
+                   186: 'bgp', 187: 'isis', 188: 'ospf', 189: 'rip', 192: 'eigrp'}
+ROUTE_SCOPES = {0: 'global', 200: 'site', 253: 'link', 254: 'host', 255: 'nowhere'}
+ROUTE_TABLES = {253: 'default', 254: 'main', 255: 'local'}
+ROUTE_METRICS = {2: 'mtu', 3: 'window', 4: 'rtt', 5: 'rttvar', 6: 'ssthresh', 7: 'cwnd', 8: 'advmss',
+                 9: 'reordering', 10: 'hoplimit', 11: 'initcwnd', 13: 'rto_min', 14: 'initrwnd'}
+RULE_ACTIONS = {1: 'lookup', 2: 'goto', 3: 'nop', 6: 'blackhole', 7: 'unreachable', 8: 'prohibit'}
+ROUTER_PREFERENCES = {0: 'medium', 1: 'high', 3: 'low'}
+OPER_STATES = ('UNKNOWN', 'NOTPRESENT', 'DOWN', 'LOWERLAYERDOWN', 'TESTING', 'DORMANT', 'UP')
+LINK_FLAGS = ((0x1, 'UP'), (0x2, 'BROADCAST'), (0x8, 'LOOPBACK'), (0x10, 'POINTOPOINT'), (0x80, 'NOARP'),
+              (0x100, 'PROMISC'), (0x400, 'MASTER'), (0x800, 'SLAVE'), (0x1000, 'MULTICAST'),
+              (0x10000, 'LOWER_UP'), (0x20000, 'DORMANT'))
+ADDRESS_FAMILIES = {socket.AF_INET: 'inet', socket.AF_INET6: 'inet6'}
+
+
+# Exceptions
+class NetlinkError(Exception):
+    def __init__(self, message, code):
+        super(NetlinkError, self).__init__(message)
+        self.code = code
+
+
+def _align(length):
+    return (length + 3) & ~3
+#---
+
+
+def parse_messages(data):
+    """
+    Splits a buffer read from a netlink socket into its messages.
+
+    :param data: Raw bytes from the socket
+    :returns: generator of (message type, flags, payload bytes) tuples
+    """
+    offset = 0
+    while offset + NLMSGHDR.size <= len(data):
+        length, msg_type, flags, _, _ = NLMSGHDR.unpack_from(data, offset)
+        if length < NLMSGHDR.size:
+            break
+        yield msg_type, flags, data[offset + NLMSGHDR.size:offset + length]
+        offset += _align(length)
+#---
+
+
+def parse_attributes(data, offset=0):
+    """
+    Decodes a run of rtattr structures.
+
+    :returns: dict of attribute type -> raw bytes
+    """
+    attributes = {}
+    while offset + RTATTR.size <= len(data):
+        length, attr_type = RTATTR.unpack_from(data, offset)
+        if length < RTATTR.size:
+            break
+        attributes[attr_type & 0x3fff] = data[offset + RTATTR.size:offset + length]
+        offset += _align(length)
+    return attributes
+#---
+
+
+def _address(family, data):
+    return socket.inet_ntop(family, data)
+#---
+
+
+def _u32(data):
+    return struct.unpack('=I', data[:4])[0]
+#---
+
+
+def _string(data):
+    text = data.split(b'\0', 1)[0]
+    return text if isinstance(text, str) else text.decode('utf-8')
+#---
+
+
+def decode_route(payload, link_names, shown_table=RT_TABLE_MAIN):
+    """
+    Decodes an RTM_NEWROUTE payload into the tokens 'ip route' would print for it.
+
+    :param payload: Message payload (rtmsg + attributes)
+    :param link_names: dict of interface index -> interface name
+    :param shown_table: Table id which is left implicit (not printed), as it is for the table 'ip route' was asked for
+    :returns: list of str tokens
+    """
+    family, dst_len, _, tos, table, protocol, scope, route_type, flags = RTMSG.unpack_from(payload)
+    attributes = parse_attributes(payload, RTMSG.size)
+    tokens = []
+
+    if route_type != 1:
+        tokens.append(ROUTE_TYPES.get(route_type, str(route_type)))
+
+    # iproute2 prints 'default' for both families; ::/0 keeps the IPv6 one unambiguous without a family to go by
+    if RTA_DST in attributes:
+        destination = _address(family, attributes[RTA_DST])
+        tokens.append(destination if dst_len == len(attributes[RTA_DST]) * 8
+                      else '{}/{}'.format(destination, dst_len))
+    else:
+        tokens.append('default' if family == socket.AF_INET else '::/{}'.format(dst_len))
+
+    if tos:
+        tokens.extend(('tos', '0x{:x}'.format(tos)))
+    if RTA_GATEWAY in attributes:
+        tokens.extend(('via', _address(family, attributes[RTA_GATEWAY])))
+    if RTA_OIF in attributes:
+        index = struct.unpack('=i', attributes[RTA_OIF][:4])[0]
+        tokens.extend(('dev', link_names.get(index, str(index))))
+
+    table = _u32(attributes[RTA_TABLE]) if RTA_TABLE in attributes else table
+    if table != shown_table:
+        tokens.extend(('table', ROUTE_TABLES.get(table, str(table))))
+    if protocol != 3:
+        tokens.extend(('proto', ROUTE_PROTOCOLS.get(protocol, str(protocol))))
+    if scope:
+        tokens.extend(('scope', ROUTE_SCOPES.get(scope, str(scope))))
+    if RTA_PREFSRC in attributes:
+        tokens.extend(('src', _address(family, attributes[RTA_PREFSRC])))
+    if RTA_PRIORITY in attributes:
+        tokens.extend(('metric', str(_u32(attributes[RTA_PRIORITY]))))
+    if RTA_PREF in attributes:
+        tokens.extend(('pref', ROUTER_PREFERENCES.get(bytearray(attributes[RTA_PREF])[0], 'unknown')))
+    if flags & RTNH_F_ONLINK:
+        tokens.append('onlink')
+    if flags & RTNH_F_LINKDOWN:
+        tokens.append('linkdown')
+
+    if RTA_METRICS in attributes:
+        metrics = parse_attributes(attributes[RTA_METRICS])
+        for metric_type in sorted(metrics):
+            if metric_type in ROUTE_METRICS:
+                value = _u32(metrics[metric_type])
+                name = ROUTE_METRICS[metric_type]
+                # The kernel keeps rtt scaled by 8 and rttvar by 4
+                if name == 'rtt':
+                    value = '{}ms'.format(value // 8)
+                elif name == 'rttvar':
+                    value = '{}ms'.format(value // 4)
+                elif name == 'rto_min':
+                    value = '{}ms'.format(value)
+                tokens.extend((name, str(value)))
+
+    if RTA_MULTIPATH in attributes:
+        data = attributes[RTA_MULTIPATH]
+        offset = 0
+        while offset + RTNEXTHOP.size <= len(data):
+            length, nh_flags, hops, index = RTNEXTHOP.unpack_from(data, offset)
+            if length < RTNEXTHOP.size:
+                break
+            nh_attributes = parse_attributes(data[offset:offset + length], RTNEXTHOP.size)
+            tokens.append('nexthop')
+            if RTA_GATEWAY in nh_attributes:
+                tokens.extend(('via', _address(family, nh_attributes[RTA_GATEWAY])))
+            tokens.extend(('dev', link_names.get(index, str(index)), 'weight', str(hops + 1)))
+            if nh_flags & RTNH_F_ONLINK:
+                tokens.append('onlink')
+            offset += _align(length)
+
+    return tokens
+#---
+
+
+def decode_route_table(payload):
+    """
+    Fetches the table id a RTM_NEWROUTE payload belongs to.
+
+    """
+    _, _, _, _, table, _, _, _, flags = RTMSG.unpack_from(payload)
+    attributes = parse_attributes(payload, RTMSG.size)
+    return (_u32(attributes[RTA_TABLE]) if RTA_TABLE in attributes else table), flags
+#---
+
+
+def decode_rule(payload):
+    """
+    Decodes an RTM_NEWRULE payload into the tokens 'ip rule' would print for it.
+
+    :param payload: Message payload (fib_rule_hdr + attributes)
+    :returns: list of str tokens
+    """
+    family, dst_len, src_len, tos, table, _, _, action, flags = FIBRULEHDR.unpack_from(payload)
+    attributes = parse_attributes(payload, FIBRULEHDR.size)
+    tokens = ['{}:'.format(_u32(attributes[FRA_PRIORITY]) if FRA_PRIORITY in attributes else 0)]
+
+    if flags & FIB_RULE_INVERT:
+        tokens.append('not')
+
+    tokens.append('from')
+    if FRA_SRC in attributes:
+        source = _address(family, attributes[FRA_SRC])
+        tokens.append(source if src_len == len(attributes[FRA_SRC]) * 8 else '{}/{}'.format(source, src_len))
+    else:
+        tokens.append('all')
+    if FRA_DST in attributes:
+        destination = _address(family, attributes[FRA_DST])
+        tokens.extend(('to', destination if dst_len == len(attributes[FRA_DST]) * 8
+                       else '{}/{}'.format(destination, dst_len)))
+
+    if tos:
+        tokens.extend(('tos', '0x{:x}'.format(tos)))
+    if FRA_FWMARK in attributes or FRA_FWMASK in attributes:
+        mark = _u32(attributes[FRA_FWMARK]) if FRA_FWMARK in attributes else 0
+        mask = _u32(attributes[FRA_FWMASK]) if FRA_FWMASK in attributes else 0xffffffff
+        tokens.extend(('fwmark', '0x{:x}'.format(mark) if mask == 0xffffffff else '0x{:x}/0x{:x}'.format(mark, mask)))
+    if FRA_IIFNAME in attributes:
+        tokens.extend(('iif', _string(attributes[FRA_IIFNAME])))
+    if FRA_OIFNAME in attributes:
+        tokens.extend(('oif', _string(attributes[FRA_OIFNAME])))
+
+    table = _u32(attributes[FRA_TABLE]) if FRA_TABLE in attributes else table
+    if FRA_L3MDEV in attributes and bytearray(attributes[FRA_L3MDEV])[0]:
+        tokens.extend(('lookup', '[l3mdev-table]'))
+    elif action == 1:
+        tokens.extend(('lookup', ROUTE_TABLES.get(table, str(table))))
+    elif action == 2:
+        tokens.extend(('goto', str(_u32(attributes[FRA_GOTO])) if FRA_GOTO in attributes else 'none'))
+    else:
+        tokens.append(RULE_ACTIONS.get(action, str(action)))
+
+    if FRA_SUPPRESS_PREFIXLEN in attributes:
+        length = struct.unpack('=i', attributes[FRA_SUPPRESS_PREFIXLEN][:4])[0]
+        if length >= 0:
+            tokens.extend(('suppress_prefixlength', str(length)))
+
+    return tokens
+#---
+
+
+def decode_link(payload):
+    """
+    Decodes an RTM_NEWLINK payload.  Keys follow the names used by 'ip -json link'.
+
+    :returns: dict
+    """
+    _, _, index, flags, _ = IFINFOMSG.unpack_from(payload)
+    attributes = parse_attributes(payload, IFINFOMSG.size)
+
+    link = {'ifindex': index,
+            'ifname': _string(attributes.get(IFLA_IFNAME, b'')),
+            'flags': [name for bit, name in LINK_FLAGS if flags & bit],
+            'mtu': _u32(attributes[IFLA_MTU]) if IFLA_MTU in attributes else None,
+            'operstate': None,
+            'address': None,
+            'addr_info': []}
+
+    if IFLA_OPERSTATE in attributes:
+        state = bytearray(attributes[IFLA_OPERSTATE])[0]
+        link['operstate'] = OPER_STATES[state] if state < len(OPER_STATES) else str(state)
+    if IFLA_ADDRESS in attributes:
+        link['address'] = ':'.join('{:02x}'.format(byte) for byte in bytearray(attributes[IFLA_ADDRESS]))
+    if IFLA_STATS64 in attributes and len(attributes[IFLA_STATS64]) >= LINKSTATS64.size:
+        (rx_packets, tx_packets, rx_bytes, tx_bytes, rx_errors, tx_errors, rx_dropped,
+         tx_dropped) = LINKSTATS64.unpack_from(attributes[IFLA_STATS64])
+        link['stats64'] = {'rx': {'bytes': rx_bytes, 'packets': rx_packets, 'errors': rx_errors,
+                                  'dropped': rx_dropped},
+                           'tx': {'bytes': tx_bytes, 'packets': tx_packets, 'errors': tx_errors,
+                                  'dropped': tx_dropped}}
+
+    return link
+#---
+
+
+def decode_address(payload):
+    """
+    Decodes an RTM_NEWADDR payload.  Keys follow the names used in 'addr_info' by 'ip -json address'.
+
+    :returns: tuple - (interface index, dict)
+    """
+    family, prefixlen, _, scope, index = IFADDRMSG.unpack_from(payload)
+    attributes = parse_attributes(payload, IFADDRMSG.size)
+
+    local = attributes.get(IFA_LOCAL, attributes.get(IFA_ADDRESS))
+    address = {'family': ADDRESS_FAMILIES.get(family, str(family)),
+               'local': _address(family, local) if local else None,
+               'prefixlen': prefixlen,
+               'scope': ROUTE_SCOPES.get(scope, str(scope))}
+    if IFA_BROADCAST in attributes:
+        address['broadcast'] = _address(family, attributes[IFA_BROADCAST])
+    if IFA_LABEL in attributes:
+        address['label'] = _string(attributes[IFA_LABEL])
+
+    return index, address
+#---
+
+
+def _setns(fd):
+    """
+    Moves the calling thread into the network namespace referred to by an open file descriptor.
+
+    """
+    try:
+        if hasattr(os, 'setns'):
+            os.setns(fd, CLONE_NEWNET)
+            return
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.setns(fd, CLONE_NEWNET) != 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+    except OSError as err:
+        raise NetlinkError('Cannot switch network namespace: {}'.format(err.strerror), err.errno)
+#---
+
+
+def open_socket(groups=0, netns=None):
+    """
+    Opens a NETLINK_ROUTE socket.  A socket opened inside a network namespace keeps talking to that namespace, so only
+    the calling thread switches namespace, and only while the socket is created.
+
+    :param groups: Multicast groups (RTMGRP_*) to subscribe to
+    :param netns: Name of the network namespace (as given to 'ip netns add'), or None for the current one
+    :returns: socket
+    """
+    if netns is None:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+        sock.bind((0, groups))
+        return sock
+
+    try:
+        target = open(os.path.join(NETNS_RUN_DIR, netns))
+    except (IOError, OSError) as err:
+        raise NetlinkError('Cannot open network namespace "{}": {}'.format(netns, err.strerror), err.errno)
+
+    with target, open('/proc/thread-self/ns/net') as own:
+        _setns(target.fileno())
+        try:
+            return open_socket(groups)
+        finally:
+            _setns(own.fileno())
+#---
+
+
+class NetlinkSocket(object):
+    """
+    A NETLINK_ROUTE socket able to request and read back dumps.
+
+    """
+    def __init__(self, sock=None, buffer_size=65536, groups=0, netns=None):
+        """
+        Constructor
+
+        :param sock: Optional already opened socket (anything with send() and recv()), mainly so recorded dumps can
+                     be replayed
+        :param buffer_size: Size of each read from the socket
+        :param groups: Multicast groups (RTMGRP_*) to subscribe to, for reading events with meth:events
+        :param netns: Name of the network namespace to talk to (see func:open_socket), None for the current one
+
+        """
+        if sock is None:
+            sock = open_socket(groups, netns)
+        self.sock = sock
+        self.netns = netns
+        self.buffer_size = buffer_size
+        self.sequence = 0
+    #---
+
+
+    def close(self):
+        self.sock.close()
+    #---
+
+
+    def __enter__(self):
+        return self
+    #---
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+    #---
+
+
+    def dump(self, msg_type, header):
+        """
+        Requests a dump and reads every message belonging to it, one socket read at a time.
+
+        :param msg_type: One of RTM_GETROUTE, RTM_GETRULE, RTM_GETLINK or RTM_GETADDR
+        :param header: Packed family specific header (rtmsg, fib_rule_hdr, ifinfomsg, ifaddrmsg)
+        :returns: generator of (message type, flags, payload bytes) tuples
+        """
+        self.sequence += 1
+        self.sock.send(NLMSGHDR.pack(NLMSGHDR.size + len(header), msg_type, NLM_F_REQUEST | NLM_F_DUMP,
+                                     self.sequence, 0) + header)
+
+        while True:
+            data = self.sock.recv(self.buffer_size)
+            if not data:
+                return
+            for message in parse_messages(data):
+                msg_type, _, payload = message
+                if msg_type == NLMSG_DONE:
+                    return
+                elif msg_type == NLMSG_ERROR:
+                    error = -struct.unpack('=i', payload[:4])[0]
+                    if error:
+                        raise NetlinkError(os.strerror(error), error)
+                elif msg_type != NLMSG_NOOP:
+                    yield message
+    #---
+
+
+    def events(self):
+        """
+        Reads notifications from the subscribed multicast groups, forever.
+
+        :returns: generator of (message type, flags, payload bytes) tuples
+        """
+        while True:
+            data = self.sock.recv(self.buffer_size)
+            if not data:
+                return
+            for message in parse_messages(data):
+                if message[0] not in (NLMSG_NOOP, NLMSG_DONE, NLMSG_ERROR):
+                    yield message
+    #---
+
+
+    def route_events(self, link_names=None):
+        """
+        Reads route notifications (the socket must be subscribed to RTMGRP_IPV4_ROUTE and/or RTMGRP_IPV6_ROUTE) and
+        decodes them into tokens.  Deletions start with a 'del' action token, as they would in 'ip route' input.
+
+        :param link_names: dict of interface index -> interface name (dumped from a separate socket when None)
+        :returns: generator of lists of str tokens
+        """
+        if link_names is None:
+            with NetlinkSocket(netns=self.netns) as sock:
+                link_names = {link['ifindex']: link['ifname'] for link in sock.links()}
+
+        for msg_type, _, payload in self.events():
+            if msg_type not in (RTM_NEWROUTE, RTM_DELROUTE):
+                continue
+            if decode_route_table(payload)[1] & RTM_F_CLONED:
+                continue
+            tokens = decode_route(payload, link_names)
+            if msg_type == RTM_DELROUTE:
+                tokens.insert(0, 'del')
+            yield tokens
+    #---
+
+
+    def interface_events(self):
+        """
+        Reads link and address notifications (the socket must be subscribed to RTMGRP_LINK and/or the
+        RTMGRP_*_IFADDR groups), reporting which interface each one concerns.
+
+        :returns: generator of (interface index, interface name) tuples; the name is None for address changes
+        """
+        for msg_type, _, payload in self.events():
+            if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+                link = decode_link(payload)
+                yield link['ifindex'], link['ifname']
+            elif msg_type in (RTM_NEWADDR, RTM_DELADDR):
+                yield IFADDRMSG.unpack_from(payload)[4], None
+    #---
+
+
+    def links(self):
+        """
+        Dumps every link, without addresses.
+
+        :returns: list of dicts (see func:decode_link)
+        """
+        return [decode_link(payload) for msg_type, _, payload in
+                self.dump(RTM_GETLINK, IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)) if msg_type == RTM_NEWLINK]
+    #---
+
+
+    def interfaces(self):
+        """
+        Dumps every link along with its addresses, in the layout of 'ip -json address'.
+
+        :returns: list of dicts (see func:decode_link)
+        """
+        links = self.links()
+        by_index = {link['ifindex']: link for link in links}
+
+        for msg_type, _, payload in self.dump(RTM_GETADDR, IFADDRMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)):
+            if msg_type == RTM_NEWADDR:
+                index, address = decode_address(payload)
+                if index in by_index:
+                    by_index[index]['addr_info'].append(address)
+
+        return links
+    #---
+
+
+    def iter_routes(self, family=socket.AF_INET, table=RT_TABLE_MAIN):
+        """
+        Dumps routes as token lists, filtered the way 'ip route show' filters them, decoding each as it's read.
+
+        :param family: socket.AF_INET or socket.AF_INET6
+        :param table: Table id to show, or None for every table
+        :returns: generator of lists of str tokens
+        """
+        link_names = {link['ifindex']: link['ifname'] for link in self.links()}
+
+        for msg_type, _, payload in self.dump(RTM_GETROUTE, RTMSG.pack(family, 0, 0, 0, 0, 0, 0, 0, 0)):
+            if msg_type != RTM_NEWROUTE:
+                continue
+            route_table, flags = decode_route_table(payload)
+            if flags & RTM_F_CLONED or (table is not None and route_table != table):
+                continue
+            yield decode_route(payload, link_names, RT_TABLE_MAIN if table is None else table)
+    #---
+
+
+    def rules(self, family=socket.AF_INET):
+        """
+        Dumps the routing policy rules as token lists, in priority order (as 'ip rule' lists them).
+
+        :param family: socket.AF_INET or socket.AF_INET6
+        :returns: list of lists of str tokens
+        """
+        return [decode_rule(payload) for msg_type, _, payload in
+                self.dump(RTM_GETRULE, FIBRULEHDR.pack(family, 0, 0, 0, 0, 0, 0, 0, 0)) if msg_type == RTM_NEWRULE]
+    #---
+
+
+    def routes(self, family=socket.AF_INET, table=RT_TABLE_MAIN):
+        """
+        Dumps routes as token lists (see meth:iter_routes).
+
+        :returns: list of lists of str tokens
+        """
+        return list(self.iter_routes(family, table))
+    #---
+#---
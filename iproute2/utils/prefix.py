@@ -0,0 +1,167 @@
+# coding=utf-8
+#
+# NAME:         prefix.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Converts the addresses and prefixes printed by iproute2 into integers, which is what the lookup structures work
+# with.
+#
+
+import socket
+import struct
+
+from iproute2.utils import lrucache
+
+IP_V4 = 4
+IP_V6 = 6
+
+# Width of an address, in bits, for each family
+FAMILY_BITS = {IP_V4: 32, IP_V6: 128}
+
+# What 'default' stands for in each family
+DEFAULT_PREFIXES = {IP_V4: '0.0.0.0/0', IP_V6: '::/0'}
+
+# Keywords of 'ip route' output which are followed by an address of the route's own family
+ADDRESS_KEYWORDS = frozenset(('via', 'src', 'from'))
+
+# Prefixes repeat heavily between routes and between reloads of the same table
+prefix_cache = lrucache.LRUCache(65536)
+
+
+# Exceptions
+class PrefixError(ValueError):
+    pass
+
+
+def parse_address(address):
+    """
+    Converts an IPv4 or IPv6 address into an integer.
+
+    :param address: Address in its textual form ('10.0.0.1', 'fe80::1')
+    :type address: str
+
+    :returns: tuple - (family, integer address)
+    """
+    try:
+        if ':' in address:
+            high, low = struct.unpack('!QQ', socket.inet_pton(socket.AF_INET6, address))
+            return IP_V6, (high << 64) | low
+        else:
+            return IP_V4, struct.unpack('!I', socket.inet_pton(socket.AF_INET, address))[0]
+    except (socket.error, ValueError, TypeError):
+        raise PrefixError('Invalid address: {}'.format(address))
+#---
+
+
+def tokens_family(tokens, family=None):
+    """
+    Works out the address family of a tokenized route, which its prefix doesn't tell when it's 'default'.  'ip route
+    show table all' lists both families together, so this goes by the addresses in the route (its gateway or source)
+    and by 'pref', which iproute2 only prints for IPv6 routes.
+
+    :param tokens: list of str tokens of one route
+    :param family: The family, if the caller already knows it (it's then returned as is)
+
+    :returns: int - IP_V4 or IP_V6; IP_V4 when nothing in the route tells
+    """
+    if family is not None:
+        return family
+    for position, token in enumerate(tokens):
+        if token == 'pref':
+            return IP_V6
+        if token in ADDRESS_KEYWORDS and position + 1 < len(tokens):
+            # 'via inet6 fe80::1' is an IPv4 route through an IPv6 gateway, and reads as IPv4 here too
+            return IP_V6 if ':' in tokens[position + 1] else IP_V4
+    return IP_V4
+#---
+
+
+def parse_prefix(prefix, family=IP_V4):
+    """
+    Converts a prefix as printed by 'ip route' into an integer network.  Prefixes without a length are host routes.
+
+    :param prefix: Prefix in CIDR notation, a bare address or 'default'
+    :type prefix: str
+    :param family: Family 'default' belongs to (see func:tokens_family)
+
+    :returns: tuple - (family, integer network, prefix length)
+    """
+    if prefix == 'default':
+        return family, 0, 0
+
+    address, _, length = prefix.partition('/')
+    family, network = parse_address(address)
+    bits = FAMILY_BITS[family]
+
+    if length:
+        try:
+            length = int(length)
+        except ValueError:
+            raise PrefixError('Invalid prefix length: {}'.format(prefix))
+        if not 0 <= length <= bits:
+            raise PrefixError('Invalid prefix length: {}'.format(prefix))
+    else:
+        length = bits
+
+    # Drop any host bits so the network always matches its position in the lookup structures
+    network &= ((1 << bits) - 1) ^ ((1 << (bits - length)) - 1)
+
+    return family, network, length
+#---
+
+
+def normalize_prefix(prefix, family=IP_V4):
+    """
+    Cached version of func:parse_prefix.  Repeated prefixes share the same tuple.
+
+    :param prefix: Prefix in CIDR notation, a bare address or 'default'
+    :type prefix: str
+    :param family: Family 'default' belongs to (see func:tokens_family)
+
+    :returns: tuple - (family, integer network, prefix length)
+    """
+    if prefix == 'default':
+        prefix = DEFAULT_PREFIXES[family]
+    network = prefix_cache.get(prefix)
+    if network is None:
+        network = parse_prefix(prefix)
+        prefix_cache.put(prefix, network)
+    return network
+#---
+
+
+def format_address(family, address):
+    """
+    Converts an integer address back into its textual form (the reverse of func:parse_address).
+
+    :returns: str
+    """
+    if family == IP_V6:
+        return socket.inet_ntop(socket.AF_INET6, struct.pack('!QQ', address >> 64, address & 0xffffffffffffffff))
+    return socket.inet_ntoa(struct.pack('!I', address))
+#---
+
+
+def format_prefix(family, network, length):
+    """
+    Converts an integer network back into CIDR notation (the reverse of func:parse_prefix).
+
+    :returns: str
+    """
+    return '{}/{}'.format(format_address(family, network), length)
+#---
@@ -0,0 +1,48 @@
+# coding=utf-8
+#
+# NAME:         conftest.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Fixtures shared by the tests.  Tests taking 'parser' (or 'load') run once with each route parser: the routing
+# grammar (None) and the single-pass routerecord.parse_route.
+#
+
+import pytest
+
+from iproute2.route import routerecord
+from iproute2.routingtable import RoutingTable
+
+
+@pytest.fixture(params=[None, routerecord.parse_route], ids=['grammar', 'record'])
+def parser(request):
+    return request.param
+#---
+
+
+@pytest.fixture
+def load(parser):
+    """
+    Loads 'ip route' text into a RoutingTable using the parser under test.
+
+    """
+    def load(text, **kwargs):
+        table = RoutingTable(parser=parser, **kwargs)
+        table.load(text)
+        return table
+    return load
+#---
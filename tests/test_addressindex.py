@@ -0,0 +1,216 @@
+# coding=utf-8
+#
+# NAME:         test_addressindex.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of AddressIndex, fed by a static link list which is changed between refreshes.
+#
+
+import copy
+
+import pytest
+
+from iproute2 import addressindex
+from iproute2.addressindex import AddressIndex
+from iproute2.interface import AddressError, InterfaceError
+from iproute2.utils import cmd
+
+
+def address(family, local, prefixlen, scope='global'):
+    return {'family': family, 'local': local, 'prefixlen': prefixlen, 'scope': scope}
+#---
+
+
+def make_links():
+    return [
+        {'ifindex': 1, 'ifname': 'eth0', 'address': '52:54:00:00:00:01',
+         'addr_info': [address('inet', '192.0.2.10', 24), address('inet6', '2001:db8::10', 64),
+                       address('inet6', 'fe80::1', 64, 'link')]},
+        {'ifindex': 2, 'ifname': 'eth1', 'address': '52:54:00:00:00:02',
+         'addr_info': [address('inet', '192.0.2.129', 25), address('inet', '198.51.100.1', 24),
+                       address('inet6', 'fe80::2', 64, 'link')]},
+        # A VLAN on eth1, sharing its MAC, with one of its addresses configured again by mistake
+        {'ifindex': 3, 'ifname': 'eth1.10', 'address': '52:54:00:00:00:02',
+         'addr_info': [address('inet', '198.51.100.1', 24), address('inet6', 'fe80::2', 64, 'link')]},
+    ]
+#---
+
+
+class Fetch(object):
+    """
+    Stands in for cmd.interfaces, handing out a fresh copy of 'links' on each dump.
+
+    """
+    def __init__(self):
+        self.links = make_links()
+
+    def __call__(self):
+        return copy.deepcopy(self.links)
+
+    def link(self, name):
+        return [link for link in self.links if link['ifname'] == name][0]
+#---
+
+
+# Addresses the index is queried with, covering each subnet and none
+QUERIES = ['192.0.2.10', '192.0.2.77', '192.0.2.200', '198.51.100.1', '198.51.100.7', '203.0.113.1',
+           '2001:db8::10', '2001:db8::99', 'fe80::2', '2001:db9::1']
+
+
+def state(index):
+    """
+    Everything an index answers, for comparing an incrementally refreshed index with a freshly built one.
+
+    """
+    len(index)      # Reads the first dump of a new index
+    return (dict((key, sorted(owners)) for key, owners in index.owners.items()),
+            dict((mac, sorted(names)) for mac, names in index.macs.items()),
+            sorted(index.duplicated),
+            [sorted(found) for found in index.containing_many(QUERIES)],
+            sorted(value for tree in index.subnets.values() for node in tree.nodes() for value in node.values),
+            dict((family, len(tree)) for family, tree in index.subnets.items()))
+#---
+
+
+def test_owner():
+    index = AddressIndex(fetch=Fetch())
+
+    assert index.owner('192.0.2.10') == 'eth0'
+    assert index.owner('2001:db8::10') == 'eth0'
+    assert index.owner('192.0.2.99') is None
+    assert '192.0.2.129' in index and '192.0.2.99' not in index
+    assert [owner.ifname for owner in index.owners_of('198.51.100.1')] == ['eth1', 'eth1.10']
+    assert index.owners_of('203.0.113.1') == ()
+    assert len(index) == 6
+    with pytest.raises(AddressError):
+        index.owner('192.0.2.300')
+#---
+
+
+def test_containing():
+    index = AddressIndex(fetch=Fetch())
+
+    assert [(found.ifname, found.local) for found in index.containing('192.0.2.77')] == [('eth0', '192.0.2.10')]
+    # eth1's /25 is more specific than eth0's /24
+    assert [found.ifname for found in index.containing('192.0.2.200')] == ['eth1']
+    assert [sorted(found.ifname for found in owners) for owners in index.containing_many(QUERIES)] == \
+           [['eth0'], ['eth0'], ['eth1'], ['eth1', 'eth1.10'], ['eth1', 'eth1.10'], [],
+            ['eth0'], ['eth0'], ['eth0', 'eth1', 'eth1.10'], []]
+#---
+
+
+def test_duplicates():
+    index = AddressIndex(fetch=Fetch())
+
+    assert sorted(index.duplicates()) == ['198.51.100.1']
+    assert [owner.ifname for owner in index.duplicates()['198.51.100.1']] == ['eth1', 'eth1.10']
+    # Link scope addresses only clash on the same link, so they're left out unless asked for
+    assert sorted(index.duplicates(link_local=True)) == ['198.51.100.1', 'fe80::2']
+#---
+
+
+def test_mac_owners():
+    index = AddressIndex(fetch=Fetch())
+
+    assert index.mac_owners('52:54:00:00:00:01') == ('eth0',)
+    assert index.mac_owners('52:54:00:00:00:02') == ('eth1', 'eth1.10')
+    assert index.mac_owners('52:54:00:00:00:02'.upper()) == ('eth1', 'eth1.10')
+    assert index.mac_owners('52:54:00:00:00:99') == ()
+#---
+
+
+def test_incremental_refresh():
+    fetch = Fetch()
+    index = AddressIndex(fetch=fetch)
+    assert index.refresh() == set(['eth0', 'eth1', 'eth1.10'])
+    assert index.refresh() == set()
+    eth0 = index.owners_of('192.0.2.10')
+
+    # The duplicate is removed, eth1 moves to another subnet and a new interface turns up
+    fetch.link('eth1.10')['addr_info'] = [address('inet6', 'fe80::2', 64, 'link')]
+    fetch.link('eth1')['addr_info'][0] = address('inet', '203.0.113.1', 24)
+    fetch.links.append({'ifindex': 4, 'ifname': 'eth2', 'address': '52:54:00:00:00:04',
+                        'addr_info': [address('inet', '192.0.2.10', 32)]})
+    assert index.refresh() == set(['eth1', 'eth1.10', 'eth2'])
+    assert index.owners_of('192.0.2.10')[0] is eth0[0]      # Unchanged interfaces keep their entries
+    assert sorted(index.duplicates()) == ['192.0.2.10']
+    assert index.owner('192.0.2.129') is None
+    assert [found.ifname for found in index.containing('203.0.113.9')] == ['eth1']
+    assert state(index) == state(AddressIndex(fetch=fetch))
+
+    # Interfaces disappear, or change their MAC
+    fetch.links = [link for link in fetch.links if link['ifname'] not in ('eth1', 'eth2')]
+    fetch.link('eth1.10')['address'] = '52:54:00:00:00:10'
+    assert index.refresh() == set(['eth1', 'eth1.10', 'eth2'])
+    assert index.duplicates(link_local=True) == {}
+    assert index.mac_owners('52:54:00:00:00:02') == ()
+    assert index.mac_owners('52:54:00:00:00:10') == ('eth1.10',)
+    assert state(index) == state(AddressIndex(fetch=fetch))
+
+    fetch.links = []
+    index.refresh()
+    assert state(index) == state(AddressIndex(fetch=fetch))
+    assert len(index) == 0 and index.containing_many(QUERIES) == [()] * len(QUERIES)
+#---
+
+
+def test_ttl_and_invalidation(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(addressindex, '_clock', lambda: now[0])
+    fetch = Fetch()
+    index = AddressIndex(ttl=5, fetch=fetch)
+
+    index.owner('192.0.2.10')
+    now[0] += 4.9
+    index.owner('192.0.2.10')
+    assert index.loads == 1
+    now[0] += 0.1
+    fetch.link('eth0')['addr_info'] = []
+    assert index.owner('192.0.2.10') is None
+    assert index.loads == 2
+
+    index = AddressIndex(fetch=fetch)
+    index.refresh()
+    now[0] += 10 ** 6
+    index.owner('192.0.2.10')
+    assert index.loads == 1         # Without a TTL only a change refreshes the index
+
+    index.follow([(1, None)])
+    index.owner('192.0.2.10')
+    assert index.loads == 2
+    index.watch(iter([(2, 'eth1')])).join(5)
+    index.owner('192.0.2.10')
+    assert index.loads == 3
+#---
+
+
+def test_fetch_error():
+    fetch = Fetch()
+    index = AddressIndex(fetch=fetch)
+    index.refresh()
+
+    def fail():
+        raise cmd.IPCommandError('Cannot open netlink socket', 1)
+
+    index.fetch = fail
+    with pytest.raises(InterfaceError):
+        index.refresh()
+    # The index keeps answering from what it had
+    index.fetch = fetch
+    assert index.owner('192.0.2.10') == 'eth0' and index.loads == 1
+#---
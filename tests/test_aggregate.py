@@ -0,0 +1,85 @@
+# coding=utf-8
+#
+# NAME:         test_aggregate.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of route aggregation (RoutingTable.aggregate and route.aggregate), with both route parsers.
+#
+
+import random
+
+import pytest
+
+
+def prefixes(table):
+    return sorted((str(route.PREFIX), route.table) for route in table.routes())
+#---
+
+
+def test_siblings_merge(load):
+    table = load('10.0.0.0/25 via 192.0.2.1 dev eth0\n'
+                 '10.0.0.128/26 via 192.0.2.1 dev eth0\n'
+                 '10.0.0.192/26 via 192.0.2.1 dev eth0\n'
+                 '10.0.1.0/24 via 192.0.2.2 dev eth0')
+    aggregated = table.aggregate()
+
+    assert prefixes(aggregated) == [('10.0.0.0/24', None), ('10.0.1.0/24', None)]
+    assert aggregated.lookup('10.0.0.200').via == '192.0.2.1'
+    assert prefixes(table) != prefixes(aggregated)      # The original table is left alone
+#---
+
+
+def test_covered_prefixes_dropped(load):
+    table = load('10.0.0.0/8 via 192.0.2.1 dev eth0\n'
+                 '10.1.0.0/16 via 192.0.2.1 dev eth0\n'
+                 '10.2.0.0/16 via 192.0.2.2 dev eth0\n'
+                 '10.2.3.0/24 via 192.0.2.1 dev eth0')
+    assert prefixes(table.aggregate()) == [('10.0.0.0/8', None), ('10.2.0.0/16', None), ('10.2.3.0/24', None)]
+#---
+
+
+def test_signatures_must_match(load):
+    table = load('10.0.0.0/25 via 192.0.2.1 dev eth0\n'
+                 '10.0.0.128/25 via 192.0.2.1 dev eth0 mtu 1400\n'
+                 '10.0.1.0/25 via 192.0.2.1 dev eth0 table 100\n'
+                 '10.0.1.128/25 via 192.0.2.1 dev eth0\n'
+                 '10.0.2.0/25 via 192.0.2.1 dev eth0\n'
+                 '10.0.2.0/25 via 192.0.2.9 dev eth0 metric 50\n'
+                 '10.0.2.128/25 via 192.0.2.1 dev eth0')
+    # Different options, different tables and a prefix with a second route all keep their prefixes apart
+    assert len(list(table.aggregate().routes())) == 7
+#---
+
+
+def test_forwarding_unchanged(load):
+    rng = random.Random(23)
+    lines = ['default via 192.0.2.254 dev eth0']
+    for _ in range(300):
+        length = rng.randint(16, 26)
+        network = (10 << 24 | rng.getrandbits(14) << 10) & ~((1 << (32 - length)) - 1)
+        lines.append('{}.{}.{}.{}/{} via 192.0.2.{} dev eth0'.format(network >> 24, network >> 16 & 255,
+                                                                     network >> 8 & 255, network & 255, length,
+                                                                     rng.randint(1, 2)))
+    table = load('\n'.join(lines))
+    aggregated = table.aggregate()
+
+    assert len(list(aggregated.routes())) < len(list(table.routes()))
+    addresses = ['10.{}.{}.{}'.format(rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+                 for _ in range(2000)]
+    assert aggregated.lookup_many(addresses) == table.lookup_many(addresses)
+#---
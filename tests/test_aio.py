@@ -0,0 +1,192 @@
+# coding=utf-8
+#
+# NAME:         test_aio.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of RoutingTable.aload, the asyncio Interface methods and aiocmd, with canned 'ip' output.
+#
+
+import json
+import sys
+
+import pytest
+
+if sys.version_info < (3, 7):
+    pytest.skip('The asyncio methods need Python 3.7+', allow_module_level=True)
+
+import asyncio
+
+from iproute2.interface import AddressError, Interface, InterfaceError, InterfaceRegistry
+from iproute2.route import routerecord
+from iproute2.routingtable import RoutingTable
+from iproute2.utils import aiocmd
+from iproute2.utils import cmd
+
+ROUTES6 = '''default via fe80::1 dev eth0 proto ra metric 1024 pref medium
+2001:db8::/64 dev eth0 proto kernel metric 256'''
+ROUTES6_JSON = json.dumps([{'dst': 'default', 'gateway': 'fe80::1', 'dev': 'eth0', 'protocol': 'ra', 'metric': 1024},
+                           {'dst': '2001:db8::/64', 'dev': 'eth0', 'protocol': 'kernel', 'metric': 256}])
+
+LINKS = [{'ifindex': 1, 'ifname': 'eth0', 'address': '52:54:00:00:00:01', 'operstate': 'UP',
+          'addr_info': [{'family': 'inet', 'local': '192.0.2.10', 'prefixlen': 24, 'scope': 'global'}]}]
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+#---
+
+
+class FakeIP(object):
+    """
+    Stands in for aiocmd._run, answering the commands in 'outputs' (arguments after the path to ip, joined by
+    spaces -> output, or an exception to raise) and recording every command run.
+
+    """
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.commands = []
+
+    def __call__(self, ip_cmd, timeout):
+        command = ' '.join(ip_cmd[1:])
+        self.commands.append(command)
+        result = asyncio.get_event_loop().create_future()
+        output = self.outputs.get(command)
+        if output is None:
+            result.set_exception(AssertionError('Unexpected command: ' + command))
+        elif isinstance(output, Exception):
+            result.set_exception(output)
+        else:
+            result.set_result(output)
+        return result
+#---
+
+
+@pytest.fixture
+def fake_ip(monkeypatch):
+    monkeypatch.setattr(cmd, 'backend', cmd.BACKEND_IP)
+    monkeypatch.setattr(cmd, '_json_support', {})
+
+    def install(outputs):
+        fake = FakeIP(outputs)
+        monkeypatch.setattr(aiocmd, '_run', fake)
+        return fake
+
+    return install
+#---
+
+
+@pytest.mark.parametrize('parser', [None, routerecord.parse_route])
+def test_aload_text(parser, fake_ip):
+    ip = fake_ip({})
+    table = run(RoutingTable(parser=parser).aload(ROUTES6))
+
+    assert str(table.lookup('2001:db8::5').dev) == 'eth0'
+    assert run(RoutingTable(parser=parser).aload(ROUTES6_JSON)).lookup('2001:db9::1').via == 'fe80::1'
+    assert ip.commands == []
+#---
+
+
+@pytest.mark.parametrize('parser, json_supported, command', [
+    (None, True, '-6 route'),
+    (routerecord.parse_route, False, '-6 route'),
+    (routerecord.parse_route, True, '-json -6 route'),
+])
+def test_aload_family6(parser, json_supported, command, fake_ip):
+    ip = fake_ip({'-json link show lo': '[{"ifname": "lo"}]' if json_supported else 'Option "-json" is unknown',
+                  '-6 route': ROUTES6, '-json -6 route': ROUTES6_JSON})
+    table = run(RoutingTable(parser=parser).aload(family=6, timeout=5))
+
+    assert ip.commands[-1] == command
+    assert table.family == 6
+    # 'default' is only ::/0 because the table knows it holds IPv6 routes
+    assert str(table['::/0'].via) == 'fe80::1'
+    assert table.lookup('2001:db9::1').via == 'fe80::1'
+    assert run(RoutingTable(parser=parser).aload(family=6, use_json=False)).lookup('2001:db8::1').dev == 'eth0'
+#---
+
+
+def test_ainterfaces(fake_ip):
+    ip = fake_ip({'-json link show lo': '[]', '-json address show dev eth0': json.dumps([{'ifindex': 1,
+                                                                                           'ifname': 'eth0'}])})
+    assert run(cmd.ainterfaces('eth0')) == [{'ifindex': 1, 'ifname': 'eth0', 'flags': [], 'mtu': None,
+                                             'operstate': None, 'address': None, 'addr_info': []}]
+    assert ip.commands == ['-json link show lo', '-json address show dev eth0']
+
+    ip = fake_ip({'address show': '1: lo: <LOOPBACK,UP> mtu 65536 state UNKNOWN\n    link/loopback 00:00:00:00:00:00'})
+    cmd._json_support['/sbin/ip'] = False
+    assert [link['ifname'] for link in run(cmd.ainterfaces())] == ['lo']
+    assert ip.commands == ['address show']
+#---
+
+
+def test_interface_reads_registry(fake_ip):
+    ip = fake_ip({})
+    registry = InterfaceRegistry(fetch=lambda: list(LINKS))
+
+    eth0 = run(Interface.aopen('eth0', registry))
+    assert eth0.registry is registry
+    assert run(eth0.aGetAddresses())['v4'] == [('192.0.2.10', '24')]
+    assert run(eth0.aStatus(simple=True)) == 'UP'
+    with pytest.raises(InterfaceError):
+        run(Interface.aopen('eth9', registry))
+    assert ip.commands == []
+#---
+
+
+def test_interface_commands(fake_ip):
+    ip = fake_ip({'address add 192.0.2.20/24 dev eth0': '',
+                  'address add 192.0.2.10/24 dev eth0': cmd.IPCommandError('RTNETLINK answers: File exists', 254),
+                  'link set eth0 down': '',
+                  'link show eth0': '2: eth0: <BROADCAST,MULTICAST> mtu 1500 state DOWN mode DEFAULT'})
+    registry = InterfaceRegistry(fetch=lambda: list(LINKS))
+    eth0 = run(Interface.aopen('eth0', registry))
+
+    assert run(eth0.aAddAddress('192.0.2.20/24'))['v4'] == [('192.0.2.10', '24')]
+    assert registry.loads == 2          # The change invalidated eth0's entry
+    with pytest.raises(AddressError):
+        run(eth0.aAddAddress('192.0.2.10/24'))
+    run(eth0.aDown())
+    assert registry.loads == 2 and registry.expires == {}
+    assert run(eth0.aStatus()).startswith('2: eth0:')
+    assert ip.commands == ['address add 192.0.2.20/24 dev eth0', 'address add 192.0.2.10/24 dev eth0',
+                           'link set eth0 down', 'link show eth0']
+#---
+
+
+class Discard(Exception):
+    pass
+
+
+def test_interface_commands_queue_on_batch(fake_ip):
+    ip = fake_ip({})
+    registry = InterfaceRegistry(fetch=lambda: list(LINKS))
+    eth0 = run(Interface.aopen('eth0', registry))
+
+    # Leaving the block by raising discards the batch rather than running 'ip -batch'
+    with pytest.raises(Discard):
+        with cmd.batch() as batch:
+            assert run(eth0.aAddAddress('192.0.2.20/24')) is None
+            assert run(eth0.aDelAddress('192.0.2.10/24')) is None
+            run(eth0.aUp())
+            queued = list(batch.commands)
+            raise Discard()
+
+    assert queued == ['address add "192.0.2.20/24" dev "eth0"', 'address del "192.0.2.10/24" dev "eth0"',
+                      'link set "eth0" up']
+    assert ip.commands == []
+#---
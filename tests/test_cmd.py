@@ -0,0 +1,104 @@
+# coding=utf-8
+#
+# NAME:         test_cmd.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of utils.cmd and utils.aiocmd, run against stand-in 'ip' scripts.
+#
+
+import asyncio
+import os
+import stat
+
+import pytest
+
+from iproute2.utils import aiocmd
+from iproute2.utils import cmd
+
+MULTIPATH_TABLE = '''10.0.0.0/8 dev eth0 scope link
+10.1.0.0/16 proto static metric 20
+\tnexthop via 10.0.0.2 dev eth0 weight 1
+\tnexthop via 10.0.0.3 dev eth0 weight 2
+'''
+
+
+def fake_ip(directory, script):
+    """
+    Writes an executable shell script standing in for 'ip'.
+
+    :returns: str - its path
+    """
+    path = os.path.join(str(directory), 'ip')
+    with open(path, 'w') as ip_file:
+        ip_file.write('#!/bin/sh\n' + script)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+#---
+
+
+def test_aroutes_joins_multipath(tmp_path):
+    path = fake_ip(tmp_path, "cat <<'EOF'\n" + MULTIPATH_TABLE + "EOF\n")
+    routes = asyncio.run(aiocmd.aroutes(path_to_ip=path))
+
+    assert len(routes) == 2
+    assert routes[1][:5] == ['10.1.0.0/16', 'proto', 'static', 'metric', '20']
+    assert routes[1].count('nexthop') == 2
+#---
+
+
+def test_batch_reports_failed_commands(tmp_path):
+    path = fake_ip(tmp_path, "cat >/dev/null\n"
+                             "echo 'RTNETLINK answers: File exists' >&2\n"
+                             "echo 'Command failed -:2' >&2\n"
+                             "exit 1\n")
+    batch = cmd.Batch(path_to_ip=path)
+    batch.route_add('10.0.0.0/8 dev eth0')
+    batch.route_add('10.1.0.0/16 dev eth0')
+    batch.route_add('10.2.0.0/16 dev eth0')
+    results = batch.commit()
+
+    assert [result.ok for result in results] == [True, False, True]
+    assert results[1].error == 'RTNETLINK answers: File exists'
+#---
+
+
+def test_batch_stops_at_failure_without_force(tmp_path):
+    path = fake_ip(tmp_path, "cat >/dev/null\necho 'Command failed -:1' >&2\nexit 1\n")
+    batch = cmd.Batch(path_to_ip=path, force=False)
+    batch.route_add('10.0.0.0/8 dev eth0')
+    batch.route_add('10.1.0.0/16 dev eth0')
+
+    assert [result.ok for result in batch.commit()] == [False, None]
+#---
+
+
+@pytest.mark.parametrize('script', ["cat >/dev/null\n"
+                                    "echo 'Cannot open network namespace \"nowhere\": No such file' >&2\n"
+                                    "exit 255\n",
+                                    "exit 1\n"])
+def test_batch_raises_when_ip_fails_outright(tmp_path, script):
+    called = []
+    batch = cmd.Batch(path_to_ip=fake_ip(tmp_path, script))
+    batch.route_add('10.0.0.0/8 dev eth0')
+    batch.on_commit(called.append, True)
+
+    with pytest.raises(cmd.IPCommandError):
+        batch.commit()
+    assert [result.ok for result in batch.results] == [False]
+    assert called == [True]
+#---
@@ -0,0 +1,120 @@
+# coding=utf-8
+#
+# NAME:         test_collector.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of RouteCollector, fetching from canned per-target tables.
+#
+
+import pytest
+
+from iproute2 import collector
+from iproute2.collector import RouteCollector
+from iproute2.route import routegrammar
+from iproute2.utils import cmd
+
+TABLES = {
+    'red': 'default via 192.0.2.1 dev eth0\n192.0.2.0/24 dev eth0 proto kernel scope link src 192.0.2.10',
+    'blue': 'default via 198.51.100.1 dev eth1\n10.0.0.0/8 via 198.51.100.2 dev eth1',
+    'green': 'default via 203.0.113.1 dev eth2',
+}
+
+
+def fetch(target):
+    if target == 'down':
+        raise cmd.IPCommandError('Cannot open network namespace "down"', 1)
+    if target == 'garbled':
+        return iter(['10.0.0.300/8 dev eth0'])
+    return iter(TABLES[target].splitlines())
+#---
+
+
+def test_collect(parser):
+    tables = RouteCollector(workers=2, parser=parser, fetch=fetch).collect(sorted(TABLES))
+
+    assert sorted(tables) == ['blue', 'green', 'red']
+    assert tables['red'].lookup('8.8.8.8').via == '192.0.2.1'
+    assert tables['blue'].lookup('10.1.2.3').via == '198.51.100.2'
+    assert tables['green'].description == 'green'
+#---
+
+
+def test_errors_are_kept_per_target():
+    routes = RouteCollector(fetch=fetch)
+    tables = routes.collect(['red', 'down', 'garbled', 'blue'])
+
+    assert sorted(tables) == ['blue', 'red']
+    assert sorted(routes.errors) == ['down', 'garbled']
+    assert isinstance(routes.errors['down'], cmd.IPCommandError)
+    assert isinstance(routes.errors['garbled'], routegrammar.NODE_SPEC_Error)
+    assert sorted(routes.timings) == ['blue', 'down', 'garbled', 'red']
+
+    # Each collection starts afresh
+    assert list(routes.collect(['green'])) == ['green']
+    assert routes.errors == {} and list(routes.timings) == ['green']
+#---
+
+
+def test_timings(monkeypatch):
+    now = [0.0]
+    delays = {'red': 1.5, 'blue': 0.25, 'down': 2.0}
+    monkeypatch.setattr(collector, '_clock', lambda: now[0])
+
+    def slow_fetch(target):
+        now[0] += delays[target]
+        return fetch(target)
+
+    routes = RouteCollector(workers=1, fetch=slow_fetch)
+    routes.collect(['red', 'blue', 'down'])
+    assert routes.timings == delays
+#---
+
+
+def test_family_is_handed_to_tables(parser):
+    # 'default' only means ::/0 if the table knows it holds IPv6 routes
+    routes = RouteCollector(parser=parser, family=6,
+                            fetch=lambda target: iter(['default via fe80::1 dev eth0 metric 1024',
+                                                       '2001:db8::/64 dev eth0 proto kernel metric 256']))
+    table = routes.collect(['red'])['red']
+
+    assert table.family == 6
+    assert str(table['::/0'].via) == 'fe80::1'
+    assert table.lookup('2001:db9::1').via == 'fe80::1'
+    with pytest.raises(KeyError):
+        table['0.0.0.0/0']
+#---
+
+
+def test_namespaces(monkeypatch, tmp_path):
+    for name in ('red', 'blue'):
+        (tmp_path / name).write_text(u'')
+    monkeypatch.setattr(collector.netlink, 'NETNS_RUN_DIR', str(tmp_path))
+    fetched = []
+
+    def stream_routes(table=None, family=4, netns=None):
+        fetched.append((table, family, netns))
+        return iter(TABLES[netns].splitlines())
+
+    monkeypatch.setattr(cmd, 'stream_routes', stream_routes)
+    assert collector.list_namespaces() == ['blue', 'red']
+    assert sorted(RouteCollector(table='main').collect()) == ['blue', 'red']
+    assert sorted(fetched) == [('main', 4, 'blue'), ('main', 4, 'red')]
+
+    monkeypatch.setattr(collector.netlink, 'NETNS_RUN_DIR', str(tmp_path / 'missing'))
+    assert RouteCollector().collect() == {}
+#---
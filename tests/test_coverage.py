@@ -0,0 +1,85 @@
+# coding=utf-8
+#
+# NAME:         test_coverage.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of coverage analysis (RoutingTable.analyze and route.coverage), with both route parsers.
+#
+
+import pytest
+
+CONNECTED = '192.0.2.0/24 dev eth0 proto kernel scope link src 192.0.2.10\n'
+
+
+@pytest.fixture
+def analyze(load):
+    def analyze(text):
+        return load(CONNECTED + text).analyze()
+    return analyze
+#---
+
+
+def prefixes(routes):
+    return sorted(str(route.PREFIX) for route in routes)
+#---
+
+
+def test_shadowed(analyze):
+    report = analyze('10.0.0.0/24 via 192.0.2.1 dev eth0\n'
+                     '10.0.0.0/25 via 192.0.2.2 dev eth0\n'
+                     '10.0.0.128/26 via 192.0.2.2 dev eth0\n'
+                     '10.0.0.192/26 via 192.0.2.3 dev eth0\n'
+                     '10.1.0.0/24 via 192.0.2.1 dev eth0\n'
+                     '10.1.0.0/25 via 192.0.2.2 dev eth0\n'
+                     '10.1.0.192/26 via 192.0.2.3 dev eth0')
+    # 10.1.0.0/24 still owns 10.1.0.128/26
+    assert prefixes(report.shadowed) == ['10.0.0.0/24']
+    assert report.unreachable == [] and report.overlaps == []
+#---
+
+
+def test_tables_dont_shadow_each_other(analyze):
+    report = analyze('10.0.0.0/24 via 192.0.2.1 dev eth0\n'
+                     '10.0.0.0/25 via 192.0.2.2 dev eth0 table 100\n'
+                     '10.0.0.128/25 via 192.0.2.2 dev eth0 table 100')
+    assert report.shadowed == []
+#---
+
+
+def test_unreachable_gateways(analyze):
+    report = analyze('10.0.0.0/8 via 198.51.100.1 dev eth1\n'
+                     '10.1.0.0/16 via 198.51.100.1 dev eth1 metric 10\n'
+                     '10.2.0.0/16 via 198.51.100.2 dev eth1 onlink\n'
+                     '10.3.0.0/16 via 192.0.2.1 dev eth0\n'
+                     '10.4.0.0/16 nexthop via 192.0.2.1 dev eth0 nexthop via 203.0.113.1 dev eth2')
+    found = sorted((str(route.PREFIX), gateway) for route, gateway in report.unreachable)
+    assert found == [('10.0.0.0/8', '198.51.100.1'), ('10.1.0.0/16', '198.51.100.1'),
+                     ('10.4.0.0/16', '203.0.113.1')]
+#---
+
+
+def test_reject_overlaps(analyze):
+    report = analyze('blackhole 10.0.0.0/8\n'
+                     '10.1.0.0/16 via 192.0.2.1 dev eth0\n'
+                     '172.16.0.0/12 via 192.0.2.1 dev eth0\n'
+                     'unreachable 172.16.5.0/24\n'
+                     'prohibit 198.18.0.0/15')
+    overlaps = sorted((str(reject.PREFIX), str(route.PREFIX)) for reject, route in report.overlaps)
+    assert overlaps == [('10.0.0.0/8', '10.1.0.0/16'), ('172.16.5.0/24', '172.16.0.0/12')]
+    assert len(report) == 2
+#---
@@ -0,0 +1,206 @@
+# coding=utf-8
+#
+# NAME:         test_interface.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of InterfaceRegistry and of Interfaces reading from one, fed by a static link list and a fake clock.
+#
+
+import threading
+import time
+
+import pytest
+
+from iproute2 import interface
+from iproute2.interface import Interface, InterfaceError, InterfaceRegistry
+from iproute2.utils import cmd
+
+LINKS = [
+    {'ifindex': 1, 'ifname': 'eth0', 'address': '52:54:00:00:00:01', 'operstate': 'UP',
+     'addr_info': [{'family': 'inet', 'local': '192.0.2.10', 'prefixlen': 24, 'scope': 'global'},
+                   {'family': 'inet6', 'local': '2001:db8::10', 'prefixlen': 64, 'scope': 'global'}]},
+    {'ifindex': 2, 'ifname': 'eth1', 'address': '52:54:00:00:00:02', 'operstate': 'DOWN', 'addr_info': []},
+]
+
+
+class Fetch(object):
+    """
+    Stands in for cmd.interfaces, counting dumps.  'during' is called in the middle of each dump.
+
+    """
+    def __init__(self, links=LINKS, during=None):
+        self.links = links
+        self.during = during
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.during is not None:
+            self.during()
+        return list(self.links)
+#---
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(interface, '_clock', lambda: now[0])
+    return now
+#---
+
+
+def test_ttl(clock):
+    registry = InterfaceRegistry(ttl=5, fetch=Fetch())
+
+    assert registry.link('eth0')['ifindex'] == 1
+    assert registry.link('eth1')['operstate'] == 'DOWN'
+    assert registry.loads == 1
+
+    clock[0] += 4.9
+    registry.link('eth0')
+    assert registry.loads == 1
+
+    clock[0] += 0.1
+    registry.link('eth0')
+    assert registry.loads == 2
+#---
+
+
+def test_unknown_interface(clock):
+    registry = InterfaceRegistry(ttl=5, fetch=Fetch())
+
+    # An unknown name is never trusted, so each request for one dumps again
+    assert 'eth9' not in registry
+    with pytest.raises(InterfaceError):
+        registry.link('eth9')
+    assert 'eth0' in registry
+    assert registry.loads == 2
+#---
+
+
+def test_fetch_error(clock):
+    def fail():
+        raise cmd.IPCommandError('Cannot open netlink socket', 1)
+
+    with pytest.raises(InterfaceError):
+        InterfaceRegistry(fetch=fail).link('eth0')
+#---
+
+
+def test_invalidate(clock):
+    registry = InterfaceRegistry(ttl=5, fetch=Fetch())
+    registry.load()
+
+    registry.invalidate('eth0')
+    registry.link('eth1')
+    assert registry.loads == 1
+    registry.link('eth0')
+    assert registry.loads == 2
+
+    registry.invalidate(index=2)
+    registry.link('eth0')
+    assert registry.loads == 2
+    registry.link('eth1')
+    assert registry.loads == 3
+
+    # An index nothing is cached for is a new interface, which leaves the cache alone
+    registry.invalidate(index=99)
+    registry.link('eth0')
+    registry.link('eth1')
+    assert registry.loads == 3
+
+    registry.invalidate()
+    registry.link('eth1')
+    assert registry.loads == 4
+#---
+
+
+def test_invalidated_during_dump(clock):
+    fetch = Fetch()
+    registry = InterfaceRegistry(ttl=5, fetch=fetch)
+    fetch.during = lambda: registry.invalidate('eth0')
+    registry.load()
+
+    # The dump may have read eth0 before it changed, so only eth1 is trusted
+    fetch.during = None
+    registry.link('eth1')
+    assert registry.loads == 1
+    registry.link('eth0')
+    assert registry.loads == 2
+#---
+
+
+def test_follow(clock):
+    registry = InterfaceRegistry(ttl=5, fetch=Fetch())
+    registry.load()
+
+    # Events for links only carry an index, events for addresses may carry the name as well
+    registry.follow([(2, None)])
+    registry.link('eth0')
+    assert registry.loads == 1
+    registry.link('eth1')
+    assert registry.loads == 2
+
+    registry.watch(iter([(1, 'eth0')])).join(5)
+    registry.link('eth1')
+    assert registry.loads == 2
+    registry.link('eth0')
+    assert registry.loads == 3
+#---
+
+
+def test_one_dump_for_concurrent_requests():
+    release = threading.Event()
+    fetch = Fetch(during=lambda: release.wait(5))
+    registry = InterfaceRegistry(ttl=60, fetch=fetch)
+    found = []
+
+    def request():
+        found.append(registry.link('eth0')['ifname'])
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)        # Let every thread reach the registry while the first dump is held up
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert found == ['eth0'] * 8
+    assert fetch.calls == 1 and registry.loads == 1
+#---
+
+
+def test_interface_reads_registry(clock, monkeypatch):
+    def no_ip(*args, **kwargs):
+        raise AssertionError("'ip' run for an interface read from a registry")
+
+    monkeypatch.setattr(cmd, 'ip', no_ip)
+    monkeypatch.setattr(cmd, 'interfaces', no_ip)
+    registry = InterfaceRegistry(ttl=5, fetch=Fetch())
+
+    eth0 = Interface('eth0', registry=registry)
+    assert eth0.getAddresses() == {'mac': '52:54:00:00:00:01', 'v4': [('192.0.2.10', '24')],
+                                   'v6': [('2001:db8::10', '64')]}
+    assert eth0.status(simple=True) == 'UP'
+    assert registry.interface('eth1').getAddresses() == {'mac': '52:54:00:00:00:02', 'v4': [], 'v6': []}
+    assert registry.loads == 1
+
+    with pytest.raises(InterfaceError):
+        Interface('eth9', registry=registry)
+#---
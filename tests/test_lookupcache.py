@@ -0,0 +1,107 @@
+# coding=utf-8
+#
+# NAME:         test_lookupcache.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of the lookup cache (route.lookupcache), on its own and behind RoutingTable.lookup.
+#
+
+import random
+
+from iproute2.route import lookupcache
+from iproute2.route import routerecord
+from iproute2.routingtable import RoutingTable
+from iproute2.utils import prefix
+
+TABLE = '''default via 192.0.2.1 dev eth0
+10.0.0.0/8 via 192.0.2.2 dev eth0
+10.1.0.0/16 via 192.0.2.3 dev eth0
+2001:db8::/32 via fe80::1 dev eth0'''
+
+
+def cached(address, family, route=None):
+    cache = lookupcache.LookupCache(16)
+    cache.put(address, family, prefix.parse_address(address)[1], route)
+    return cache
+#---
+
+
+def test_hit_and_miss():
+    cache = cached('10.1.2.3', prefix.IP_V4, 'route')
+    assert cache.get('10.1.2.3') == 'route'
+    assert cache.get('10.1.2.4') is lookupcache.MISSING
+    assert (cache.hits, cache.misses) == (1, 1)
+#---
+
+
+def test_changes_elsewhere_keep_entries():
+    cache = cached('10.1.2.3', prefix.IP_V4, 'route')
+    for route_prefix in ('11.0.0.0/12', '10.2.0.0/16', '10.1.3.0/24', '10.1.3.128/25'):
+        _, network, length = prefix.parse_prefix(route_prefix)
+        cache.invalidate(prefix.IP_V4, network, length)
+        assert cache.get('10.1.2.3') == 'route', route_prefix
+    assert cache.stale == 0
+#---
+
+
+def test_changes_covering_the_address():
+    for route_prefix in ('0.0.0.0/0', '8.0.0.0/6', '10.0.0.0/12', '10.1.0.0/20', '10.1.2.0/24', '10.1.2.3/32'):
+        cache = cached('10.1.2.3', prefix.IP_V4, 'route')
+        _, network, length = prefix.parse_prefix(route_prefix)
+        cache.invalidate(prefix.IP_V4, network, length)
+        assert cache.get('10.1.2.3') is lookupcache.MISSING, route_prefix
+        assert cache.stale == 1
+#---
+
+
+def test_families_are_separate():
+    cache = cached('2001:db8::1', prefix.IP_V6, 'route')
+    cache.invalidate(prefix.IP_V4, 0, 0)
+    assert cache.get('2001:db8::1') == 'route'
+
+    cache.invalidate(prefix.IP_V6, 0x20010db8 << 96, 40)
+    assert cache.get('2001:db8::1') is lookupcache.MISSING
+#---
+
+
+def test_table_churn_never_returns_stale_routes():
+    rng = random.Random(25)
+    table = RoutingTable(parser=routerecord.parse_route, cache_size=256)
+    table.load(TABLE)
+    reference = RoutingTable(parser=routerecord.parse_route)
+    reference.load(TABLE)
+    addresses = ['10.{}.{}.{}'.format(rng.randint(0, 3), rng.randint(0, 3), rng.randint(0, 255)) for _ in range(64)]
+    added = {}      # prefix -> tokens of the route the tables hold for it
+
+    for step in range(400):
+        if added and rng.random() < 0.4:
+            tokens = ['del'] + added.pop(rng.choice(sorted(added)))
+        else:
+            length = rng.choice((4, 8, 12, 16, 20, 24, 28, 32))
+            network = (10 << 24 | rng.getrandbits(18) << 6) & ~((1 << (32 - length)) - 1)
+            tokens = ['{}.{}.{}.{}/{}'.format(network >> 24, network >> 16 & 255, network >> 8 & 255, network & 255,
+                                              length), 'via', '192.0.2.{}'.format(step % 250 + 1), 'dev', 'eth0']
+            added[tokens[0]] = tokens
+        table.apply(tokens)
+        reference.apply(tokens)
+
+        for address in rng.sample(addresses, 8):
+            assert str(table.lookup(address)) == str(reference.lookup(address)), (step, address)
+
+    assert table.lookup_cache.hits > 0
+#---
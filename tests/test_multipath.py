@@ -0,0 +1,60 @@
+# coding=utf-8
+#
+# NAME:         test_multipath.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of multipath next hop selection (route.multipath).
+#
+
+from iproute2.route import multipath
+
+
+def group(*nexthops):
+    return multipath.make_group(nexthops)
+#---
+
+
+def test_thresholds_follow_weights():
+    weighted = group({'via': '192.0.2.1', 'weight': 1}, {'via': '192.0.2.2', 'weight': 3})
+    # The kernel's upper bounds for weights 1 and 3: a quarter and all of the 31-bit hash space
+    assert weighted.bounds == [(1 << 29) - 1, (1 << 31) - 1]
+#---
+
+
+def test_select_uses_top_31_bits():
+    weighted = group({'via': '192.0.2.1', 'weight': 1}, {'via': '192.0.2.2', 'weight': 3})
+
+    # The first next hop owns the bottom quarter of the 32-bit hash space, the second the rest
+    assert weighted.select(0).via == '192.0.2.1'
+    assert weighted.select((1 << 30) - 1).via == '192.0.2.1'
+    assert weighted.select(1 << 30).via == '192.0.2.2'
+    assert weighted.select(0xffffffff).via == '192.0.2.2'
+
+    # The low bit doesn't count, and nor does anything above bit 31
+    assert weighted.select(0x5bd1e995) == weighted.select(0x5bd1e994) == weighted.select(0x15bd1e995)
+    hashes = [0, 1 << 29, 1 << 30, 0x5bd1e995, 0xffffffff]
+    assert weighted.select_many(hashes) == [weighted.select(flow_hash) for flow_hash in hashes]
+#---
+
+
+def test_dead_nexthops_take_no_traffic():
+    mixed = group({'via': '192.0.2.1', 'flags': ['dead']}, {'via': '192.0.2.2'})
+    assert set(nexthop.via for nexthop in mixed.select_many(range(0, 1 << 32, 1 << 28))) == {'192.0.2.2'}
+
+    assert group({'via': '192.0.2.1', 'flags': ['dead']}).select(0) is None
+#---
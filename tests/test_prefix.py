@@ -0,0 +1,77 @@
+# coding=utf-8
+#
+# NAME:         test_prefix.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of utils.prefix and of the grammar's fallback to cidrize for prefixes it can't parse itself.
+#
+
+import pytest
+
+from iproute2.route import routegrammar
+from iproute2.utils import prefix
+
+V6_NETWORK = 0x20010db8 << 96
+
+
+def test_host_bits_masked_off():
+    assert prefix.normalize_prefix('10.1.2.3/8') == (prefix.IP_V4, 10 << 24, 8)
+    assert prefix.normalize_prefix('192.0.2.77/26') == (prefix.IP_V4, (192 << 24 | 2 << 8 | 64), 26)
+    assert prefix.normalize_prefix('10.1.2.3') == (prefix.IP_V4, 10 << 24 | 1 << 16 | 2 << 8 | 3, 32)
+#---
+
+
+def test_ipv6():
+    assert prefix.normalize_prefix('2001:db8::1/32') == (prefix.IP_V6, V6_NETWORK, 32)
+    assert prefix.normalize_prefix('2001:db8::1') == (prefix.IP_V6, V6_NETWORK | 1, 128)
+    assert prefix.format_prefix(*prefix.normalize_prefix('2001:db8:1::/48')) == '2001:db8:1::/48'
+#---
+
+
+def test_default():
+    assert prefix.normalize_prefix('default') == (prefix.IP_V4, 0, 0)
+    assert prefix.normalize_prefix('default', prefix.IP_V6) == (prefix.IP_V6, 0, 0)
+    assert prefix.parse_prefix('default', prefix.IP_V6) == (prefix.IP_V6, 0, 0)
+#---
+
+
+def test_repeated_prefixes_share_a_tuple():
+    assert prefix.normalize_prefix('172.16.0.0/12') is prefix.normalize_prefix('172.16.0.0/12')
+#---
+
+
+@pytest.mark.parametrize('text', ['bogus', '10.0.0.300/8', '10.0.0.0/33', '10.0.0.0/x', '10.0.0.0/-1',
+                                  '2001:db8::/129', '2001:db8::g/64', '', '10.0.0.*'])
+def test_invalid(text):
+    with pytest.raises(prefix.PrefixError):
+        prefix.normalize_prefix(text)
+    assert prefix.prefix_cache.get(text) is None
+#---
+
+
+def test_cidrize_fallback():
+    # Forms 'ip route' doesn't print are left to cidrize, and have no network for the index
+    route = routegrammar.ROUTE('192.0.2.1-192.0.2.10 dev eth0'.split())
+    assert route.PREFIX == '192.0.2.1-192.0.2.10' and route.network is None
+
+    route = routegrammar.ROUTE('10.1.2.3/8 dev eth0'.split())
+    assert route.network == (prefix.IP_V4, 10 << 24, 8)
+
+    with pytest.raises(routegrammar.NODE_SPEC_Error):
+        routegrammar.ROUTE('10.0.0.300/8 dev eth0'.split())
+#---
@@ -0,0 +1,96 @@
+# coding=utf-8
+#
+# NAME:         test_routediff.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of RoutingTable.diff and route.routediff, with both route parsers.
+#
+
+import io
+
+import pytest
+
+from iproute2.route import routediff
+from iproute2.routingtable import RoutingTable
+
+OLD_TABLE = '''default via 192.168.1.1 dev eth0 proto dhcp metric 100
+10.0.0.0/8 via 192.168.1.254 dev eth0
+10.1.0.0/16 via 192.168.1.253 dev eth0
+10.1.0.0/16 via 192.168.1.252 dev eth0 metric 50
+172.16.0.0/12 via 192.168.1.250 dev eth0 mtu 1400 advmss 1360
+192.168.1.0/24 dev eth0 proto kernel scope link src 192.168.1.10
+2001:db8::/64 dev eth0 proto kernel metric 256 pref medium
+default via fe80::1 dev eth0 proto ra metric 1024 pref medium'''
+
+NEW_TABLE = '''default via 192.168.1.1 dev eth0 proto dhcp metric 100
+10.0.0.0/8 via 192.168.1.254 dev eth1
+10.1.0.0/16 via 192.168.1.253 dev eth0
+10.1.0.0/16 via 192.168.1.252 dev eth0 metric 60
+172.16.0.0/12 via 192.168.1.250 dev eth0 advmss 1360 mtu 1400
+192.168.1.0/24 dev eth0 proto kernel scope link src 192.168.1.10
+192.168.2.0/24 via 192.168.1.2 dev eth0
+default via fe80::2 dev eth0 proto ra metric 1024 pref medium'''
+
+
+def prefixes(routes):
+    return sorted((str(route.PREFIX), route.metric) for route in routes)
+#---
+
+
+def test_identical_tables(load):
+    assert len(load(OLD_TABLE).diff(load(OLD_TABLE))) == 0
+#---
+
+
+def test_added_removed_modified(load):
+    diff = load(OLD_TABLE).diff(load(NEW_TABLE))
+
+    # A changed metric is a different route as far as the kernel is concerned
+    assert prefixes(diff.added) == [('10.1.0.0/16', '60'), ('192.168.2.0/24', None)]
+    assert prefixes(diff.removed) == [('10.1.0.0/16', '50'), ('2001:db8::/64', '256')]
+
+    changes = dict((str(change.new.PREFIX), change.changes) for change in diff.modified)
+    assert sorted(changes) == ['10.0.0.0/8', '::/0']
+    assert changes['10.0.0.0/8'] == {'NH': {'dev': ('eth0', 'eth1')}}
+    assert changes['::/0'] == {'NH': {'via': ('fe80::1', 'fe80::2')}}
+    assert len(diff) == 6
+#---
+
+
+def test_between_indexes_matches_constructor(load):
+    old = load(OLD_TABLE)
+    new = load(NEW_TABLE)
+    keyed = routediff.RouteDiff(old.routes(), new.routes(), RoutingTable.route_key)
+    indexed = old.diff(new)
+
+    assert prefixes(indexed.added) == prefixes(keyed.added)
+    assert prefixes(indexed.removed) == prefixes(keyed.removed)
+    assert (sorted(str(change) for change in indexed.modified) ==
+            sorted(str(change) for change in keyed.modified))
+#---
+
+
+def test_write_batch(load):
+    output = io.StringIO()
+    count = load(OLD_TABLE).diff(load(NEW_TABLE)).write_batch(output)
+    lines = output.getvalue().splitlines()
+
+    assert count == len(lines) == 6
+    assert sum(line.startswith('route del') for line in lines) == 2
+    assert sum(line.startswith('route replace') for line in lines) == 4
+#---
@@ -0,0 +1,183 @@
+# coding=utf-8
+#
+# NAME:         test_routeparsers.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests that the single-pass parser (routerecord.parse_route) reads routes exactly as the routing grammar
+# (routegrammar.ROUTE) does.
+#
+
+import pytest
+
+from iproute2.route import multipath
+from iproute2.route import routegrammar
+from iproute2.route import routerecord
+from iproute2.utils import prefix
+
+ROUTES = [
+    '10.0.0.0/8 via 192.0.2.2 dev eth0 proto static metric 10 mtu 1400 src 192.0.2.1',
+    'blackhole 10.2.0.0/16',
+    'default via 192.0.2.254 dev eth0 proto dhcp metric 100',
+    '10.1.0.0/16 proto bird nexthop via 192.0.2.3 dev eth0 weight 1 nexthop via 198.51.100.3 dev eth1 weight 3',
+    'del 10.5.0.0/16 dev eth0 table 100',
+    '192.0.2.7 dev eth0 scope link',
+    'local 192.0.2.1 dev eth0 table local proto kernel scope host src 192.0.2.1',
+    '2001:db8::/64 dev eth0 proto kernel metric 256 pref medium',
+    '10.7.0.0/16 tos 0x10 via 192.0.2.9 dev eth0 rtt 20ms initcwnd 10',
+    '10.8.0.0/16 via 198.51.100.1 dev eth1 onlink',
+]
+
+
+@pytest.mark.parametrize('line', ROUTES)
+def test_parsers_agree(line):
+    grammar = routegrammar.ROUTE(line.split())
+    record = routerecord.parse_route(line.split())
+
+    for field in routerecord.FIELDS:
+        assert str(getattr(record, field)) == str(getattr(grammar, field)), field
+    assert record.network == grammar.network
+    assert str(record) == str(grammar)
+#---
+
+
+def test_record_fields():
+    record = routerecord.parse_route(ROUTES[0].split())
+
+    assert (record.PREFIX, record.via, record.dev, record.proto, record.metric) == \
+           ('10.0.0.0/8', '192.0.2.2', 'eth0', 'static', '10')
+    assert (record.mtu, record.src, record.rtt) == ('1400', '192.0.2.1', None)
+    assert record.network == (prefix.IP_V4, 10 << 24, 8)
+    assert record.option_values == (('mtu', '1400'), ('src', '192.0.2.1'))
+#---
+
+
+def test_record_segments():
+    record = routerecord.parse_route(ROUTES[0].split())
+
+    assert record['NODE_SPEC'].PREFIX == '10.0.0.0/8'
+    assert record['INFO_SPEC']['NH'].dev == 'eth0'
+    assert record['INFO_SPEC']['OPTIONS'].mtu == '1400'
+    assert str(record['NODE_SPEC']) == '10.0.0.0/8 proto static metric 10'
+#---
+
+
+def test_child_fields():
+    fields = routegrammar.ROUTE.childFields()
+
+    assert fields['PREFIX'] == ('NODE_SPEC',)
+    assert fields['via'] == ('INFO_SPEC', 'NH')
+    assert fields['mtu'] == ('INFO_SPEC', 'OPTIONS')
+    assert fields['nexthop'] == ('INFO_SPEC',)
+    assert routegrammar.INFO_SPEC.childFields()['dev'] == ('NH',)
+#---
+
+
+def test_child_fields_attribute_first():
+    route = routegrammar.ROUTE(ROUTES[0].split())
+
+    assert (route.via, route['INFO_SPEC'].dev, route.mtu) == ('192.0.2.2', 'eth0', '1400')
+    assert str(route['NODE_SPEC']) == '10.0.0.0/8 proto static metric 10'
+    with pytest.raises(KeyError):
+        route['via']
+    with pytest.raises(AttributeError):
+        route.missing
+#---
+
+
+def test_child_fields_item_first():
+    route = routegrammar.ROUTE(ROUTES[0].split())
+
+    with pytest.raises(KeyError):
+        route['via']
+    assert str(route['NODE_SPEC']) == '10.0.0.0/8 proto static metric 10'
+    assert (route.via, route['INFO_SPEC'].dev, route.mtu) == ('192.0.2.2', 'eth0', '1400')
+    assert route.via == '192.0.2.2'
+#---
+
+
+def test_record_leaves_tokens_alone():
+    tokens = ROUTES[3].split()
+    routerecord.parse_route(tokens)
+    assert tokens == ROUTES[3].split()
+#---
+
+
+def test_multipath():
+    record = routerecord.parse_route(ROUTES[3].split())
+
+    assert record.via is None
+    assert [(nexthop.via, nexthop.dev, nexthop.weight) for nexthop in record.nexthop] == \
+           [('192.0.2.3', 'eth0', 1), ('198.51.100.3', 'eth1', 3)]
+#---
+
+
+@pytest.mark.parametrize('parser', [routegrammar.ROUTE, routerecord.parse_route])
+def test_invalid_prefix(parser):
+    with pytest.raises(routegrammar.NODE_SPEC_Error):
+        parser('10.0.0.300/8 dev eth0'.split())
+#---
+
+
+def test_json_route():
+    record = routerecord.parse_json_route({'dst': '10.0.0.0/8', 'gateway': '192.0.2.2', 'dev': 'eth0',
+                                           'protocol': 'static', 'metric': 10, 'prefsrc': '192.0.2.1',
+                                           'metrics': [{'mtu': 1400, 'rtt': 20}], 'flags': ['onlink']})
+    text = routerecord.parse_route('10.0.0.0/8 proto static metric 10 via 192.0.2.2 dev eth0 onlink '
+                                   'src 192.0.2.1 mtu 1400 rtt 20ms'.split())
+    for field in routerecord.FIELDS:
+        assert getattr(record, field) == getattr(text, field), field
+#---
+
+
+def test_shared_values():
+    first = routerecord.parse_route(''.join(['10.0.0.0/8 via 192.0.2.2 dev ', 'eth0']).split())
+    second = routerecord.parse_route(''.join(['10.1.0.0/16 via 192.0.2.2 dev ', 'eth0']).split())
+
+    assert first.dev is second.dev
+    assert first.via is second.via
+#---
+
+
+def test_shared_values_are_bounded(monkeypatch):
+    monkeypatch.setattr(routerecord, 'SHARED_VALUES_LIMIT', 8)
+    monkeypatch.setattr(routerecord, 'shared_values', {})
+    for number in range(50):
+        routerecord.parse_route('10.{}.0.0/16 via 192.0.2.{} dev eth{}'.format(number, number, number).split())
+        assert len(routerecord.shared_values) <= 8 + 2
+
+    # Values handed out before the pool was emptied are kept by their routes
+    record = routerecord.parse_route('10.0.0.0/8 via 192.0.2.99 dev eth99'.split())
+    assert (record.via, record.dev) == ('192.0.2.99', 'eth99')
+#---
+
+
+def test_shared_groups_are_bounded(monkeypatch):
+    monkeypatch.setattr(multipath, 'SHARED_LIMIT', 4)
+    monkeypatch.setattr(multipath, 'shared_nexthops', {})
+    monkeypatch.setattr(multipath, 'shared_groups', {})
+    groups = [multipath.make_group([{'via': '192.0.2.{}'.format(number)}, {'via': '198.51.100.1'}])
+              for number in range(20)]
+
+    assert len(multipath.shared_groups) <= 4
+    assert len(multipath.shared_nexthops) <= 4 + 2
+    assert multipath.make_group([{'via': '192.0.2.19'}, {'via': '198.51.100.1'}]) == groups[-1]
+
+    multipath.shared_groups.clear()
+    group = multipath.make_group([{'via': '192.0.2.1'}, {'via': '198.51.100.1'}])
+    assert multipath.make_group([{'via': '192.0.2.1'}, {'via': '198.51.100.1'}]) is group
+#---
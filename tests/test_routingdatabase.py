@@ -0,0 +1,184 @@
+# coding=utf-8
+#
+# NAME:         test_routingdatabase.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of RoutingDatabase rule resolution and route.policyrule, with both route parsers.
+#
+
+import pytest
+
+from iproute2.route import policyrule
+from iproute2.routingdatabase import RoutingDatabase
+from iproute2.routingtable import RoutingTableError
+from iproute2.utils import prefix
+
+# 'ip route show table all'
+ROUTES = '''default via 192.0.2.1 dev eth0 proto dhcp metric 100
+10.0.0.0/8 via 192.0.2.2 dev eth0
+192.0.2.0/24 dev eth0 proto kernel scope link src 192.0.2.10
+default via 198.51.100.1 dev eth1 table 100
+10.1.0.0/16 via 198.51.100.2 dev eth1 table 100
+throw 10.2.0.0/16 table 100
+unreachable 10.3.0.0/16 table 100
+10.4.0.0/16 via 198.51.100.4 dev eth1 table 200
+local 192.0.2.10 dev eth0 table local proto kernel scope host src 192.0.2.10'''
+
+
+@pytest.fixture
+def load(parser):
+    def load(rules):
+        database = RoutingDatabase(parser=parser)
+        database.load(ROUTES, '\n'.join(rules))
+        return database
+    return load
+#---
+
+
+def resolved(database, destination, **kwargs):
+    """
+    The priority of the deciding rule and the via (or type) of the route it found.
+
+    """
+    found = database.resolve(destination, **kwargs)
+    if found is None:
+        return None
+    rule, route = found
+    if route is None:
+        return rule.priority, None
+    return rule.priority, route.via or route.TYPE
+#---
+
+
+def test_parse_rule():
+    rule = policyrule.parse_rule('32765: not from 10.0.0.0/8 fwmark 0x10/0xff iif eth0 lookup 100 '
+                                 'suppress_prefixlength 0'.split())
+    assert (rule.priority, rule.invert, rule.action, rule.table) == (32765, True, 'lookup', '100')
+    assert rule.source == (prefix.IP_V4, 10 << 24, 8) and rule.destination is None
+    assert (rule.fwmark, rule.fwmask, rule.iif, rule.suppress_prefixlength) == (0x10, 0xff, 'eth0', 0)
+
+    rule = policyrule.parse_rule('100: from all goto 200 [unresolved]'.split())
+    assert (rule.action, rule.goto, rule.source) == ('goto', 200, None)
+
+    rule = policyrule.parse_rule('from all to 10.5.0.0/16 prohibit'.split())
+    assert (rule.priority, rule.action, rule.table) == (0, 'prohibit', None)
+
+    assert policyrule.parse_rule('1000: from all lookup [l3mdev-table]'.split()).l3mdev
+
+    for text in ('1x: from all lookup main', '100: from 10.0.0.300/8 lookup main', '100: from all fwmark x1 goto 2'):
+        with pytest.raises(policyrule.PolicyRuleError):
+            policyrule.parse_rule(text.split())
+#---
+
+
+def test_tables(load):
+    database = load(['0: from all lookup local', '32766: from all lookup main'])
+
+    assert sorted(database.tables) == ['100', '200', 'local', 'main']
+    assert 100 in database and 'main' in database and None in database
+    assert database.lookup('10.1.2.3', 100).via == '198.51.100.2'
+    assert database.lookup('10.1.2.3').via == '192.0.2.2'
+    assert database.lookup('10.1.2.3', 300) is None
+    assert database.get('10.1.0.0/16', table=100).dev == 'eth1'
+    assert database.get('default', metric=100).via == '192.0.2.1'
+    assert database.get('default') is None
+#---
+
+
+def test_rule_order(load):
+    # Listed out of order; rules sharing a priority keep the order they were listed in
+    database = load(['32766: from all lookup main',
+                             '200: from all lookup 200',
+                             '100: from all to 10.1.0.0/16 lookup 100',
+                             '200: from all lookup 100'])
+
+    assert [(rule.priority, rule.table) for rule in database.rules] == \
+           [(100, '100'), (200, '200'), (200, '100'), (32766, 'main')]
+    assert resolved(database, '10.1.2.3') == (100, '198.51.100.2')
+    assert resolved(database, '10.4.0.1') == (200, '198.51.100.4')
+    # Table 200 has no route, so the next rule of the same priority decides
+    assert resolved(database, '8.8.8.8') == (200, '198.51.100.1')
+#---
+
+
+def test_selectors(load):
+    database = load(['100: from 192.0.2.128/25 lookup 100',
+                             '200: from all iif eth2 lookup 200',
+                             '300: not from all fwmark 0x2/0x2 lookup 100',
+                             '32766: from all lookup main'])
+
+    assert resolved(database, '10.4.0.1', source='192.0.2.200') == (100, '198.51.100.1')
+    assert resolved(database, '10.4.0.1', source='192.0.2.100', iif='eth2') == (200, '198.51.100.4')
+    # 'not' inverts the whole selector
+    assert resolved(database, '10.4.0.1', fwmark=0x1) == (300, '198.51.100.1')
+    assert resolved(database, '10.4.0.1', fwmark=0x3) == (32766, '192.0.2.2')
+#---
+
+
+def test_goto(load):
+    database = load(['100: from all fwmark 0x1 goto 300',
+                             '200: from all lookup 100',
+                             '300: from all lookup main'])
+
+    assert resolved(database, '10.1.2.3', fwmark=0x1) == (300, '192.0.2.2')
+    assert resolved(database, '10.1.2.3') == (200, '198.51.100.2')
+#---
+
+
+def test_unresolved_goto(load):
+    # No rule has priority 250, so the kernel treats the goto as a no-op rather than jumping to rule 300
+    database = load(['100: from all goto 250 [unresolved]',
+                             '200: from all lookup 100',
+                             '300: from all lookup main'])
+
+    assert resolved(database, '10.1.2.3') == (200, '198.51.100.2')
+#---
+
+
+def test_suppress_prefixlength(load):
+    database = load(['100: from all lookup main suppress_prefixlength 0',
+                             '200: from all lookup 100'])
+
+    # main's default route is suppressed, its more specific routes aren't
+    assert resolved(database, '8.8.8.8') == (200, '198.51.100.1')
+    assert resolved(database, '10.1.2.3') == (100, '192.0.2.2')
+#---
+
+
+def test_throw_and_reject(load):
+    database = load(['50: from all to 10.5.0.0/16 prohibit',
+                             '60: from all to 10.6.0.0/16 unreachable',
+                             '100: from all lookup 100',
+                             '200: from all lookup main'])
+
+    # A throw route ends the lookup in its table, and the search moves on
+    assert resolved(database, '10.2.0.1') == (200, '192.0.2.2')
+    # An unreachable route is found like any other route
+    assert resolved(database, '10.3.0.1') == (100, 'unreachable')
+    assert resolved(database, '10.5.0.1') == (50, None)
+    assert resolved(database, '10.6.0.1') == (60, None)
+#---
+
+
+def test_no_match(load):
+    database = load(['100: from all lookup [l3mdev-table]', '200: from all lookup 200'])
+
+    assert database.resolve('8.8.8.8') is None
+    with pytest.raises(RoutingTableError):
+        database.resolve('not-an-address')
+#---
@@ -0,0 +1,245 @@
+# coding=utf-8
+#
+# NAME:         test_routingtable.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of RoutingTable loading and longest-prefix-match lookups, with both route parsers.
+#
+
+import io
+import json
+
+import pytest
+
+from iproute2.route import routerecord
+from iproute2.route import snapshot
+from iproute2.routingtable import InvalidRouteError, RoutingTable
+from iproute2.utils import cmd
+
+# 'ip route show table all' lists both families, each with its own 'default'
+MIXED_TABLE = '''default via 192.168.1.1 dev eth0 proto dhcp metric 100
+10.0.0.0/8 via 192.168.1.254 dev eth0
+10.1.0.0/16 via 192.168.1.253 dev eth0
+10.1.0.0/16 via 192.168.1.252 dev eth0 metric 50
+192.168.1.0/24 dev eth0 proto kernel scope link src 192.168.1.10
+2001:db8::/64 dev eth0 proto kernel metric 256 pref medium
+2001:db8:1::/48 via fe80::2 dev eth0 metric 1024 pref medium
+default via fe80::1 dev eth0 proto ra metric 1024 pref medium'''
+
+
+def test_lookup_longest_prefix(load):
+    table = load(MIXED_TABLE)
+    assert table.lookup('10.2.3.4').via == '192.168.1.254'
+    assert table.lookup('192.168.1.77').dev == 'eth0'
+    assert table.lookup('192.168.1.77').via is None
+    assert table.lookup('8.8.8.8').via == '192.168.1.1'
+#---
+
+
+def test_lookup_lowest_metric_wins(load):
+    table = load(MIXED_TABLE)
+    assert table.lookup('10.1.2.3').via == '192.168.1.253'
+#---
+
+
+def test_mixed_families_keep_their_defaults(load):
+    table = load(MIXED_TABLE)
+    assert table.lookup('8.8.8.8').via == '192.168.1.1'
+    assert table.lookup('2001:db9::1').via == 'fe80::1'
+    assert table.lookup('2001:db8:1::5').via == 'fe80::2'
+    assert table.lookup('2001:db8::5').via is None
+
+    prefixes = [route.PREFIX for route in table.routes()]
+    assert '0.0.0.0/0' in prefixes and '::/0' in prefixes
+    assert '::/0 proto ra metric 1024 via fe80::1 dev eth0' in table.write().splitlines()
+#---
+
+
+def test_family_from_table(load):
+    # Nothing in the route says which family it is, so the table's family decides
+    table = load('default dev wg0 metric 5', family=6)
+    assert table['default'].PREFIX == '::/0'
+    assert table.lookup('2001:db8::1') is not None
+    assert table.lookup('10.0.0.1') is None
+#---
+
+
+@pytest.mark.parametrize('parser', [routerecord.parse_route])
+def test_json_mixed_families(load):
+    routes = [{'dst': 'default', 'gateway': '192.168.1.1', 'dev': 'eth0'},
+              {'dst': 'default', 'gateway': 'fe80::1', 'dev': 'eth0', 'pref': 'medium'}]
+    table = load(json.dumps(routes))
+    assert table.lookup('8.8.8.8').via == '192.168.1.1'
+    assert table.lookup('2001:db9::1').via == 'fe80::1'
+#---
+
+
+def test_lookup_invalid_address(load):
+    table = load(MIXED_TABLE)
+    with pytest.raises(InvalidRouteError):
+        table.lookup('not-an-address')
+#---
+
+
+@pytest.mark.parametrize('source', ['file', 'system'])
+def test_stream_matches_buffered_load(parser, load, source, monkeypatch):
+    # As 'ip route' prints a multipath route: its nexthops on lines of their own
+    text = MIXED_TABLE + ('\n10.9.0.0/16 proto static metric 20 \n'
+                          '\tnexthop via 192.168.1.2 dev eth0 weight 1 \n'
+                          '\tnexthop via 192.168.1.3 dev eth0 weight 2 ')
+    buffered = load(text)
+    streamed = RoutingTable(parser=parser)
+    if source == 'file':
+        streamed.load(stream=io.StringIO(text))
+    else:
+        monkeypatch.setattr(cmd, 'stream_routes', lambda family: cmd.join_multipath(io.StringIO(text)))
+        streamed.load(stream=True)
+
+    assert [str(route) for route in streamed.routes()] == [str(route) for route in buffered.routes()]
+    assert {key: str(route) for key, route in streamed.table.items()} == \
+           {key: str(route) for key, route in buffered.table.items()}
+    assert streamed.write() == buffered.write()
+    assert str(streamed.lookup('10.9.1.1')) == str(buffered.lookup('10.9.1.1'))
+    assert len(streamed.diff(buffered)) == 0
+#---
+
+
+def test_follow_multipath_and_bad_events(load):
+    table = load('10.0.0.0/8 dev eth0')
+    events = ['10.1.0.0/16 proto static metric 20',
+              '\tnexthop via 10.0.0.2 dev eth0 weight 1',
+              '\tnexthop via 10.0.0.3 dev eth0 weight 1',
+              'not a route',
+              'Deleted 10.9.0.0/16 dev eth0',
+              '172.16.0.0/12 dev eth1']
+    changes = list(table.follow(events))
+
+    assert [action for action, _ in changes] == ['add', 'add']
+    assert [nexthop.via for nexthop in table.lookup('10.1.2.3').nexthop] == ['10.0.0.2', '10.0.0.3']
+    assert table.lookup('172.16.0.1').dev == 'eth1'
+#---
+
+
+def test_changes_match_a_fresh_build(load):
+    def views(table):
+        return ({key: str(route) for key, route in table.table.items()},
+                {key: str(route) for key, route in table.table_no_cidr.items()})
+
+    table = load(MIXED_TABLE)
+    assert table['10.1.0.0/16'].metric is None        # The preferred of the two 10.1.0.0/16 routes
+    for line in ('10.1.0.0/16 via 192.168.1.251 dev eth0 metric 20',
+                 '10.0.0.0/8 via 192.168.1.250 dev eth0 metric 5'):
+        table.apply(line.split())
+        table.apply(['del'] + line.split())
+
+    assert views(table) == views(load(MIXED_TABLE))
+#---
+
+
+def test_write_multipath_with_options(load):
+    # 'ip route' takes a multipath route's nexthops back only after its options
+    line = ('10.1.0.0/16 proto bird mtu 1400 src 192.0.2.1 '
+            'nexthop via 192.0.2.3 dev eth0 weight 1 nexthop via 198.51.100.3 dev eth1 weight 3')
+    table = load(line)
+    written = table.write()
+
+    assert written.splitlines() == [line]
+    assert str(table.lookup('10.1.0.1')) == line
+    assert len(load(written).diff(table)) == 0
+#---
+
+
+def test_lookup_many_matches_lookup(load):
+    table = load(MIXED_TABLE)
+    addresses = ['10.2.3.4', '10.1.2.3', '192.168.1.77', '8.8.8.8', '2001:db9::1', '2001:db8:1::5',
+                 '2001:db8::5', '10.255.255.255', '0.0.0.0']
+    expected = [(route.via, route.dev) for route in map(table.lookup, addresses)]
+    assert table.lookup_many(addresses) == expected
+    assert table.lookup_many([]) == []
+#---
+
+
+@pytest.mark.parametrize('parser', [routerecord.parse_route])
+def test_lookup_many_without_route(load):
+    table = load('10.0.0.0/8 dev eth0\n'
+                 '10.1.0.0/16 nexthop via 10.0.0.2 dev eth0 nexthop via 10.0.0.3 dev eth0')
+    assert table.lookup_many(['10.2.0.1', '11.0.0.1', '10.1.0.1', '::1']) == \
+           [(None, 'eth0'), None, (None, None), None]
+    with pytest.raises(InvalidRouteError):
+        table.lookup_many(['10.0.0.1', 'bogus'])
+#---
+
+
+def test_snapshot_answers_like_the_table(load, tmp_path):
+    table = load(MIXED_TABLE)
+    path = str(tmp_path / 'routes.snap')
+    table.save(path)
+    addresses = ['10.2.3.4', '10.1.2.3', '192.168.1.77', '8.8.8.8', '2001:db8:1::5', '2001:db8::5']
+
+    with RoutingTable.open(path) as snapshot:
+        assert len(snapshot) == len(list(table.routes()))
+        assert [str(snapshot.lookup(address)) for address in addresses] == \
+               [str(table.lookup(address)) for address in addresses]
+        assert snapshot.lookup_many(addresses) == table.lookup_many(addresses)
+
+        with pytest.raises(InvalidRouteError):
+            snapshot.lookup('not-an-address')
+        with pytest.raises(InvalidRouteError):
+            snapshot.lookup_many(['10.0.0.1', 'bogus'])
+#---
+
+
+@pytest.mark.parametrize('contents', [b'', b'not a snapshot' * 20, b'\0' * snapshot.HEADER.size],
+                         ids=['empty', 'text', 'zeros'])
+def test_open_rejects_other_files(contents, tmp_path, monkeypatch):
+    mapped = []
+    def mmap(*args, **kwargs):
+        mapped.append(real_mmap(*args, **kwargs))
+        return mapped[-1]
+    real_mmap = snapshot.mmap.mmap
+    monkeypatch.setattr(snapshot.mmap, 'mmap', mmap)
+    path = tmp_path / 'routes.snap'
+    path.write_bytes(contents)
+
+    with pytest.raises(snapshot.SnapshotError):
+        RoutingTable.open(str(path))
+    assert all(data.closed for data in mapped)
+#---
+
+
+def test_open_rejects_other_versions(load, tmp_path):
+    path = str(tmp_path / 'routes.snap')
+    load(MIXED_TABLE).save(path)
+    with open(path, 'r+b') as snapshot_file:
+        snapshot_file.seek(len(snapshot.MAGIC))
+        snapshot_file.write(b'\xff')
+
+    with pytest.raises(snapshot.SnapshotError):
+        RoutingTable.open(path)
+#---
+
+
+def test_failed_save_leaves_nothing_behind(load, tmp_path, monkeypatch):
+    def rename(source, destination):
+        raise OSError('rename failed')
+    monkeypatch.setattr(snapshot.os, 'rename', rename)
+
+    with pytest.raises(OSError):
+        load(MIXED_TABLE).save(str(tmp_path / 'routes.snap'))
+    assert list(tmp_path.iterdir()) == []
+#---
@@ -0,0 +1,107 @@
+# coding=utf-8
+#
+# NAME:         test_stats.py
+#
+# AUTHOR:       agent <agent@local>
+# COPYRIGHT:    2026 by agent
+# LICENSE:
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# DESCRIPTION:
+#   Tests of StatsSampler, fed by fake counters and a fake clock.
+#
+
+import itertools
+import sys
+import threading
+
+from iproute2 import stats
+
+
+class FakeCounters(object):
+    """
+    Every interface's counters grow by a fixed amount per sample; a new interface turns up every 'grow' samples.
+
+    """
+    def __init__(self, grow=None):
+        self.samples = 0
+        self.grow = grow
+        self.clock = itertools.count()
+
+    def __call__(self):
+        self.samples += 1
+        interfaces = 2 + (self.samples // self.grow if self.grow else 0)
+        return dict(('eth{}'.format(number), tuple(float(self.samples * (number + 1) * 100)
+                                                   for _ in stats.COUNTERS))
+                    for number in range(interfaces))
+
+    def time(self):
+        return float(next(self.clock))
+#---
+
+
+def test_rates():
+    counters = FakeCounters()
+    sampler = stats.StatsSampler(size=4, read=counters, clock=counters.time)
+    assert sampler.rates() == {}
+
+    for _ in range(6):
+        sampler.sample()
+    assert sampler.rates('rx_bytes') == {'eth0': 100.0, 'eth1': 200.0}
+    assert sampler.rates('tx_bytes', window=3) == {'eth0': 100.0, 'eth1': 200.0}
+    assert sampler.percentiles('rx_bytes', 50) == {'eth0': 100.0, 'eth1': 200.0}
+#---
+
+
+def test_new_interfaces():
+    counters = FakeCounters(grow=3)
+    sampler = stats.StatsSampler(size=4, read=counters, clock=counters.time)
+    for _ in range(3):
+        sampler.sample()
+
+    rates = sampler.rates('rx_bytes', window=2)
+    assert rates['eth0'] == 100.0
+    assert rates['eth2'] is None        # Only seen in the latest sample
+#---
+
+
+def test_reading_while_sampling():
+    # A new interface every other sample, so rows are widened while rates are read
+    counters = FakeCounters(grow=2)
+    sampler = stats.StatsSampler(size=64, read=counters, clock=counters.time)
+    sampler.sample()
+    sampler.sample()
+    errors = []
+
+    def read():
+        try:
+            for _ in range(300):
+                for name, rate in sampler.rates('rx_bytes', window=2).items():
+                    assert rate is None or rate == (int(name[3:]) + 1) * 100.0
+                sampler.percentiles('tx_bytes')
+        except Exception as err:
+            errors.append(err)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)         # Switch threads as often as possible
+    try:
+        reader = threading.Thread(target=read)
+        reader.start()
+        while reader.is_alive():
+            sampler.sample()
+        reader.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+#---